@@ -102,6 +102,30 @@ DATABASES = {
 }
 
 
+# Cache
+# La caché se comparte vía base de datos, también en desarrollo, para que
+# todos los procesos web lean las mismas respuestas guardadas. Las entradas
+# pueden descartarse al llenarse; los contadores que las invalidan viven en
+# la tabla DataVersion (core.cache), no aquí.
+# Requiere `python manage.py createcachetable`.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+    }
+}
+
+# Segundos que se guarda el resumen del dashboard
+DASHBOARD_CACHE_TTL = 60
+
+# Los reportes se invalidan por versión de datos; el TTL solo libera espacio
+REPORTS_CACHE_TTL = 60 * 60 * 6
+
+# Horas que se conserva un archivo de exportación en segundo plano
+REPORT_EXPORT_TTL_HOURS = 24
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -141,8 +165,19 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
 # Media files
+# El worker (run_worker) escribe aquí exportaciones, comprobantes e imágenes
+# que luego entrega el proceso web: ambos deben ver el mismo directorio
+# (mismo host o disco compartido, ver render.yaml).
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', os.path.join(BASE_DIR, 'media'))
+
+# Entrega de archivos de MEDIA_ROOT (ver core.storage): 'django', 'accel'
+# (nginx con X-Accel-Redirect) o 'sendfile' (X-Sendfile)
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'django')
+# Ubicación interna de nginx que apunta a MEDIA_ROOT
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+# Vigencia mínima de las URLs firmadas (segundos)
+MEDIA_URL_TTL = 60 * 60
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -13,13 +13,13 @@ from core.views import (
     DepartmentViewSet, ProvinceViewSet, DistrictViewSet, 
     CaserioViewSet, ClientViewSet, ZoneViewSet,
     SedeViewSet, VisitViewSet, AuditoriaViewSet,
-    DashboardViewSet
+    DashboardViewSet, JobViewSet, SignedMediaView
 )
 from payments.views import (
     PaymentViewSet, MonthlyFeeViewSet, ServiceViewSet,
     ConfigPreciosZonaViewSet
 )
-from reports.views import ReportsViewSet
+from reports.views import ReportsViewSet, ReportExportViewSet
 
 router = DefaultRouter()
 # Users
@@ -40,6 +40,7 @@ router.register(r'sedes', SedeViewSet)
 router.register(r'visitas', VisitViewSet)
 router.register(r'auditoria', AuditoriaViewSet)
 router.register(r'dashboard', DashboardViewSet, basename='dashboard')
+router.register(r'jobs', JobViewSet)
 
 # Payments
 router.register(r'services', ServiceViewSet)
@@ -47,6 +48,7 @@ router.register(r'payments', PaymentViewSet)
 router.register(r'monthly-fees', MonthlyFeeViewSet)
 router.register(r'precios-zona', ConfigPreciosZonaViewSet)
 router.register(r'reports', ReportsViewSet, basename='reports')
+router.register(r'report-exports', ReportExportViewSet)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -54,6 +56,7 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('api/password-reset/', PasswordResetRequestView.as_view(), name='password_reset'),
+    path('api/media/<str:token>/', SignedMediaView.as_view(), name='signed-media'),
 ]
 
 if settings.DEBUG:
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Sede, Department, Province, District, Caserio,
-    Zone, Client, Visit, Auditoria
+    Zone, Client, Visit, Auditoria, Job, Checkpoint, DataVersion
 )
 
 @admin.register(Sede)
@@ -64,3 +64,22 @@ class AuditoriaAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'status', 'lock_key', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('kind', 'lock_key')
+    readonly_fields = ('progress', 'error', 'attempts', 'created_at', 'started_at', 'finished_at', 'updated_at')
+
+
+@admin.register(Checkpoint)
+class CheckpointAdmin(admin.ModelAdmin):
+    list_display = ('name', 'mark', 'updated_at')
+
+
+@admin.register(DataVersion)
+class DataVersionAdmin(admin.ModelAdmin):
+    list_display = ('scope', 'version')
+    search_fields = ('scope',)
@@ -0,0 +1,183 @@
+"""
+Escenarios de benchmark de la API y los reportes.
+
+Cada escenario se ejecuta varias veces midiendo el tiempo de reloj; luego
+una corrida extra con tracemalloc y captura de consultas registra el pico
+de memoria y la cantidad de consultas (se separan para que el rastreo de
+memoria no infle los tiempos). La caché se limpia antes de cada corrida,
+así se mide el cálculo y no la lectura de una respuesta guardada.
+"""
+import datetime
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+import django
+from django.core.cache import cache
+from django.db import connection, reset_queries, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import User
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _get(username, url):
+    def run():
+        client = APIClient()
+        client.force_authenticate(User.objects.get(username=username))
+        response = client.get(url)
+        if response.status_code != 200:
+            raise AssertionError(f"GET {url} -> {response.status_code}")
+        # Consumir el cuerpo completo (también en respuestas por streaming)
+        if getattr(response, 'streaming', False):
+            for _ in response.streaming_content:
+                pass
+        else:
+            response.content
+    return run
+
+
+def _generate_fees():
+    """
+    Genera las deudas del mes siguiente y deshace todo al terminar, para
+    que cada corrida parta del mismo estado.
+    """
+    from payments.fees import generate_fees, month_dates
+
+    today = timezone.localdate()
+    following = (today.replace(day=28) + datetime.timedelta(days=4))
+    month_date, due_date = month_dates(following.year, following.month)
+    try:
+        with transaction.atomic():
+            generate_fees(month_date, due_date)
+            raise _Rollback()
+    except _Rollback:
+        pass
+
+
+def scenarios():
+    """
+    Escenarios disponibles: nombre -> función sin argumentos.
+    Usan los usuarios que crea core.synthetic.
+    """
+    admin, cobrador = 'bench_admin', 'bench_cobrador_0_0'
+    reports = {
+        'debtors': '/api/reports/debtors/',
+        'debtors_csv': '/api/reports/debtors/?format=csv',
+        'worklist': '/api/reports/worklist/',
+        'revenue': '/api/reports/revenue/',
+        'revenue_csv': '/api/reports/revenue/?format=csv',
+        'revenue_series_day': '/api/reports/revenue-series/?bucket=day',
+        'revenue_series_month': '/api/reports/revenue-series/?bucket=month',
+        'forecast': '/api/reports/forecast/',
+        'sede_comparison': '/api/reports/sede-comparison/',
+        'aging_client': '/api/reports/aging/',
+        'aging_cobrador': '/api/reports/aging/?group_by=cobrador',
+        'collectors': '/api/reports/collectors/',
+        'collector_stats': '/api/reports/collector-stats/',
+    }
+    lists = ['clients', 'payments', 'monthly-fees', 'services', 'visitas', 'auditoria']
+
+    result = {
+        'dashboard_admin': _get(admin, '/api/dashboard/'),
+        'dashboard_cobrador': _get(cobrador, '/api/dashboard/'),
+    }
+    result.update({f'reports.{name}': _get(admin, url) for name, url in reports.items()})
+    result['reports.debtors_cobrador'] = _get(cobrador, '/api/reports/debtors/')
+    result['reports.worklist_cobrador'] = _get(cobrador, '/api/reports/worklist/')
+    result.update({f'list.{name}': _get(admin, f'/api/{name}/') for name in lists})
+    result['generate_monthly_fees'] = _generate_fees
+    return result
+
+
+def measure(func, repeat=3):
+    """
+    Ejecuta `func` `repeat` veces y una vez más instrumentada.
+    """
+    timings = []
+    for _ in range(repeat):
+        cache.clear()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    cache.clear()
+    reset_queries()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'wall_ms_min': round(min(timings), 2),
+        'wall_ms_median': round(statistics.median(timings), 2),
+        'queries': len(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run(names=None, repeat=3, log=None):
+    log = log or (lambda name, result: None)
+    results = {}
+    for name, func in scenarios().items():
+        if names and not any(name == wanted or name.startswith(f'{wanted}.') for wanted in names):
+            continue
+        try:
+            results[name] = measure(func, repeat)
+        except Exception as e:
+            results[name] = {'error': str(e)}
+        log(name, results[name])
+    return results
+
+
+def environment():
+    return {
+        'created_at': timezone.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def save(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False, sort_keys=True)
+
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Compara dos corridas escenario por escenario. Una regresión es una
+    mediana de tiempo mayor en más de `threshold` (fracción), más consultas,
+    o un pico de memoria mayor en más de `threshold`.
+    Retorna una lista de filas (escenario, métrica, antes, ahora, cambio,
+    regresión).
+    """
+    rows = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before or 'error' in before or 'error' in now:
+            continue
+        for metric in ('wall_ms_median', 'queries', 'peak_kb'):
+            old, new = before[metric], now[metric]
+            change = (new - old) / old if old else 0
+            if metric == 'queries':
+                regression = new > old
+            else:
+                regression = change > threshold
+            rows.append((name, metric, old, new, change, regression))
+    return rows
@@ -0,0 +1,98 @@
+"""
+Contadores de versión de datos para invalidar cachés de lectura.
+
+Cada sede tiene su contador, hay uno global que sube con cualquier escritura
+y una "época" que invalida todo de una vez (procesos masivos). Las llaves de
+caché incluyen la versión vigente, así que al subir el contador las entradas
+viejas simplemente dejan de leerse.
+
+Los contadores se guardan en la tabla DataVersion y no en la caché: la
+caché descarta entradas al llenarse (MAX_ENTRIES) y un contador que vuelve
+a un valor anterior haría válidas de nuevo entradas viejas.
+
+Los contadores suben recién cuando confirma la transacción en curso (fuera
+de una transacción, en el acto): si subieran antes, una lectura concurrente
+podría guardar datos aún sin confirmar bajo la versión nueva y quedarían
+vigentes hasta la siguiente escritura.
+"""
+import time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import DataVersion
+
+
+EPOCH_KEY = 'datos:epoca'
+GLOBAL_KEY = 'datos:version:all'
+
+
+def _sede_key(sede_id):
+    return f'datos:version:sede:{sede_id}'
+
+
+def _seed():
+    # Un contador nuevo (o borrado) arranca en microsegundos desde epoch, por
+    # encima de cualquier valor que haya podido tener antes
+    return time.time_ns() // 1000
+
+
+def incr(key):
+    """
+    Sube el contador `key` con un UPDATE atómico, creándolo si no existe.
+    """
+    if DataVersion.objects.filter(scope=key).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            DataVersion.objects.create(scope=key, version=_seed())
+    except IntegrityError:
+        # Otro proceso lo creó entre el UPDATE y el INSERT
+        DataVersion.objects.filter(scope=key).update(version=F('version') + 1)
+
+
+def get_many(keys):
+    """
+    Valor de cada contador; 0 si aún no existe.
+    """
+    values = dict(DataVersion.objects.filter(scope__in=keys).values_list('scope', 'version'))
+    return {key: values.get(key, 0) for key in keys}
+
+
+def _bump_now(sede_ids):
+    for sede_id in sede_ids:
+        incr(_sede_key(sede_id))
+    incr(GLOBAL_KEY)
+
+
+def bump(*sede_ids):
+    """
+    Marca como cambiados los datos de las sedes indicadas (y el global)
+    al confirmar la transacción.
+    """
+    sede_ids = {sede_id for sede_id in sede_ids if sede_id}
+    transaction.on_commit(lambda: _bump_now(sede_ids))
+
+
+def bump_all():
+    """
+    Invalida todas las cachés versionadas (para escrituras masivas) al
+    confirmar la transacción.
+    """
+    transaction.on_commit(lambda: incr(EPOCH_KEY))
+
+
+def current_version(sede_id=None):
+    """
+    Versión vigente para una sede, o la global si no hay sede.
+    """
+    scope_key = _sede_key(sede_id) if sede_id else GLOBAL_KEY
+    values = get_many([EPOCH_KEY, scope_key])
+    return f"{values[EPOCH_KEY]}.{values[scope_key]}"
+
+
+def versioned_key(prefix, sede_id, *parts):
+    """
+    Arma una llave de caché que incluye la versión de datos de la sede.
+    """
+    return ':'.join([prefix, *[str(part) for part in parts], f'v{current_version(sede_id)}'])
@@ -0,0 +1,140 @@
+"""
+Cola de tareas en segundo plano respaldada por la base de datos.
+
+Cada app registra sus manejadores en un módulo `jobs.py` con el decorador
+`register`. El comando `run_worker` reclama tareas de la tabla Job y las
+ejecuta fuera del ciclo request/response de gunicorn.
+"""
+import datetime
+import traceback
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+
+# Una tarea 'running' sin señales de vida por más de este tiempo se da por
+# perdida (el worker murió) y libera su lock.
+STALE_AFTER = datetime.timedelta(minutes=30)
+
+# Espera antes de reintentar una tarea fallida: RETRY_DELAY * intento
+RETRY_DELAY = datetime.timedelta(seconds=30)
+
+_handlers = {}
+
+
+class JobLocked(Exception):
+    """
+    Ya existe una tarea activa con la misma llave de bloqueo.
+    """
+
+    def __init__(self, job):
+        super().__init__(f"Ya existe una tarea activa: {job}")
+        self.job = job
+
+
+def register(kind):
+    """
+    Registra una función como manejador de un tipo de tarea.
+
+    El manejador recibe (job, report) y puede retornar un dict que se guarda
+    como progreso final. `report(**valores)` persiste el progreso parcial.
+    """
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('jobs')
+
+
+def enqueue(kind, params=None, lock_key='', user=None, max_attempts=1, run_after=None):
+    """
+    Encola una tarea. Si `lock_key` está ocupado por otra tarea activa
+    lanza JobLocked con esa tarea.
+    """
+    try:
+        with transaction.atomic():
+            return Job.objects.create(
+                kind=kind,
+                params=params or {},
+                lock_key=lock_key,
+                created_by=user,
+                max_attempts=max_attempts,
+                run_after=run_after or timezone.now(),
+            )
+    except IntegrityError:
+        active = Job.objects.filter(lock_key=lock_key, status__in=Job.ACTIVE_STATUSES).first()
+        if active is None:
+            raise
+        raise JobLocked(active)
+
+
+def reap_stale():
+    """
+    Marca como fallidas las tareas 'running' abandonadas por un worker caído.
+    """
+    return Job.objects.filter(
+        status='running',
+        updated_at__lt=timezone.now() - STALE_AFTER
+    ).update(status='failed', error='Tarea abandonada por el worker', finished_at=timezone.now())
+
+
+def claim_next(kinds=None):
+    """
+    Reclama la siguiente tarea en cola.
+
+    El reclamo es un UPDATE condicionado al estado 'queued', así que dos
+    workers nunca toman la misma tarea.
+    """
+    now = timezone.now()
+    queryset = Job.objects.filter(status='queued', run_after__lte=now)
+    if kinds:
+        queryset = queryset.filter(kind__in=kinds)
+
+    for job_id in queryset.order_by('run_after', 'id').values_list('id', flat=True)[:10]:
+        claimed = Job.objects.filter(id=job_id, status='queued').update(
+            status='running',
+            started_at=now,
+            updated_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run_job(job):
+    handler = _handlers.get(job.kind)
+
+    def report(**values):
+        job.progress.update(values)
+        Job.objects.filter(id=job.id).update(progress=job.progress, updated_at=timezone.now())
+
+    try:
+        if handler is None:
+            raise LookupError(f"No hay manejador registrado para '{job.kind}'")
+        result = handler(job, report)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = 'queued'
+            job.run_after = timezone.now() + RETRY_DELAY * job.attempts
+        else:
+            job.status = 'failed'
+            job.finished_at = timezone.now()
+    else:
+        if result:
+            job.progress.update(result)
+        job.status = 'done'
+        job.error = ''
+        job.finished_at = timezone.now()
+
+    job.updated_at = timezone.now()
+    job.save(update_fields=['status', 'progress', 'error', 'run_after', 'finished_at', 'updated_at'])
+    return job
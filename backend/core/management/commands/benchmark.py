@@ -0,0 +1,93 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from core import benchmark, synthetic
+
+class Command(BaseCommand):
+    help = (
+        'Mide tiempos, consultas y memoria del dashboard, los reportes, los listados y la '
+        'generación de deudas sobre una base de datos de prueba con datos sintéticos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='benchmark.json', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--compare', help='Resultados anteriores (JSON) contra los que comparar')
+        parser.add_argument('--threshold', type=float, default=0.2, help='Tolerancia de tiempo y memoria (0.2 = 20%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Termina con error si hay regresiones')
+        parser.add_argument('--repeat', type=int, default=3, help='Corridas cronometradas por escenario')
+        parser.add_argument('--only', action='append', help='Solo este escenario o grupo (ej: reports, list.clients); repetible')
+        parser.add_argument('--list', action='store_true', help='Muestra los escenarios disponibles y termina')
+
+        data = parser.add_argument_group('datos sintéticos')
+        data.add_argument('--seed', type=int)
+        data.add_argument('--sedes', type=int)
+        data.add_argument('--caserios', type=int)
+        data.add_argument('--clients', type=int)
+        data.add_argument('--cobradores-per-sede', type=int)
+        data.add_argument('--months', type=int, help='Meses de deudas y pagos hacia atrás')
+        data.add_argument('--visits-per-client', type=int)
+        data.add_argument('--audit-rows', type=int)
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name in benchmark.scenarios():
+                self.stdout.write(name)
+            return
+
+        baseline = benchmark.load(options['compare']) if options['compare'] else None
+        data_options = {key: options[key] for key in synthetic.DEFAULTS}
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        self.stdout.write("🧪 Creando base de datos de prueba...")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.stdout.write("🔄 Generando datos sintéticos...")
+            counts = synthetic.generate(log=lambda msg: self.stdout.write(f"   · {msg}"), **data_options)
+
+            self.stdout.write("⏱️  Ejecutando escenarios...")
+            results = benchmark.run(options['only'], options['repeat'], log=self._log)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        config = {**synthetic.DEFAULTS, **{key: value for key, value in data_options.items() if value is not None}}
+        benchmark.save(options['output'], {
+            'environment': benchmark.environment(),
+            'config': config,
+            'counts': counts,
+            'repeat': options['repeat'],
+            'scenarios': results,
+        })
+        self.stdout.write(self.style.SUCCESS(f"✅ Resultados guardados en {options['output']}"))
+
+        if baseline:
+            self._compare(baseline, config, results, options)
+
+    def _log(self, name, result):
+        if 'error' in result:
+            self.stdout.write(self.style.ERROR(f"   ❌ {name}: {result['error']}"))
+        else:
+            self.stdout.write(
+                f"   {name:<34} {result['wall_ms_median']:>10.1f} ms {result['queries']:>6} consultas "
+                f"{result['peak_kb']:>10.1f} KB"
+            )
+
+    def _compare(self, baseline, config, results, options):
+        if baseline.get('config') != config:
+            self.stdout.write(self.style.WARNING("⚠️  Los datos sintéticos difieren de los de la corrida anterior"))
+        rows = benchmark.compare(baseline.get('scenarios', {}), results, options['threshold'])
+        regressions = [row for row in rows if row[5]]
+
+        self.stdout.write(f"\n📊 Comparación con {options['compare']}")
+        for name, metric, old, new, change, regression in rows:
+            line = f"   {name:<34} {metric:<15} {old:>10} → {new:<10} {change:+.0%}"
+            self.stdout.write(self.style.ERROR(f"{line}  ⚠️") if regression else line)
+
+        if regressions:
+            message = f"{len(regressions)} regresiones respecto a {options['compare']}"
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(f"⚠️  {message}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Sin regresiones"))
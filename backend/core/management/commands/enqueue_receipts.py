@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from payments.models import Payment
+from payments.receipts import enqueue_receipt
+
+class Command(BaseCommand):
+    help = 'Encola la generación de comprobantes PDF pendientes o fallidos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Incluye también los comprobantes fallidos')
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'failed'] if options['failed'] else ['pending']
+        payment_ids = Payment.objects.filter(receipt_status__in=statuses).values_list('id', flat=True)
+
+        count = 0
+        for payment_id in payment_ids.iterator():
+            enqueue_receipt(payment_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"✅ Comprobantes encolados: {count}"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from payments.fees import DEFAULT_CHUNK_SIZE, expire_overdue_fees
+
+class Command(BaseCommand):
+    help = 'Marca como vencidas (expired) las deudas pendientes cuya fecha de vencimiento ya pasó'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Deudas por UPDATE')
+        parser.add_argument('--dry-run', action='store_true', help='Solo cuenta las deudas que se marcarían')
+
+    def handle(self, *args, **options):
+        count = expire_overdue_fees(
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"🔎 Deudas por vencer: {count}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ Deudas marcadas como vencidas: {count}"))
@@ -1,8 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from core.models import Client
-from payments.models import MonthlyFee, Service
-import datetime
+from payments.fees import (
+    DEFAULT_CHUNK_SIZE, generate_fees, generate_fees_parallel, month_dates, plan_partitions
+)
 
 class Command(BaseCommand):
     help = 'Genera las deudas mensuales para todos los clientes con servicios activos'
@@ -10,58 +10,59 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument('--month', type=int, help='Mes (1-12)', default=timezone.now().month)
         parser.add_argument('--year', type=int, help='Año (ej: 2024)', default=timezone.now().year)
+        parser.add_argument('--sede', type=int, help='ID de la sede a procesar (por defecto todas)')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Servicios por lote de inserción')
+        parser.add_argument('--dry-run', action='store_true', help='Calcula el resultado sin insertar deudas')
+        parser.add_argument('--workers', type=int, default=1, help='Procesos en paralelo (1 = sin paralelismo)')
+        parser.add_argument(
+            '--partition-by', choices=['sede', 'range'], default='sede',
+            help='Cómo dividir los servicios entre procesos: por sede del cliente o por rangos de id'
+        )
 
     def handle(self, *args, **options):
-        month = options['month']
-        year = options['year']
-        
-        # Primer día del mes
-        month_date = datetime.date(year, month, 1)
-        
-        # Fecha de vencimiento (ej: día 15 del mes)
-        due_date = month_date + datetime.timedelta(days=14)
-        
+        # Primer día del mes y fecha de vencimiento (día 15)
+        month_date, due_date = month_dates(options['year'], options['month'])
+        dry_run = options['dry_run']
+
         self.stdout.write(f"🔄 Generando deudas para: {month_date.strftime('%B %Y')}")
-        
-        # Obtener todos los servicios activos
-        active_services = Service.objects.filter(is_active=True)
-        
-        created_count = 0
-        skipped_count = 0
-        errors_count = 0
-        
-        for service in active_services:
-            try:
-                client = service.client
-                
-                # Verificar si ya existe deuda para este mes/servicio
-                if MonthlyFee.objects.filter(client=client, service=service, month_date=month_date).exists():
-                    skipped_count += 1
-                    continue
-                
-                # Calcular precio
-                price = client.get_service_price(service.service_type)
-                
-                # Si no hay precio de zona, usar el precio base del servicio
-                if price is None:
-                    price = service.price
-                
-                # Crear deuda
-                MonthlyFee.objects.create(
-                    client=client,
-                    service=service,
-                    month_date=month_date,
-                    due_date=due_date,
-                    amount=price,
-                    status='pending'
-                )
-                created_count += 1
-                
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(f"❌ Error con cliente {client}: {str(e)}"))
-                errors_count += 1
-        
+        if dry_run:
+            self.stdout.write(self.style.WARNING("   (simulación: no se insertará nada)"))
+
+        log = lambda msg: self.stdout.write(self.style.ERROR(f"❌ {msg}"))
+        workers = options['workers']
+
+        if workers > 1:
+            partitions = plan_partitions(options['partition_by'], options['sede'], parts=workers)
+            self.stdout.write(f"   {len(partitions)} particiones en {workers} procesos")
+
+            def on_partition(partition, partial, error):
+                if error:
+                    log(f"Partición {partition}: {error}")
+                else:
+                    self.stdout.write(f"   · {partition}: {partial.created} generadas, {partial.skipped} saltadas")
+
+            result = generate_fees_parallel(
+                month_date,
+                due_date,
+                partitions,
+                workers,
+                sede_id=options['sede'],
+                chunk_size=options['chunk_size'],
+                dry_run=dry_run,
+                on_partition=on_partition,
+            )
+        else:
+            result = generate_fees(
+                month_date,
+                due_date,
+                sede_id=options['sede'],
+                chunk_size=options['chunk_size'],
+                dry_run=dry_run,
+                log=log,
+            )
+
         self.stdout.write(self.style.SUCCESS(f"\n✅ Proceso completado"))
-        self.stdout.write(f"   - Generadas: {created_count}")
-        self.stdout.write(f"   - Saltadas (ya existían): {skipped_count}")
-        self.stdout.write(f"   - Errores: {errors_count}")
+        self.stdout.write(f"   - Procesados: {result.processed}")
+        self.stdout.write(f"   - {'Por generar' if dry_run else 'Generadas'}: {result.created}")
+        self.stdout.write(f"   - Saltadas (ya existían): {result.skipped}")
+        self.stdout.write(f"   - Errores: {result.errors}")
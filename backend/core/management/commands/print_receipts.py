@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from payments.models import Payment
+from payments.receipts import batch_queryset
+from payments.utils import write_receipts
+
+class Command(BaseCommand):
+    help = 'Genera un PDF con los comprobantes de un día (una página por pago) para imprimir en lote'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Día YYYY-MM-DD (por defecto hoy)')
+        parser.add_argument('--sede', type=int, help='ID de la sede')
+        parser.add_argument('--cobrador', type=int, help='ID del usuario que registró los pagos')
+        parser.add_argument('--output', help='Archivo PDF de salida (por defecto comprobantes_<fecha>.pdf)')
+
+    def handle(self, *args, **options):
+        day = parse_date(options['date']) if options['date'] else None
+        if options['date'] and not day:
+            raise CommandError('Formato de fecha inválido, use YYYY-MM-DD')
+
+        payments = batch_queryset(Payment.objects.all(), day, options['sede'], options['cobrador'])
+        output = options['output'] or f"comprobantes_{options['date'] or 'hoy'}.pdf"
+
+        start = time.perf_counter()
+        with open(output, 'wb') as f:
+            count = write_receipts(payments.iterator(chunk_size=500), f)
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {count} comprobantes en {output} ({elapsed:.1f} s)"))
@@ -0,0 +1,51 @@
+import os
+
+from django.core.management.base import BaseCommand
+from core import storage
+from payments.models import Payment
+from payments.proofs import enqueue_proof, file_hash
+
+class Command(BaseCommand):
+    help = 'Encola la generación de versiones livianas y miniaturas de las imágenes de constancia pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true', help='Incluye también las imágenes fallidas')
+        parser.add_argument(
+            '--check-ready', action='store_true',
+            help='Vuelve a encolar las imágenes listas cuyas versiones no están en MEDIA_ROOT'
+        )
+
+    def handle(self, *args, **options):
+        statuses = ['pending', 'failed'] if options['failed'] else ['pending']
+        payments = Payment.objects.filter(proof_status__in=statuses).exclude(proof_image='').only('id', 'proof_image', 'proof_hash')
+
+        count = missing = 0
+        for payment in payments.iterator():
+            if not payment.proof_hash:
+                # Subida antes del pipeline: se calcula el hash del archivo existente
+                try:
+                    proof_hash = file_hash(payment.proof_image)
+                except FileNotFoundError:
+                    Payment.objects.filter(id=payment.id).update(proof_status='failed')
+                    missing += 1
+                    continue
+                Payment.objects.filter(id=payment.id).update(proof_hash=proof_hash)
+            enqueue_proof(payment.id)
+            count += 1
+
+        if options['check_ready']:
+            # Por ejemplo, versiones que escribió un worker sin el disco del proceso web
+            ready = Payment.objects.filter(proof_status='ready').exclude(proof_image='').only(
+                'id', 'proof_display', 'proof_thumbnail'
+            )
+            for payment in ready.iterator():
+                variants = (payment.proof_display, payment.proof_thumbnail)
+                if all(variant and os.path.exists(storage.media_path(variant.name)) for variant in variants):
+                    continue
+                Payment.objects.filter(id=payment.id).update(proof_status='pending')
+                enqueue_proof(payment.id)
+                count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Imágenes encoladas: {count}"))
+        if missing:
+            self.stdout.write(self.style.WARNING(f"⚠️  Imágenes sin archivo en disco: {missing}"))
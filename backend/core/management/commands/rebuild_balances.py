@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from payments.balances import BATCH_SIZE, rebuild_balances
+
+class Command(BaseCommand):
+    help = 'Recalcula el saldo desnormalizado (ClientBalance) de los clientes por lotes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sede', type=int, help='ID de la sede a recalcular (por defecto todas)')
+        parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE, help='Clientes por lote')
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 Recalculando saldos de clientes...")
+
+        processed = rebuild_balances(
+            sede_id=options['sede'],
+            chunk_size=options['chunk_size'],
+            on_chunk=lambda count: self.stdout.write(f"   · {count} clientes"),
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Saldos recalculados: {processed} clientes"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from core.models import Auditoria
+from payments.allocation import reconcile_fees
+
+class Command(BaseCommand):
+    help = 'Recalcula lo pagado en las deudas reproduciendo todos los pagos validados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sede', type=int, help='ID de la sede a reconciliar (por defecto todas)')
+
+    def handle(self, *args, **options):
+        sede_id = options['sede']
+        self.stdout.write(f"🔄 Reconciliando deudas{f' de la sede {sede_id}' if sede_id else ''}...")
+
+        result = reconcile_fees(sede_id)
+
+        Auditoria.objects.create(
+            tabla='MonthlyFee',
+            registro_id=0,
+            usuario=None,
+            accion='UPDATE',
+            detalle={
+                'proceso': 'reconcile_fees',
+                'sede': sede_id,
+                'deudas_actualizadas': result['fees_updated'],
+                'aplicaciones': result['allocations'],
+                'saldo_sin_aplicar': str(result['unapplied']),
+            }
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"\n✅ Proceso completado"))
+        self.stdout.write(f"   - Deudas actualizadas: {result['fees_updated']}")
+        self.stdout.write(f"   - Aplicaciones de pago: {result['allocations']}")
+        self.stdout.write(f"   - Saldo sin deuda donde aplicarse: S/ {result['unapplied']}")
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from core import jobs
+
+class Command(BaseCommand):
+    help = 'Procesa la cola de tareas en segundo plano (tabla Job)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesa las tareas pendientes y termina')
+        parser.add_argument('--poll', type=float, default=2.0, help='Segundos de espera cuando la cola está vacía')
+        parser.add_argument('--kind', action='append', dest='kinds', help='Solo procesar este tipo de tarea (repetible)')
+
+    def handle(self, *args, **options):
+        jobs.autodiscover()
+        self.stdout.write("👷 Worker iniciado")
+
+        while True:
+            close_old_connections()
+            jobs.reap_stale()
+
+            job = jobs.claim_next(options['kinds'])
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+                continue
+
+            self.stdout.write(f"▶️  {job}")
+            job = jobs.run_job(job)
+            if job.status == 'done':
+                self.stdout.write(self.style.SUCCESS(f"✅ {job}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"❌ {job}\n{job.error}"))
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_checkpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(max_length=100, unique=True)),
+                ('version', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name': 'Versión de datos',
+                'verbose_name_plural': 'Versiones de datos',
+            },
+        ),
+    ]
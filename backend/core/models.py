@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class Sede(models.Model):
     """
@@ -109,22 +110,14 @@ class Client(models.Model):
         2. Precio por Zona (ConfigPreciosZona)
         3. Precio base del servicio (si existiera default)
         
-        Por ahora, buscamos en ConfigPreciosZona usando el caserío del cliente.
+        Por ahora, buscamos en ConfigPreciosZona usando el caserío del cliente
+        a través del índice en memoria de payments.pricing.
         """
-        from payments.models import ConfigPreciosZona
-        from django.utils import timezone
+        from payments.pricing import price_resolver
         
-        # 1. Buscar precio por zona (Caserío)
-        if self.caserio:
-            config_zona = ConfigPreciosZona.objects.filter(
-                zona=self.caserio,
-                tipo_servicio=service_type,
-                activo=True,
-                vigencia_desde__lte=timezone.now().date()
-            ).order_by('-vigencia_desde').first()
-            
-            if config_zona:
-                return config_zona.precio_base
+        # 1. Buscar precio por zona (Caserío), respetando vigencia_desde/hasta
+        if self.caserio_id:
+            return price_resolver.price_for(self.caserio_id, service_type)
                 
         # 2. Si no hay precio de zona, retornar None (o un default global si existiera)
         return None
@@ -183,3 +176,86 @@ class Auditoria(models.Model):
     
     def __str__(self):
         return f"{self.get_accion_display()} - {self.tabla} #{self.registro_id}"
+
+
+class Job(models.Model):
+    """
+    Tarea en segundo plano persistida en base de datos.
+    La cola la procesa el comando `run_worker`, sin broker externo.
+    """
+    STATUS_CHOICES = [
+        ('queued', 'En cola'),
+        ('running', 'En proceso'),
+        ('done', 'Completado'),
+        ('failed', 'Fallido'),
+    ]
+    ACTIVE_STATUSES = ['queued', 'running']
+    
+    kind = models.CharField(max_length=50)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    
+    # Mientras la tarea esté activa, no puede existir otra con la misma llave
+    lock_key = models.CharField(max_length=100, blank=True)
+    
+    progress = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=1)
+    run_after = models.DateTimeField(default=timezone.now)
+    
+    created_by = models.ForeignKey('users.User', on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        verbose_name = 'Tarea'
+        verbose_name_plural = 'Tareas'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['lock_key'],
+                condition=models.Q(status__in=['queued', 'running']) & ~models.Q(lock_key=''),
+                name='unique_active_job_lock',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.id} ({self.get_status_display()})"
+
+
+class Checkpoint(models.Model):
+    """
+    Marca de avance (high-water mark) de procesos incrementales, para que
+    cada corrida solo procese lo nuevo desde la anterior.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    mark = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Marca de proceso'
+        verbose_name_plural = 'Marcas de proceso'
+    
+    def __str__(self):
+        return f"{self.name}: {self.mark}"
+
+
+class DataVersion(models.Model):
+    """
+    Contador de versión de datos para invalidar cachés (ver core.cache).
+    """
+    scope = models.CharField(max_length=100, unique=True)
+    version = models.BigIntegerField()
+    
+    class Meta:
+        verbose_name = 'Versión de datos'
+        verbose_name_plural = 'Versiones de datos'
+    
+    def __str__(self):
+        return f"{self.scope}: {self.version}"
@@ -1,9 +1,23 @@
 from rest_framework import serializers
+from .storage import signed_url
 from .models import (
     Department, Province, District, Caserio, Client, Zone,
-    Sede, Visit, Auditoria
+    Sede, Visit, Auditoria, Job
 )
 
+class SignedImageField(serializers.ImageField):
+    """
+    ImageField que se entrega como URL firmada con vencimiento
+    (core.storage): MEDIA_ROOT no se publica y una <img> no envía el JWT.
+    """
+    def to_representation(self, value):
+        if not value:
+            return None
+        url = signed_url(value.name)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+
 class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Department
@@ -39,7 +53,7 @@ class ClientSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
     def get_active_services(self, obj):
-        return [service.name for service in obj.services.all()]
+        return [service.get_service_type_display() for service in obj.services.all() if service.is_active]
 
 
 class SedeSerializer(serializers.ModelSerializer):
@@ -65,3 +79,15 @@ class AuditoriaSerializer(serializers.ModelSerializer):
         model = Auditoria
         fields = '__all__'
         read_only_fields = ('tabla', 'registro_id', 'usuario', 'accion', 'detalle', 'fecha')
+
+
+class JobSerializer(serializers.ModelSerializer):
+    status_display = serializers.ReadOnlyField(source='get_status_display')
+    
+    class Meta:
+        model = Job
+        fields = (
+            'id', 'kind', 'params', 'status', 'status_display', 'progress', 'error',
+            'attempts', 'created_by', 'created_at', 'started_at', 'finished_at'
+        )
+        read_only_fields = fields
@@ -0,0 +1,181 @@
+"""
+Archivos en MEDIA_ROOT: ubicación, URLs firmadas y entrega.
+
+Los archivos generados y subidos se reparten en subdirectorios según un
+hash de su llave (comprobantes/3f/a2/..., payments/originals/9c/01/...),
+así ningún directorio acumula cientos de miles de entradas.
+
+Para descargarlos sin el token JWT (por ejemplo una <img>) se usan URLs
+firmadas con vencimiento: /api/media/<token>/. El vencimiento se redondea
+a la hora siguiente, de modo que la URL de un archivo no cambia entre
+respuestas dentro de esa hora y el navegador puede guardarla en caché.
+
+La entrega depende de MEDIA_SERVE_MODE:
+- 'accel': responde X-Accel-Redirect y nginx envía el archivo desde la
+  ubicación interna MEDIA_ACCEL_PREFIX.
+- 'sendfile': responde X-Sendfile (Apache mod_xsendfile, lighttpd).
+- 'django': el propio proceso envía el archivo, con soporte de Range.
+"""
+import hashlib
+import os
+import re
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.http import content_disposition_header
+
+
+SHARD_DEPTH = 2
+
+# Los vencimientos se redondean a este múltiplo (segundos)
+URL_EXPIRY_STEP = 60 * 60
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+_signer = signing.Signer(salt='core.storage.media')
+
+
+class ExpiredToken(Exception):
+    pass
+
+
+def shard(key, depth=SHARD_DEPTH):
+    """
+    Subdirectorio para `key`: 'ab/cd' a partir de su sha1.
+    """
+    digest = hashlib.sha1(str(key).encode()).hexdigest()
+    return '/'.join(digest[level * 2:level * 2 + 2] for level in range(depth))
+
+
+def sharded_name(directory, key, filename):
+    """
+    Nombre relativo a MEDIA_ROOT: <directory>/<shard(key)>/<filename>.
+    """
+    return f"{directory}/{shard(key)}/{filename}"
+
+
+def media_path(name, create=False):
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    if create:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def publish(tmp, path):
+    """
+    Mueve un archivo temporal (tempfile.mkstemp lo crea con modo 0600) a su
+    nombre definitivo, legible por nginx o Apache cuando la entrega se
+    delega con X-Accel-Redirect o X-Sendfile.
+    """
+    os.chmod(tmp, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+    os.replace(tmp, path)
+
+
+def signed_url(name, ttl=None, now=None):
+    """
+    URL de descarga de `name` válida por al menos `ttl` segundos
+    (MEDIA_URL_TTL por defecto).
+    """
+    ttl = ttl or settings.MEDIA_URL_TTL
+    now = int(now if now is not None else time.time())
+    expires = (now + ttl) // URL_EXPIRY_STEP * URL_EXPIRY_STEP + URL_EXPIRY_STEP
+    token = _signer.sign_object({'n': name, 'e': expires}, compress=True)
+    return reverse('signed-media', args=[token])
+
+
+def unsign(token, now=None):
+    """
+    Retorna (nombre, vencimiento) del token. Lanza signing.BadSignature si
+    fue alterado y ExpiredToken si ya venció.
+    """
+    data = _signer.unsign_object(token)
+    if data['e'] <= (now if now is not None else time.time()):
+        raise ExpiredToken()
+    return data['n'], data['e']
+
+
+def _read_range(f, length):
+    try:
+        while length > 0:
+            chunk = f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
+
+
+def _byte_range(header, size):
+    """
+    (inicio, fin) inclusivos del header Range, None si no aplica (se
+    responde el archivo completo) o False si el rango no es satisfacible.
+    Solo se atiende un rango; varios rangos se responden completos.
+    """
+    match = RANGE_RE.match(header or '')
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-N: los últimos N bytes
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def serve_file(request, name, content_type=None, filename=None, as_attachment=False, etag=None):
+    """
+    Respuesta que entrega el archivo `name` (relativo a MEDIA_ROOT) según
+    MEDIA_SERVE_MODE. Lanza Http404 si no existe.
+    """
+    path = media_path(name)
+    if not os.path.isfile(path):
+        raise Http404()
+    filename = filename or os.path.basename(name)
+    content_type = content_type or 'application/octet-stream'
+    mode = settings.MEDIA_SERVE_MODE
+
+    if mode == 'accel':
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = quote(settings.MEDIA_ACCEL_PREFIX + name)
+    elif mode == 'sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        size = os.path.getsize(path)
+        if_range = request.headers.get('If-Range')
+        byte_range = None
+        if not if_range or (etag and if_range == etag):
+            byte_range = _byte_range(request.headers.get('Range'), size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            f = open(path, 'rb')
+            f.seek(start)
+            response = StreamingHttpResponse(_read_range(f, end - start + 1), status=206, content_type=content_type)
+            response['Content-Length'] = str(end - start + 1)
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    if etag:
+        response['ETag'] = etag
+    return response
@@ -0,0 +1,238 @@
+"""
+Generador determinista de datos sintéticos para benchmarks.
+
+Con la misma semilla y la misma fecha de referencia produce exactamente los
+mismos registros: sedes, ubicaciones, cobradores, clientes con servicios,
+deudas de varios meses con sus pagos y asignaciones, visitas y auditoría.
+Inserta con bulk_create (sin señales) y al final reconstruye las tablas
+derivadas (saldos, recaudación diaria y estadísticas de cobradores).
+"""
+import datetime
+import random
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import Auditoria, Caserio, Client, Department, District, Province, Sede, Visit
+from payments.fees import month_dates
+from payments.models import MonthlyFee, Payment, PaymentAllocation, Service
+from users.models import User
+
+
+DEFAULTS = {
+    'seed': 42,
+    'sedes': 3,
+    'caserios': 30,
+    'clients': 2000,
+    'cobradores_per_sede': 4,
+    'months': 12,
+    'visits_per_client': 6,
+    'audit_rows': 5000,
+}
+
+BATCH_SIZE = 1000
+
+PRICES = {'internet': [Decimal('50'), Decimal('60'), Decimal('80')], 'cable': [Decimal('30'), Decimal('35')]}
+METHODS = ['cash', 'cash', 'yape', 'plin', 'transfer']
+VISIT_STATES = ['pago', 'pago', 'no_estaba', 'no_responde', 'se_mudo']
+
+
+@contextmanager
+def _manual_dates(*fields):
+    """
+    Desactiva auto_now_add en los campos indicados para poder insertar
+    fechas históricas con bulk_create.
+    """
+    previous = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, previous):
+            field.auto_now_add = value
+
+
+def _field(model, name):
+    return model._meta.get_field(name)
+
+
+def _at(day, rng):
+    """
+    Momento aleatorio en horario de cobranza (8:00 a 18:00) del día dado.
+    """
+    moment = datetime.datetime.combine(day, datetime.time(8)) + datetime.timedelta(minutes=rng.randrange(600))
+    return timezone.make_aware(moment)
+
+
+def _month_starts(today, months):
+    year, month = today.year, today.month
+    starts = []
+    for _ in range(months):
+        starts.append(datetime.date(year, month, 1))
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return list(reversed(starts))
+
+
+def generate(today=None, log=None, **options):
+    """
+    Carga el volumen de datos pedido (ver DEFAULTS) en la base de datos
+    actual. Retorna un diccionario con la cantidad de registros por tabla.
+    """
+    from payments.balances import rebuild_balances
+    from reports.rollups import rebuild_collector_stats, rebuild_revenue
+
+    config = {**DEFAULTS, **{key: value for key, value in options.items() if value is not None}}
+    rng = random.Random(config['seed'])
+    today = today or timezone.localdate()
+    log = log or (lambda msg: None)
+    counts = {}
+
+    with transaction.atomic():
+        # Ubicaciones y sedes
+        department = Department.objects.create(name='Bench', code='BENCH')
+        province = Province.objects.create(name='Bench', code='BENCH01', department=department)
+        districts = District.objects.bulk_create([
+            District(name=f'Distrito {i}', code=f'BD{i:02d}', province=province)
+            for i in range(max(1, config['caserios'] // 10))
+        ])
+        caserios = Caserio.objects.bulk_create([
+            Caserio(name=f'Caserío {i}', code=f'BC{i:03d}', district=districts[i % len(districts)])
+            for i in range(config['caserios'])
+        ])
+        sedes = Sede.objects.bulk_create([
+            Sede(nombre=f'Sede Bench {i}', direccion=f'Av. Bench {i}') for i in range(config['sedes'])
+        ])
+
+        # Usuarios (todos con la contraseña "bench")
+        users = [User(username='bench_admin', role='admin'), User(username='bench_oficina', role='oficina', sede=sedes[0])]
+        for sede_index, sede in enumerate(sedes):
+            users.extend(
+                User(username=f'bench_cobrador_{sede_index}_{i}', role='cobrador', sede=sede)
+                for i in range(config['cobradores_per_sede'])
+            )
+        password = make_password('bench')
+        for user in users:
+            user.password = password
+        users = User.objects.bulk_create(users)
+        cobradores = {sede.id: [user for user in users if user.role == 'cobrador' and user.sede_id == sede.id] for sede in sedes}
+        counts['users'] = len(users)
+        log(f"Ubicaciones, {len(sedes)} sedes y {len(users)} usuarios")
+
+        # Clientes y servicios
+        clients = []
+        for i in range(config['clients']):
+            sede = sedes[i % len(sedes)]
+            clients.append(Client(
+                code=f'BENCH-{i:06d}',
+                dni=f'9{i:07d}',
+                name=f'Cliente {i:06d}',
+                phone=f'9{rng.randrange(10 ** 8):08d}',
+                address=f'Calle {rng.randrange(1, 200)} #{rng.randrange(1, 999)}',
+                caserio=caserios[rng.randrange(len(caserios))],
+                sede=sede,
+                cobrador_asignado=rng.choice(cobradores[sede.id]),
+            ))
+        clients = Client.objects.bulk_create(clients, batch_size=BATCH_SIZE)
+
+        services = []
+        for client in clients:
+            services.append(Service(client=client, service_type='internet', price=rng.choice(PRICES['internet'])))
+            if rng.random() < 0.35:
+                services.append(Service(client=client, service_type='cable', price=rng.choice(PRICES['cable'])))
+        services = Service.objects.bulk_create(services, batch_size=BATCH_SIZE)
+        counts['clients'], counts['services'] = len(clients), len(services)
+        log(f"{len(clients)} clientes y {len(services)} servicios")
+
+        # Deudas mensuales; los meses anteriores se pagan casi todos
+        months = _month_starts(today, config['months'])
+        fees = []
+        for month_index, month_start in enumerate(months):
+            month_date, due_date = month_dates(month_start.year, month_start.month)
+            age = len(months) - 1 - month_index
+            for service in services:
+                fee = MonthlyFee(
+                    client_id=service.client_id, service=service,
+                    month_date=month_date, due_date=due_date, amount=service.price,
+                )
+                roll = rng.random()
+                if roll < (0.9 if age else 0.4):
+                    fee.status, fee.paid_amount = 'paid', fee.amount
+                elif roll < (0.95 if age else 0.5):
+                    fee.status, fee.paid_amount = 'partial', (fee.amount / 2).quantize(Decimal('0.01'))
+                else:
+                    fee.status = 'expired' if due_date < today else 'pending'
+                fees.append(fee)
+        fees = MonthlyFee.objects.bulk_create(fees, batch_size=BATCH_SIZE)
+        counts['fees'] = len(fees)
+        log(f"{len(fees)} deudas en {len(months)} meses")
+
+        # Un pago por deuda cubierta (total o parcial)
+        clients_by_id = {client.id: client for client in clients}
+        paid_fees = [fee for fee in fees if fee.paid_amount]
+        payments = []
+        for fee in paid_fees:
+            client = clients_by_id[fee.client_id]
+            day = min(fee.month_date + datetime.timedelta(days=rng.randrange(28)), today)
+            status = 'validated' if rng.random() < 0.97 else rng.choice(['pending', 'rejected'])
+            payments.append(Payment(
+                client=client, service_id=fee.service_id, amount=fee.paid_amount,
+                date=_at(day, rng), method=rng.choice(METHODS),
+                registered_by=client.cobrador_asignado,
+                validation_status=status,
+                comprobante_url=f'/media/comprobantes/bench_{len(payments)}.pdf', receipt_status='ready',
+            ))
+        with _manual_dates(_field(Payment, 'date')):
+            payments = Payment.objects.bulk_create(payments, batch_size=BATCH_SIZE)
+
+        allocations = []
+        for fee, payment in zip(paid_fees, payments):
+            fee.payment = payment
+            if payment.validation_status == 'validated':
+                allocations.append(PaymentAllocation(payment=payment, fee=fee, amount=fee.paid_amount))
+            else:
+                fee.status, fee.paid_amount = ('expired' if fee.due_date < today else 'pending'), Decimal('0')
+        MonthlyFee.objects.bulk_update(paid_fees, ['payment', 'status', 'paid_amount'], batch_size=BATCH_SIZE)
+        PaymentAllocation.objects.bulk_create(allocations, batch_size=BATCH_SIZE)
+        counts['payments'], counts['allocations'] = len(payments), len(allocations)
+        log(f"{len(payments)} pagos y {len(allocations)} asignaciones")
+
+        # Visitas repartidas en el periodo
+        first_day = months[0]
+        span = (today - first_day).days + 1
+        visits = []
+        for client in clients:
+            for _ in range(config['visits_per_client']):
+                visits.append(Visit(
+                    cliente=client, cobrador=client.cobrador_asignado,
+                    fecha=_at(first_day + datetime.timedelta(days=rng.randrange(span)), rng),
+                    estado=rng.choice(VISIT_STATES),
+                ))
+        with _manual_dates(_field(Visit, 'fecha')):
+            Visit.objects.bulk_create(visits, batch_size=BATCH_SIZE)
+        counts['visits'] = len(visits)
+
+        # Auditoría
+        audit = []
+        for i in range(config['audit_rows']):
+            payment = payments[rng.randrange(len(payments))] if payments else None
+            audit.append(Auditoria(
+                tabla='Payment', registro_id=payment.id if payment else 0,
+                usuario=rng.choice(users), accion=rng.choice(['CREATE', 'VALIDATE', 'UPDATE']),
+                detalle={'bench': i}, fecha=_at(first_day + datetime.timedelta(days=rng.randrange(span)), rng),
+            ))
+        with _manual_dates(_field(Auditoria, 'fecha')):
+            Auditoria.objects.bulk_create(audit, batch_size=BATCH_SIZE)
+        counts['audit_rows'] = len(audit)
+        log(f"{len(visits)} visitas y {len(audit)} registros de auditoría")
+
+    # Tablas derivadas
+    counts['balances'] = rebuild_balances()
+    counts['revenue_rollups'] = rebuild_revenue()
+    counts['collector_stats'] = rebuild_collector_stats(first_day, today)
+    log("Saldos y resúmenes reconstruidos")
+
+    return counts
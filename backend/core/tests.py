@@ -1,3 +1,334 @@
-from django.test import TestCase
+import datetime
+import io
+import shutil
+import tempfile
+import time
 
-# Create your tests here.
+from django.core import signing
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import cache as data_version
+from . import benchmark, jobs, storage, synthetic
+from payments.models import Service
+from users.models import User
+from .models import Client, DataVersion, Job, Sede
+
+
+class DataVersionTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.other_sede = Sede.objects.create(nombre='Sur', direccion='Av. 2')
+
+    def test_bump_waits_for_commit(self):
+        before = data_version.current_version(self.sede.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                data_version.bump(self.sede.id)
+                # Una lectura concurrente todavía ve la versión anterior
+                self.assertEqual(data_version.current_version(self.sede.id), before)
+        self.assertNotEqual(data_version.current_version(self.sede.id), before)
+
+    def test_bump_discarded_on_rollback(self):
+        before = data_version.current_version(self.sede.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    data_version.bump(self.sede.id)
+                    raise ValueError()
+            except ValueError:
+                pass
+        self.assertEqual(data_version.current_version(self.sede.id), before)
+
+    def test_client_moving_sede_bumps_both_sedes(self):
+        client = Client.objects.create(dni='12345678', name='Cliente', address='Calle 1', sede=self.sede)
+        before = (data_version.current_version(self.sede.id), data_version.current_version(self.other_sede.id))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            client.sede = self.other_sede
+            client.save()
+
+        self.assertNotEqual(data_version.current_version(self.sede.id), before[0])
+        self.assertNotEqual(data_version.current_version(self.other_sede.id), before[1])
+
+
+    def bump_now(self, *sede_ids):
+        with self.captureOnCommitCallbacks(execute=True):
+            data_version.bump(*sede_ids)
+        return data_version.current_version(self.sede.id)
+
+    def test_versions_survive_cache_cull(self):
+        seen = {data_version.current_version(self.sede.id)}
+        for _ in range(5):
+            seen.add(self.bump_now(self.sede.id))
+
+        # Más entradas que MAX_ENTRIES (300): la caché descarta las primeras llaves
+        cache.set_many({f'reports:test:{number}': number for number in range(400)})
+        version = self.bump_now(self.sede.id)
+        self.assertNotIn(version, seen)
+
+    def test_lost_counter_never_reuses_a_version(self):
+        seen = {self.bump_now(self.sede.id) for _ in range(3)}
+        DataVersion.objects.all().delete()
+
+        self.assertNotIn(self.bump_now(self.sede.id), seen)
+        self.assertGreater(DataVersion.objects.get(scope=data_version.GLOBAL_KEY).version, 3)
+
+
+class DashboardCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.other_sede = Sede.objects.create(nombre='Sur', direccion='Av. 2')
+        self.api = APIClient()
+        self.api.force_authenticate(
+            User.objects.create_user('oficina', password='x', role='oficina', sede=self.sede)
+        )
+
+    def create_client(self, dni, sede):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Client.objects.create(dni=dni, name='Cliente', address='Calle 1', sede=sede)
+
+    def total_clients(self):
+        return self.api.get('/api/dashboard/').data['total_clients']
+
+    def test_write_in_sede_invalidates_summary(self):
+        self.create_client('11111111', self.sede)
+        self.assertEqual(self.total_clients(), 1)
+
+        # Sin señales no cambia la versión: se sirve lo guardado
+        Client.objects.bulk_create([
+            Client(dni='22222222', code='MASIVO', name='Masivo', address='Calle 2', sede=self.sede)
+        ])
+        self.assertEqual(self.total_clients(), 1)
+
+        self.create_client('33333333', self.sede)
+        self.assertEqual(self.total_clients(), 3)
+
+    def test_write_in_other_sede_keeps_summary(self):
+        self.assertEqual(self.total_clients(), 0)
+        version = data_version.current_version(self.sede.id)
+        self.create_client('11111111', self.other_sede)
+        self.assertEqual(data_version.current_version(self.sede.id), version)
+        self.assertEqual(self.total_clients(), 0)
+
+
+class ClientApiTests(TestCase):
+
+    def test_lists_active_service_types(self):
+        sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        client = Client.objects.create(dni='12345678', name='Cliente', address='Calle 1', sede=sede)
+        Service.objects.create(client=client, service_type='internet', price=50)
+        Service.objects.create(client=client, service_type='cable', price=30, is_active=False)
+
+        api = APIClient()
+        api.force_authenticate(User.objects.create_user('admin', password='x', role='admin'))
+        response = api.get(f'/api/clients/{client.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['active_services'], ['Internet'])
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def handler(job, report):
+            self.calls.append(job.id)
+            report(step=1)
+            if job.params.get('fail'):
+                raise RuntimeError('falla')
+            return {'ok': True}
+
+        jobs.register('test_job')(handler)
+        self.addCleanup(jobs._handlers.pop, 'test_job', None)
+
+    def test_active_lock_key_rejects_second_job(self):
+        first = jobs.enqueue('test_job', lock_key='test:1')
+        with self.assertRaises(jobs.JobLocked) as raised:
+            jobs.enqueue('test_job', lock_key='test:1')
+        self.assertEqual(raised.exception.job, first)
+
+        # Sin llave no hay bloqueo
+        jobs.enqueue('test_job')
+        jobs.enqueue('test_job')
+
+    def test_lock_released_when_job_finishes(self):
+        first = jobs.enqueue('test_job', lock_key='test:1')
+        jobs.run_job(jobs.claim_next(['test_job']))
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'done')
+
+        second = jobs.enqueue('test_job', lock_key='test:1')
+        self.assertNotEqual(second.id, first.id)
+
+    def test_claim_takes_each_job_once(self):
+        job = jobs.enqueue('test_job')
+        claimed = jobs.claim_next(['test_job'])
+        self.assertEqual(claimed.id, job.id)
+        self.assertEqual(claimed.status, 'running')
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(jobs.claim_next(['test_job']))
+
+    def test_claim_skips_other_kinds_and_future_jobs(self):
+        jobs.enqueue('other_job')
+        jobs.enqueue('test_job', run_after=timezone.now() + datetime.timedelta(hours=1))
+        self.assertIsNone(jobs.claim_next(['test_job']))
+
+    def test_run_job_saves_progress(self):
+        jobs.enqueue('test_job')
+        job = jobs.run_job(jobs.claim_next(['test_job']))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'done')
+        self.assertEqual(job.progress, {'step': 1, 'ok': True})
+
+    def test_failed_job_retried_until_max_attempts(self):
+        job = jobs.enqueue('test_job', {'fail': True}, max_attempts=2)
+
+        jobs.run_job(jobs.claim_next(['test_job']))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertGreater(job.run_after, timezone.now())
+
+        # Vence la espera del reintento
+        Job.objects.filter(id=job.id).update(run_after=timezone.now())
+        jobs.run_job(jobs.claim_next(['test_job']))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+        self.assertEqual(job.attempts, 2)
+        self.assertIn('RuntimeError', job.error)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_stale_running_job_releases_lock(self):
+        job = jobs.enqueue('test_job', lock_key='test:1')
+        jobs.claim_next(['test_job'])
+        Job.objects.filter(id=job.id).update(updated_at=timezone.now() - jobs.STALE_AFTER * 2)
+
+        self.assertEqual(jobs.reap_stale(), 1)
+        jobs.enqueue('test_job', lock_key='test:1')
+
+
+class SignedUrlTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_SERVE_MODE='django')
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+        self.name = storage.sharded_name('exports', 1, 'reporte.csv')
+        with open(storage.media_path(self.name, create=True), 'wb') as f:
+            f.write(b'0123456789')
+
+    def token(self, url):
+        return url.rstrip('/').rsplit('/', 1)[1]
+
+    def test_round_trip_and_expiry(self):
+        now = 1_000_000
+        token = self.token(storage.signed_url(self.name, ttl=600, now=now))
+
+        name, expires = storage.unsign(token, now=now)
+        self.assertEqual(name, self.name)
+        self.assertGreaterEqual(expires, now + 600)
+        self.assertEqual(expires % storage.URL_EXPIRY_STEP, 0)
+
+        with self.assertRaises(storage.ExpiredToken):
+            storage.unsign(token, now=expires)
+
+    def test_url_stable_within_expiry_step(self):
+        now = 10 * storage.URL_EXPIRY_STEP
+        self.assertEqual(
+            storage.signed_url(self.name, ttl=600, now=now),
+            storage.signed_url(self.name, ttl=600, now=now + 60),
+        )
+
+    def test_tampered_token_rejected(self):
+        token = self.token(storage.signed_url(self.name))
+        with self.assertRaises(signing.BadSignature):
+            storage.unsign(token[:-1] + ('A' if token[-1] != 'A' else 'B'))
+
+        response = self.client.get(f'/api/media/{token}x/')
+        self.assertEqual(response.status_code, 403)
+
+    def test_expired_url_gone(self):
+        url = storage.signed_url(self.name, ttl=1, now=time.time() - 2 * storage.URL_EXPIRY_STEP)
+        self.assertEqual(self.client.get(url).status_code, 410)
+
+    def test_serves_file_and_ranges(self):
+        url = storage.signed_url(self.name)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertIn('private, max-age=', response['Cache-Control'])
+
+        response = self.client.get(url, HTTP_RANGE='bytes=2-4')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-4/10')
+        self.assertEqual(b''.join(response.streaming_content), b'234')
+
+        response = self.client.get(url, HTTP_RANGE='bytes=20-')
+        self.assertEqual(response.status_code, 416)
+
+        missing = storage.signed_url('exports/no/existe.csv')
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_byte_range(self):
+        cases = [
+            ('', None),
+            ('bytes=-', None),
+            ('bytes=0-1,4-5', None),
+            ('bytes=0-', (0, 9)),
+            ('bytes=3-100', (3, 9)),
+            ('bytes=-4', (6, 9)),
+            ('bytes=-40', (0, 9)),
+            ('bytes=5-2', False),
+            ('bytes=10-', False),
+        ]
+        for header, expected in cases:
+            self.assertEqual(storage._byte_range(header, 10), expected, header)
+
+    @override_settings(MEDIA_SERVE_MODE='accel', MEDIA_ACCEL_PREFIX='/protected/')
+    def test_accel_mode_delegates_to_nginx(self):
+        response = self.client.get(storage.signed_url(self.name))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected/{self.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_shard_is_stable(self):
+        self.assertEqual(storage.shard(42), storage.shard('42'))
+        self.assertRegex(storage.shard(42), r'^[0-9a-f]{2}/[0-9a-f]{2}$')
+
+
+class BenchmarkTests(TestCase):
+    """
+    El comando crea su propia base de prueba; aquí se corre lo mismo que
+    hace sobre la base de prueba actual.
+    """
+
+    def test_scenarios_run_on_tiny_dataset(self):
+        counts = synthetic.generate(
+            sedes=1, caserios=2, clients=10, cobradores_per_sede=1, months=2, visits_per_client=1, audit_rows=5
+        )
+        self.assertEqual(counts['clients'], 10)
+
+        results = benchmark.run(repeat=1)
+        self.assertEqual(set(results), set(benchmark.scenarios()))
+        errors = {name: result['error'] for name, result in results.items() if 'error' in result}
+        self.assertEqual(errors, {})
+
+        # Una corrida contra sí misma no tiene regresiones
+        self.assertFalse(any(row[5] for row in benchmark.compare(results, results)))
+
+    def test_list_scenarios(self):
+        stdout = io.StringIO()
+        call_command('benchmark', '--list', stdout=stdout)
+        self.assertEqual(stdout.getvalue().split(), list(benchmark.scenarios()))
@@ -1,15 +1,24 @@
+import mimetypes
+import time
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
-from .models import Department, Province, District, Caserio, Client, Zone, Sede, Visit, Auditoria
-from payments.models import Payment, MonthlyFee
+from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.views import APIView
+from .models import Department, Province, District, Caserio, Client, Zone, Sede, Visit, Auditoria, Job
+from payments.models import Payment, Service
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
 from django.db import models
 from django.utils import timezone
+from . import cache as data_version
+from . import storage
 from .serializers import (
     DepartmentSerializer, ProvinceSerializer, DistrictSerializer, 
     CaserioSerializer, ClientSerializer, ZoneSerializer,
-    SedeSerializer, VisitSerializer, AuditoriaSerializer
+    SedeSerializer, VisitSerializer, AuditoriaSerializer, JobSerializer
 )
 
 class DepartmentViewSet(viewsets.ModelViewSet):
@@ -157,7 +166,36 @@ class AuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
             queryset = queryset.filter(usuario_id=usuario_id)
             
         return queryset
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Estado y avance de las tareas en segundo plano.
+    Admin/Oficina ven todas; el resto solo las que crearon.
+    """
+    queryset = Job.objects.all()
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    
+    def get_queryset(self):
+        user = self.request.user
+        queryset = Job.objects.all()
+        
+        if user.role not in ['admin', 'oficina']:
+            queryset = queryset.filter(created_by=user)
+        
+        kind = self.request.query_params.get('kind', None)
+        if kind:
+            queryset = queryset.filter(kind=kind)
+            
+        return queryset
+
+
 class DashboardViewSet(viewsets.ViewSet):
+    """
+    Resumen del dashboard. Una agregación condicional por tabla, cacheada
+    por alcance (rol/sede/cobrador) e invalidada por versión de datos.
+    """
     permission_classes = [IsAuthenticated]
 
     def list(self, request):
@@ -166,50 +204,85 @@ class DashboardViewSet(viewsets.ViewSet):
         # Filtros base
         clients = Client.objects.all()
         payments = Payment.objects.all()
-        monthly_fees = MonthlyFee.objects.all()
+        scope_sede = None
         
         # Filtrar por Sede (si no es Admin)
         if user.role != 'admin' and user.sede:
             clients = clients.filter(sede=user.sede)
             payments = payments.filter(client__sede=user.sede)
-            monthly_fees = monthly_fees.filter(client__sede=user.sede)
+            scope_sede = user.sede_id
             
         # Filtrar por Cobrador
         if user.role == 'cobrador':
             clients = clients.filter(cobrador_asignado=user)
             payments = payments.filter(client__cobrador_asignado=user)
-            monthly_fees = monthly_fees.filter(client__cobrador_asignado=user)
             
         # Filtro explícito por Sede (para Admin)
         sede_id = request.query_params.get('sede', None)
         if sede_id:
             clients = clients.filter(sede_id=sede_id)
             payments = payments.filter(client__sede_id=sede_id)
-            monthly_fees = monthly_fees.filter(client__sede_id=sede_id)
+            scope_sede = sede_id
 
-        # Métricas
-        total_clients = clients.count()
-        active_clients = clients.filter(status='active').count()
-        
-        # Deuda Total (Pendiente + Vencida)
-        total_debt = monthly_fees.filter(status__in=['pending', 'expired']).aggregate(
-            total=models.Sum('amount')
-        )['total'] or 0
+        cache_key = data_version.versioned_key(
+            'dashboard', scope_sede,
+            user.role, user.id if user.role == 'cobrador' else '', user.sede_id or '', sede_id or ''
+        )
+        data = cache.get(cache_key)
+        if data is None:
+            data = self._compute(clients, payments)
+            cache.set(cache_key, data, settings.DASHBOARD_CACHE_TTL)
+
+        return Response(data)
+
+    def _compute(self, clients, payments):
+        current_month = timezone.localtime().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        active_service = Service.objects.filter(client=models.OuterRef('pk'), is_active=True)
         
-        # Recaudación del Mes Actual
-        current_month = timezone.now().replace(day=1)
-        monthly_revenue = payments.filter(
-            date__gte=current_month,
-            validation_status='validated'
-        ).aggregate(total=models.Sum('amount'))['total'] or 0
+        # Clientes: total, con servicio activo y deuda total (saldo abierto) en una pasada
+        client_stats = clients.aggregate(
+            total_clients=models.Count('id'),
+            active_clients=models.Count('id', filter=models.Exists(active_service)),
+            total_debt=models.Sum('balance__open_amount'),
+        )
         
-        # Pagos Pendientes de Validación
-        pending_payments = payments.filter(validation_status='pending').count()
-
-        return Response({
-            'total_clients': total_clients,
-            'active_clients': active_clients,
-            'total_debt': total_debt,
-            'monthly_revenue': monthly_revenue,
-            'pending_payments': pending_payments
-        })
+        # Pagos: recaudación del mes y pendientes de validación en una pasada
+        payment_stats = payments.aggregate(
+            monthly_revenue=models.Sum(
+                'amount',
+                filter=models.Q(date__gte=current_month, validation_status='validated')
+            ),
+            pending_payments=models.Count('id', filter=models.Q(validation_status='pending')),
+        )
+
+        return {
+            'total_clients': client_stats['total_clients'],
+            'active_clients': client_stats['active_clients'],
+            'total_debt': client_stats['total_debt'] or 0,
+            'monthly_revenue': payment_stats['monthly_revenue'] or 0,
+            'pending_payments': payment_stats['pending_payments'],
+        }
+
+
+class SignedMediaView(APIView):
+    """
+    Descarga de un archivo de MEDIA_ROOT con una URL firmada
+    (core.storage.signed_url). El token es la autorización: no se pide JWT,
+    así funciona en <img> y enlaces directos.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, token):
+        try:
+            name, expires = storage.unsign(token)
+        except signing.BadSignature:
+            return Response({'error': 'Enlace inválido'}, status=status.HTTP_403_FORBIDDEN)
+        except storage.ExpiredToken:
+            return Response({'error': 'El enlace venció'}, status=status.HTTP_410_GONE)
+
+        content_type = mimetypes.guess_type(name)[0]
+        response = storage.serve_file(request, name, content_type=content_type)
+        # Los archivos firmados no cambian: se pueden guardar hasta que venza el enlace
+        response['Cache-Control'] = f'private, max-age={max(int(expires - time.time()), 0)}'
+        return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Service, MonthlyFee, Payment, ConfigPreciosZona
+from .models import Service, MonthlyFee, Payment, ConfigPreciosZona, PaymentAllocation, ClientBalance
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
@@ -25,3 +25,15 @@ class PaymentAdmin(admin.ModelAdmin):
     list_filter = ('method', 'validation_status', 'date')
     search_fields = ('client__name', 'client__code', 'reference_number')
     readonly_fields = ('date', 'comprobante_url')
+
+@admin.register(PaymentAllocation)
+class PaymentAllocationAdmin(admin.ModelAdmin):
+    list_display = ('payment', 'fee', 'amount', 'created_at')
+    search_fields = ('payment__client__name', 'payment__client__code')
+    readonly_fields = ('payment', 'fee', 'amount', 'created_at')
+
+@admin.register(ClientBalance)
+class ClientBalanceAdmin(admin.ModelAdmin):
+    list_display = ('client', 'open_amount', 'months_owed', 'oldest_unpaid_month', 'last_payment_date')
+    search_fields = ('client__name', 'client__code')
+    readonly_fields = ('client', 'open_amount', 'months_owed', 'oldest_unpaid_month', 'last_payment_date', 'updated_at')
@@ -0,0 +1,200 @@
+"""
+Aplicación de pagos validados a las deudas mensuales del cliente.
+
+Los pagos se aplican a las deudas abiertas de la más antigua a la más nueva,
+y cada parte aplicada queda registrada en PaymentAllocation para poder
+revertirla al anular el pago.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+from core import cache as data_version
+
+from .balances import rebuild_balances, refresh_balances
+from .models import MonthlyFee, Payment, PaymentAllocation
+
+
+OPEN_STATUSES = ['pending', 'partial', 'expired']
+
+BATCH_SIZE = 1000
+
+
+def fee_status(fee, today):
+    """
+    Estado que corresponde a una deuda según lo pagado y su vencimiento.
+    """
+    if fee.paid_amount >= fee.amount:
+        return 'paid'
+    if fee.paid_amount > 0:
+        return 'partial'
+    if fee.due_date and fee.due_date < today:
+        return 'expired'
+    return 'pending'
+
+
+def apply_amount(payment_id, amount, fees, today):
+    """
+    Reparte `amount` entre `fees` (ya ordenadas de la más antigua a la más
+    nueva), modificándolas en memoria.
+
+    Retorna (allocations, fees tocadas, saldo no aplicado).
+    """
+    remaining = amount
+    allocations = []
+    touched = []
+
+    for fee in fees:
+        if remaining <= 0:
+            break
+        open_amount = fee.amount - fee.paid_amount
+        if open_amount <= 0:
+            continue
+
+        applied = min(open_amount, remaining)
+        fee.paid_amount += applied
+        fee.status = fee_status(fee, today)
+        fee.payment_id = payment_id
+        remaining -= applied
+
+        touched.append(fee)
+        allocations.append(PaymentAllocation(payment_id=payment_id, fee_id=fee.id, amount=applied))
+
+    return allocations, touched, remaining
+
+
+def _open_fees(payment):
+    queryset = MonthlyFee.objects.filter(client_id=payment.client_id, status__in=OPEN_STATUSES)
+    if payment.service_id:
+        queryset = queryset.filter(service_id=payment.service_id)
+    return queryset
+
+
+def allocate_payment(payment):
+    """
+    Aplica un pago validado a las deudas abiertas del cliente.
+
+    Bloquea las deudas con select_for_update y las actualiza con un solo
+    bulk_update. Es idempotente: un pago ya aplicado no se vuelve a aplicar.
+    Retorna el saldo que no encontró deuda donde aplicarse.
+    """
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        # Bloquear el pago serializa validaciones concurrentes del mismo pago
+        Payment.objects.select_for_update().filter(id=payment.id).first()
+        if PaymentAllocation.objects.filter(payment_id=payment.id).exists():
+            return Decimal('0')
+
+        fees = list(_open_fees(payment).select_for_update().order_by('month_date', 'id'))
+        allocations, touched, remaining = apply_amount(payment.id, payment.amount, fees, today)
+
+        MonthlyFee.objects.bulk_update(touched, ['paid_amount', 'status', 'payment'])
+        PaymentAllocation.objects.bulk_create(allocations)
+        refresh_balances([payment.client_id])
+
+    return remaining
+
+
+def deallocate_payment(payment):
+    """
+    Revierte la aplicación de un pago (por ejemplo al anularlo).
+    Retorna la cantidad de deudas reabiertas.
+    """
+    today = timezone.localdate()
+
+    with transaction.atomic():
+        allocations = list(PaymentAllocation.objects.filter(payment_id=payment.id))
+        if not allocations:
+            refresh_balances([payment.client_id])
+            return 0
+
+        applied = {allocation.fee_id: allocation.amount for allocation in allocations}
+        fees = list(MonthlyFee.objects.select_for_update().filter(id__in=applied).order_by('id'))
+
+        # Si otro pago también cubre la deuda, queda como pago de referencia
+        other_payments = dict(
+            PaymentAllocation.objects.filter(fee_id__in=applied).exclude(payment_id=payment.id)
+            .order_by('fee_id', 'created_at').values_list('fee_id', 'payment_id')
+        )
+
+        for fee in fees:
+            fee.paid_amount = max(fee.paid_amount - applied[fee.id], Decimal('0'))
+            fee.status = fee_status(fee, today)
+            if fee.payment_id == payment.id:
+                fee.payment_id = other_payments.get(fee.id)
+
+        MonthlyFee.objects.bulk_update(fees, ['paid_amount', 'status', 'payment'])
+        PaymentAllocation.objects.filter(payment_id=payment.id).delete()
+        refresh_balances([payment.client_id])
+
+    return len(fees)
+
+
+def reconcile_fees(sede_id=None, today=None):
+    """
+    Recalcula desde cero lo pagado en las deudas de una sede (o de todas)
+    reproduciendo todos los pagos validados en orden cronológico.
+
+    Todo se hace en memoria por sede: un UPDATE para reiniciar las deudas,
+    una consulta de deudas, una de pagos, y escrituras por lotes.
+    """
+    today = today or timezone.localdate()
+
+    fees_qs = MonthlyFee.objects.all()
+    payments_qs = Payment.objects.filter(validation_status='validated', fecha_anulacion__isnull=True)
+    if sede_id:
+        fees_qs = fees_qs.filter(client__sede_id=sede_id)
+        payments_qs = payments_qs.filter(client__sede_id=sede_id)
+
+    with transaction.atomic():
+        PaymentAllocation.objects.filter(fee__in=fees_qs).delete()
+        fees_qs.update(
+            paid_amount=0,
+            payment=None,
+            status=Case(
+                When(due_date__lt=today, then=Value('expired')),
+                default=Value('pending'),
+            ),
+        )
+
+        fees_by_client = {}
+        for fee in fees_qs.order_by('client_id', 'month_date', 'id').only(
+            'id', 'client_id', 'service_id', 'amount', 'paid_amount', 'due_date', 'status', 'payment'
+        ).iterator(chunk_size=BATCH_SIZE):
+            fees_by_client.setdefault(fee.client_id, []).append(fee)
+
+        touched = {}
+        allocations = []
+        unapplied = Decimal('0')
+
+        for payment_id, client_id, service_id, amount in payments_qs.order_by('date', 'id').values_list(
+            'id', 'client_id', 'service_id', 'amount'
+        ).iterator(chunk_size=BATCH_SIZE):
+            fees = fees_by_client.get(client_id, [])
+            if service_id:
+                fees = [fee for fee in fees if fee.service_id == service_id]
+
+            new_allocations, fees_touched, remaining = apply_amount(payment_id, amount, fees, today)
+            allocations.extend(new_allocations)
+            touched.update((fee.id, fee) for fee in fees_touched)
+            unapplied += remaining
+
+        MonthlyFee.objects.bulk_update(
+            list(touched.values()), ['paid_amount', 'status', 'payment'], batch_size=BATCH_SIZE
+        )
+        PaymentAllocation.objects.bulk_create(allocations, batch_size=BATCH_SIZE)
+        rebuild_balances(sede_id)
+
+    if sede_id:
+        data_version.bump(sede_id)
+    else:
+        data_version.bump_all()
+
+    return {
+        'fees_updated': len(touched),
+        'allocations': len(allocations),
+        'unapplied': unapplied,
+    }
@@ -0,0 +1,102 @@
+"""
+Mantenimiento del saldo desnormalizado por cliente (ClientBalance).
+
+El saldo se recalcula por cliente con una consulta agregada indexada por
+client_id cada vez que sus deudas se crean, se pagan o se eliminan, o
+cuando se anula un pago. Pasar una deuda a 'expired' no cambia el saldo.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, F, Max, Min, Sum
+from django.utils import timezone
+
+from core import cache as data_version
+
+from .models import ClientBalance, MonthlyFee, Payment
+
+
+OPEN_STATUSES = ['pending', 'partial', 'expired']
+
+BATCH_SIZE = 500
+
+
+def _batches(ids, size):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def refresh_balances(client_ids):
+    """
+    Recalcula y guarda el saldo de los clientes indicados.
+    """
+    client_ids = {client_id for client_id in client_ids if client_id}
+
+    for batch in _batches(client_ids, BATCH_SIZE):
+        debts = {
+            row['client_id']: row
+            for row in MonthlyFee.objects.filter(
+                client_id__in=batch, status__in=OPEN_STATUSES
+            ).values('client_id').annotate(
+                open_amount=Sum(F('amount') - F('paid_amount')),
+                months_owed=Count('month_date', distinct=True),
+                oldest_unpaid_month=Min('month_date'),
+            ).order_by()
+        }
+        last_payments = dict(
+            Payment.objects.filter(
+                client_id__in=batch, validation_status='validated'
+            ).values('client_id').annotate(last=Max('date')).order_by().values_list('client_id', 'last')
+        )
+
+        now = timezone.now()
+        balances = []
+        for client_id in batch:
+            debt = debts.get(client_id, {})
+            balances.append(ClientBalance(
+                client_id=client_id,
+                open_amount=debt.get('open_amount') or Decimal('0'),
+                months_owed=debt.get('months_owed') or 0,
+                oldest_unpaid_month=debt.get('oldest_unpaid_month'),
+                last_payment_date=last_payments.get(client_id),
+                updated_at=now,
+            ))
+
+        ClientBalance.objects.bulk_create(
+            balances,
+            update_conflicts=True,
+            unique_fields=['client'],
+            update_fields=['open_amount', 'months_owed', 'oldest_unpaid_month', 'last_payment_date', 'updated_at'],
+        )
+
+
+def rebuild_balances(sede_id=None, chunk_size=BATCH_SIZE, on_chunk=None):
+    """
+    Recalcula el saldo de todos los clientes (o los de una sede) por lotes.
+    Retorna la cantidad de clientes procesados.
+    """
+    from core.models import Client
+
+    clients = Client.objects.all()
+    if sede_id:
+        clients = clients.filter(sede_id=sede_id)
+
+    processed = 0
+    batch = []
+    for client_id in clients.order_by('id').values_list('id', flat=True).iterator(chunk_size=chunk_size):
+        batch.append(client_id)
+        if len(batch) >= chunk_size:
+            refresh_balances(batch)
+            processed += len(batch)
+            batch = []
+            if on_chunk:
+                on_chunk(processed)
+    if batch:
+        refresh_balances(batch)
+        processed += len(batch)
+
+    if sede_id:
+        data_version.bump(sede_id)
+    else:
+        data_version.bump_all()
+    return processed
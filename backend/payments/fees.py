@@ -0,0 +1,296 @@
+"""
+Motor de generación masiva de deudas mensuales.
+
+Carga los servicios activos y sus clientes en pocas consultas, resuelve los
+precios de zona con el índice en memoria de pricing, arma las filas de
+MonthlyFee en memoria y las inserta por lotes con bulk_create.
+"""
+import datetime
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.db import connections, transaction
+from django.utils import timezone
+
+from core import cache as data_version
+
+from .balances import refresh_balances
+from .models import MonthlyFee, Service
+from .pricing import price_resolver
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def month_dates(year, month):
+    """
+    Retorna (primer día del mes, fecha de vencimiento) para un mes dado.
+    El vencimiento es el día 15 del mes.
+    """
+    month_date = datetime.date(year, month, 1)
+    due_date = month_date + datetime.timedelta(days=14)
+    return month_date, due_date
+
+
+class GenerationResult:
+    """
+    Resumen de una corrida de generación.
+    """
+
+    def __init__(self, processed=0, created=0, skipped=0, errors=0):
+        self.processed = processed
+        self.created = created
+        self.skipped = skipped
+        self.errors = errors
+
+    def merge(self, other):
+        self.processed += other.processed
+        self.created += other.created
+        self.skipped += other.skipped
+        self.errors += other.errors
+        return self
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'created': self.created,
+            'skipped': self.skipped,
+            'errors': self.errors,
+        }
+
+
+def active_services(sede_id=None, partition=None):
+    queryset = Service.objects.filter(is_active=True)
+    if sede_id:
+        queryset = queryset.filter(client__sede_id=sede_id)
+    if partition:
+        if 'sede' in partition:
+            # sede None = clientes sin sede asignada
+            queryset = queryset.filter(client__sede_id=partition['sede'])
+        if 'id_range' in partition:
+            first_id, last_id = partition['id_range']
+            queryset = queryset.filter(id__gte=first_id, id__lte=last_id)
+    return queryset
+
+
+def plan_partitions(by='sede', sede_id=None, parts=4):
+    """
+    Divide los servicios activos en particiones independientes.
+
+    - by='sede': una partición por sede de cliente (incluye clientes sin sede).
+    - by='range': `parts` rangos contiguos de id de servicio.
+    """
+    services = active_services(sede_id)
+
+    if by == 'sede':
+        sedes = services.order_by().values_list('client__sede_id', flat=True).distinct()
+        return [{'sede': sede} for sede in sedes]
+
+    ids = list(services.order_by('id').values_list('id', flat=True))
+    if not ids:
+        return []
+    size = -(-len(ids) // max(parts, 1))
+    return [
+        {'id_range': (ids[start], ids[min(start + size, len(ids)) - 1])}
+        for start in range(0, len(ids), size)
+    ]
+
+
+def _chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate_fees(month_date, due_date, services=None, sede_id=None,
+                  chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, on_chunk=None, log=None,
+                  refresh=True):
+    """
+    Genera las deudas del mes para los servicios activos.
+
+    Las deudas existentes se detectan con una consulta por lote y la inserción
+    usa ignore_conflicts contra el unique_together (client, service, month_date),
+    por lo que correr el proceso dos veces no duplica deudas.
+
+    Con refresh=False no se recalculan los saldos de los clientes (lo hace
+    quien llama, ver generate_fees_parallel).
+    """
+    if services is None:
+        services = active_services(sede_id)
+
+    result = GenerationResult()
+
+    rows = services.order_by('id').values_list(
+        'id', 'client_id', 'service_type', 'price', 'client__caserio_id'
+    ).iterator(chunk_size=chunk_size)
+
+    for chunk in _chunks(rows, chunk_size):
+        chunk_result = GenerationResult(processed=len(chunk))
+
+        existing = set(MonthlyFee.objects.filter(
+            month_date=month_date,
+            service_id__in=[row[0] for row in chunk]
+        ).values_list('service_id', flat=True))
+
+        fees = []
+        for service_id, client_id, service_type, base_price, caserio_id in chunk:
+            if service_id in existing:
+                chunk_result.skipped += 1
+                continue
+
+            # Si no hay precio de zona, usar el precio base del servicio
+            price = price_resolver.price_for(caserio_id, service_type, month_date)
+            if price is None:
+                price = base_price
+            fees.append(MonthlyFee(
+                client_id=client_id,
+                service_id=service_id,
+                month_date=month_date,
+                due_date=due_date,
+                amount=price,
+                status='pending'
+            ))
+
+        if fees and not dry_run:
+            try:
+                with transaction.atomic():
+                    MonthlyFee.objects.bulk_create(fees, ignore_conflicts=True)
+                    if refresh:
+                        refresh_balances({fee.client_id for fee in fees})
+            except Exception as e:
+                if log:
+                    log(f"Error insertando lote desde servicio {chunk[0][0]}: {e}")
+                chunk_result.errors += len(fees)
+                fees = []
+
+        chunk_result.created += len(fees)
+        result.merge(chunk_result)
+        if on_chunk:
+            on_chunk(result)
+
+    if result.created:
+        data_version.bump_all()
+    return result
+
+
+def _generate_partition(month_date, due_date, sede_id, partition, chunk_size, dry_run):
+    """
+    Ejecuta una partición dentro de un proceso del pool, con su propia
+    conexión y su propia transacción.
+    """
+    try:
+        with transaction.atomic():
+            result = generate_fees(
+                month_date,
+                due_date,
+                services=active_services(sede_id, partition),
+                chunk_size=chunk_size,
+                dry_run=dry_run,
+                # Los servicios de un cliente pueden caer en particiones distintas
+                refresh=False,
+            )
+        return partition, result.as_dict(), None
+    except Exception as e:
+        return partition, None, str(e)
+    finally:
+        connections.close_all()
+
+
+def generate_fees_parallel(month_date, due_date, partitions, workers, sede_id=None,
+                           chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, on_partition=None):
+    """
+    Procesa las particiones en un ProcessPoolExecutor y combina los
+    resultados parciales en un solo resumen.
+
+    Se usa fork para que los hijos hereden la configuración de Django; las
+    conexiones del padre se cierran antes para que ningún hijo comparta el
+    socket de la base de datos. En SQLite las particiones corren en serie.
+
+    Los saldos de los clientes se recalculan una sola vez al final, cuando
+    todas las particiones confirmaron: una partición no ve las deudas aún no
+    confirmadas de otra, y sus upserts de ClientBalance se bloquearían entre
+    sí sobre los mismos clientes.
+    """
+    result = GenerationResult()
+    args = (month_date, due_date, sede_id)
+
+    def collect(partition, partial, error):
+        if error:
+            # La transacción de la partición se revirtió completa
+            total = active_services(sede_id, partition).count()
+            partial = {'processed': total, 'errors': total}
+        partial_result = GenerationResult(**partial)
+        result.merge(partial_result)
+        if on_partition:
+            on_partition(partition, partial_result, error)
+
+    if connections['default'].vendor == 'sqlite':
+        # SQLite no admite escrituras concurrentes: se procesa en serie
+        for partition in partitions:
+            collect(*_generate_partition(*args, partition, chunk_size, dry_run))
+    else:
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            futures = [
+                executor.submit(_generate_partition, *args, partition, chunk_size, dry_run)
+                for partition in partitions
+            ]
+            for future in as_completed(futures):
+                collect(*future.result())
+
+    if result.created and not dry_run:
+        fees = MonthlyFee.objects.filter(month_date=month_date)
+        if sede_id:
+            fees = fees.filter(client__sede_id=sede_id)
+        refresh_balances(fees.order_by().values_list('client_id', flat=True).distinct())
+        data_version.bump_all()
+    return result
+
+
+def expire_overdue_fees(today=None, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False, user=None):
+    """
+    Pasa a 'expired' las deudas 'pending' cuya fecha de vencimiento ya pasó.
+
+    Cada lote es un único UPDATE. Las candidatas se buscan siempre completas
+    por el índice (status, due_date), que solo recorre las pendientes ya
+    vencidas: así también caen las deudas generadas tarde para un mes pasado
+    y las que volvieron a 'pending' al anularse un pago. Registra una sola
+    entrada de auditoría por corrida.
+    """
+    from core.models import Auditoria
+
+    today = today or timezone.localdate()
+    candidates = MonthlyFee.objects.filter(status='pending', due_date__lt=today)
+
+    if dry_run:
+        return candidates.count()
+
+    expired = 0
+    while True:
+        ids = list(candidates.order_by('due_date', 'id').values_list('id', flat=True)[:chunk_size])
+        if not ids:
+            break
+        expired += MonthlyFee.objects.filter(id__in=ids, status='pending').update(status='expired')
+
+    if expired:
+        data_version.bump_all()
+
+    Auditoria.objects.create(
+        tabla='MonthlyFee',
+        registro_id=0,
+        usuario=user,
+        accion='UPDATE',
+        detalle={
+            'proceso': 'expire_overdue_fees',
+            'vencidas': expired,
+            'vencimiento_antes_de': today.isoformat(),
+        }
+    )
+    return expired
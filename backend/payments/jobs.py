@@ -0,0 +1,81 @@
+"""
+Manejadores de tareas en segundo plano de la app payments.
+"""
+from core.jobs import register
+from .fees import (
+    GenerationResult, expire_overdue_fees, generate_fees, generate_fees_parallel, month_dates, plan_partitions
+)
+from .models import Payment
+from .proofs import mark_proof, render_variants
+from .receipts import ensure_receipt, mark_receipt, receipt_queryset, receipt_url
+
+
+def generation_lock_key(year, month):
+    # Un solo candado por mes: una corrida de todas las sedes y una de una
+    # sede tocarían las mismas deudas y saldos
+    return f"generate_monthly_fees:{year}-{month:02d}"
+
+
+@register('generate_monthly_fees')
+def generate_monthly_fees_job(job, report):
+    params = job.params
+    month_date, due_date = month_dates(params['year'], params['month'])
+
+    sede_id = params.get('sede')
+    workers = params.get('workers') or 1
+
+    if workers > 1:
+        merged = GenerationResult()
+        result = generate_fees_parallel(
+            month_date,
+            due_date,
+            plan_partitions(params.get('partition_by', 'sede'), sede_id, parts=workers),
+            workers,
+            sede_id=sede_id,
+            on_partition=lambda partition, partial, error: report(**merged.merge(partial).as_dict()),
+        )
+    else:
+        result = generate_fees(
+            month_date,
+            due_date,
+            sede_id=sede_id,
+            on_chunk=lambda partial: report(**partial.as_dict()),
+        )
+    return result.as_dict()
+
+
+@register('expire_overdue_fees')
+def expire_overdue_fees_job(job, report):
+    return {'expired': expire_overdue_fees(user=job.created_by)}
+
+
+@register('render_receipt')
+def render_receipt_job(job, report):
+    payment_id = job.params['payment_id']
+    try:
+        payment = receipt_queryset().get(id=payment_id)
+        ensure_receipt(payment)
+    except Exception:
+        # En el último intento el comprobante queda como fallido
+        if job.attempts >= job.max_attempts:
+            mark_receipt(payment_id, 'failed')
+        raise
+    url = receipt_url(payment_id)
+    mark_receipt(payment_id, 'ready', url)
+    return {'comprobante_url': url}
+
+
+@register('process_proof')
+def process_proof_job(job, report):
+    payment_id = job.params['payment_id']
+    try:
+        payment = Payment.objects.get(id=payment_id)
+        if not payment.proof_hash:
+            return {'skipped': True}
+        display, thumbnail = render_variants(payment)
+    except Exception:
+        if job.attempts >= job.max_attempts:
+            mark_proof(payment_id, 'failed')
+        raise
+    mark_proof(payment_id, 'ready', display, thumbnail)
+    return {'proof_display': display, 'proof_thumbnail': thumbnail}
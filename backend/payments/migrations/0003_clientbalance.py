@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, F, Max, Min, Sum
+
+
+def populate_balances(apps, schema_editor):
+    MonthlyFee = apps.get_model('payments', 'MonthlyFee')
+    Payment = apps.get_model('payments', 'Payment')
+    ClientBalance = apps.get_model('payments', 'ClientBalance')
+
+    balances = {}
+    debts = MonthlyFee.objects.filter(status__in=['pending', 'partial', 'expired']).values('client_id').annotate(
+        open_amount=Sum(F('amount') - F('paid_amount')),
+        months_owed=Count('month_date', distinct=True),
+        oldest_unpaid_month=Min('month_date'),
+    ).order_by()
+    for row in debts:
+        balances[row['client_id']] = ClientBalance(
+            client_id=row['client_id'],
+            open_amount=row['open_amount'] or 0,
+            months_owed=row['months_owed'],
+            oldest_unpaid_month=row['oldest_unpaid_month'],
+        )
+
+    last_payments = Payment.objects.filter(validation_status='validated').values('client_id').annotate(
+        last=Max('date')
+    ).order_by()
+    for row in last_payments:
+        balance = balances.setdefault(row['client_id'], ClientBalance(client_id=row['client_id']))
+        balance.last_payment_date = row['last']
+
+    ClientBalance.objects.bulk_create(balances.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_checkpoint'),
+        ('payments', '0002_paymentallocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientBalance',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='core.client')),
+                ('open_amount', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('months_owed', models.PositiveIntegerField(default=0)),
+                ('oldest_unpaid_month', models.DateField(blank=True, null=True)),
+                ('last_payment_date', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Saldo de Cliente',
+                'verbose_name_plural': 'Saldos de Clientes',
+                'indexes': [models.Index(fields=['-open_amount'], name='clientbalance_open_idx')],
+            },
+        ),
+        migrations.RunPython(populate_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_checkpoint'),
+        ('payments', '0003_clientbalance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['validation_status', '-date', '-id'], name='payment_status_date_idx'),
+        ),
+    ]
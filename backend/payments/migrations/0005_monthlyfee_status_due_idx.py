@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_checkpoint'),
+        ('payments', '0004_payment_status_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlyfee',
+            index=models.Index(fields=['status', 'due_date'], name='monthlyfee_status_due_idx'),
+        ),
+    ]
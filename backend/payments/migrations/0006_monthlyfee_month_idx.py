@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_checkpoint'),
+        ('payments', '0005_monthlyfee_status_due_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monthlyfee',
+            index=models.Index(fields=['month_date'], name='monthlyfee_month_idx'),
+        ),
+    ]
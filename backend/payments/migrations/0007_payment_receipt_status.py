@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:04
+
+from django.db import migrations, models
+
+
+def mark_existing_receipts(apps, schema_editor):
+    # Los pagos que ya tienen PDF quedan listos; el resto se encola con enqueue_receipts
+    Payment = apps.get_model('payments', 'Payment')
+    Payment.objects.exclude(comprobante_url='').update(receipt_status='ready')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0006_monthlyfee_month_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='receipt_status',
+            field=models.CharField(choices=[('pending', 'Comprobante en proceso'), ('ready', 'Comprobante listo'), ('failed', 'Comprobante con error')], default='pending', max_length=20),
+        ),
+        migrations.RunPython(mark_existing_receipts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:20
+
+from django.db import migrations, models
+from django.db.models.functions import Cast, Concat
+
+
+def point_to_receipt_endpoint(apps, schema_editor):
+    # Los PDF en /media/comprobantes/ ya no se actualizan: el comprobante se sirve desde la API
+    Payment = apps.get_model('payments', 'Payment')
+    Payment.objects.exclude(comprobante_url='').update(
+        comprobante_url=Concat(
+            models.Value('/api/payments/'), Cast('id', models.CharField()), models.Value('/receipt/'),
+            output_field=models.CharField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_payment_receipt_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(point_to_receipt_endpoint, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:05
+
+from django.db import migrations, models
+
+
+def mark_existing_proofs(apps, schema_editor):
+    # Las imágenes ya subidas quedan pendientes; las procesa el comando process_proofs
+    Payment = apps.get_model('payments', 'Payment')
+    Payment.objects.exclude(proof_image='').exclude(proof_image__isnull=True).update(proof_status='pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0008_receipt_endpoint_urls'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='proof_display',
+            field=models.ImageField(blank=True, null=True, upload_to='payments/display/'),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_hash',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_status',
+            field=models.CharField(choices=[('none', 'Sin imagen'), ('pending', 'Imagen en proceso'), ('ready', 'Imagen lista'), ('failed', 'Imagen con error')], default='none', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='proof_thumbnail',
+            field=models.ImageField(blank=True, null=True, upload_to='payments/thumbs/'),
+        ),
+        migrations.RunPython(mark_existing_proofs, migrations.RunPython.noop),
+    ]
@@ -59,6 +59,12 @@ class MonthlyFee(models.Model):
     class Meta:
         ordering = ['-month_date', 'client__name']
         unique_together = ['client', 'service', 'month_date']
+        indexes = [
+            # Deuda abierta por vencimiento (antigüedad, vencimiento masivo)
+            models.Index(fields=['status', 'due_date'], name='monthlyfee_status_due_idx'),
+            # Facturación de un mes (pronóstico, comparativo de sedes)
+            models.Index(fields=['month_date'], name='monthlyfee_month_idx'),
+        ]
 
     def __str__(self):
         return f"{self.client} - {self.month_date} - {self.status}"
@@ -75,6 +81,18 @@ class Payment(models.Model):
         ('validated', 'Validado'),
         ('rejected', 'Rechazado'),
     )
+    RECEIPT_STATUS = (
+        ('pending', 'Comprobante en proceso'),
+        ('ready', 'Comprobante listo'),
+        ('failed', 'Comprobante con error'),
+    )
+
+    PROOF_STATUS = (
+        ('none', 'Sin imagen'),
+        ('pending', 'Imagen en proceso'),
+        ('ready', 'Imagen lista'),
+        ('failed', 'Imagen con error'),
+    )
 
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='payments')
     service = models.ForeignKey(Service, on_delete=models.SET_NULL, null=True, blank=True)
@@ -83,6 +101,11 @@ class Payment(models.Model):
     method = models.CharField(max_length=20, choices=PAYMENT_METHODS)
     reference_number = models.CharField(max_length=100, blank=True)
     proof_image = models.ImageField(upload_to='payments/', blank=True, null=True)
+    # Versiones livianas de proof_image que genera el worker (payments.proofs)
+    proof_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    proof_display = models.ImageField(upload_to='payments/display/', blank=True, null=True)
+    proof_thumbnail = models.ImageField(upload_to='payments/thumbs/', blank=True, null=True)
+    proof_status = models.CharField(max_length=20, choices=PROOF_STATUS, default='none')
     
     registered_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='registered_payments')
     validated_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='validated_payments')
@@ -101,6 +124,52 @@ class Payment(models.Model):
     fecha_anulacion = models.DateTimeField(null=True, blank=True)
     
     comprobante_url = models.CharField(max_length=255, blank=True)
+    # El PDF del comprobante lo genera el worker (payments.jobs)
+    receipt_status = models.CharField(max_length=20, choices=RECEIPT_STATUS, default='pending')
+
+    class Meta:
+        indexes = [
+            # Listados de pagos por estado, del más reciente al más antiguo
+            models.Index(fields=['validation_status', '-date', '-id'], name='payment_status_date_idx'),
+        ]
 
     def __str__(self):
         return f"{self.client} - {self.amount} - {self.validation_status}"
+
+
+class PaymentAllocation(models.Model):
+    """
+    Parte de un pago aplicada a una deuda mensual.
+    Permite revertir la aplicación cuando el pago se anula.
+    """
+    payment = models.ForeignKey(Payment, on_delete=models.CASCADE, related_name='allocations')
+    fee = models.ForeignKey(MonthlyFee, on_delete=models.CASCADE, related_name='allocations')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pago #{self.payment_id} -> Deuda #{self.fee_id}: {self.amount}"
+
+
+class ClientBalance(models.Model):
+    """
+    Saldo desnormalizado por cliente, mantenido incrementalmente a partir de
+    MonthlyFee y Payment (ver payments.balances). Evita re-agregar toda la
+    tabla de deudas para cada cifra de deuda.
+    """
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name='balance')
+    open_amount = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    months_owed = models.PositiveIntegerField(default=0)
+    oldest_unpaid_month = models.DateField(null=True, blank=True)
+    last_payment_date = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Saldo de Cliente'
+        verbose_name_plural = 'Saldos de Clientes'
+        indexes = [
+            models.Index(fields=['-open_amount'], name='clientbalance_open_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.client} - S/.{self.open_amount}"
@@ -0,0 +1,113 @@
+"""
+Índice en memoria de precios por zona (ConfigPreciosZona).
+
+Todas las configuraciones activas se cargan una sola vez en un índice por
+(caserío, tipo de servicio) ordenado por inicio de vigencia, y se resuelven
+con búsqueda binaria. El índice se invalida cuando cambia ConfigPreciosZona.
+"""
+import bisect
+import threading
+import time
+
+from django.utils import timezone
+
+from core import cache as data_version
+
+
+VERSION_KEY = 'precios_zona:version'
+
+# Cada cuántos segundos se revisa la versión compartida (core.DataVersion),
+# para que los demás procesos se enteren de cambios hechos por otro worker.
+VERSION_CHECK_INTERVAL = 1.0
+
+
+class PriceResolver:
+    """
+    Resuelve el precio vigente de una zona para un tipo de servicio y fecha.
+    """
+
+    def __init__(self):
+        self._index = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """
+        Descarta el índice local y avisa al resto de procesos.
+        """
+        with self._lock:
+            self._index = None
+        data_version.incr(VERSION_KEY)
+
+    def _shared_version(self):
+        return data_version.get_many([VERSION_KEY])[VERSION_KEY]
+
+    def _load(self):
+        from .models import ConfigPreciosZona
+
+        index = {}
+        configs = ConfigPreciosZona.objects.filter(activo=True).order_by(
+            'zona_id', 'tipo_servicio', 'vigencia_desde', 'id'
+        ).values_list('zona_id', 'tipo_servicio', 'vigencia_desde', 'vigencia_hasta', 'precio_base')
+
+        for zona_id, tipo_servicio, desde, hasta, precio in configs:
+            starts, entries = index.setdefault((zona_id, tipo_servicio), ([], []))
+            starts.append(desde)
+            entries.append((hasta, precio))
+        return index
+
+    def _get_index(self):
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < VERSION_CHECK_INTERVAL:
+            return self._index
+
+        with self._lock:
+            version = self._shared_version()
+            if self._index is None or version != self._version:
+                self._index = self._load()
+                self._version = version
+            self._checked_at = now
+            return self._index
+
+    def price_for(self, caserio_id, service_type, date=None):
+        """
+        Precio de zona vigente en `date` (hoy por defecto) o None si no hay.
+
+        Ante vigencias superpuestas gana la de inicio más reciente que aún
+        cubra la fecha.
+        """
+        if caserio_id is None:
+            return None
+        return self._lookup(self._get_index(), caserio_id, service_type, date or timezone.localdate())
+
+    def resolve_many(self, clients, service_type, date=None):
+        """
+        Resuelve el precio para varios clientes a la vez.
+        Retorna un dict {client_id: precio o None}.
+        """
+        index = self._get_index()
+        date = date or timezone.localdate()
+        return {
+            client.id: self._lookup(index, client.caserio_id, service_type, date)
+            for client in clients
+        }
+
+    @staticmethod
+    def _lookup(index, caserio_id, service_type, date):
+        bucket = index.get((caserio_id, service_type))
+        if not bucket:
+            return None
+
+        starts, entries = bucket
+        position = bisect.bisect_right(starts, date) - 1
+        while position >= 0:
+            hasta, precio = entries[position]
+            if hasta is None or hasta >= date:
+                return precio
+            position -= 1
+        return None
+
+
+# Instancia compartida por el proceso
+price_resolver = PriceResolver()
@@ -0,0 +1,184 @@
+"""
+Imágenes de constancia de pago (capturas de Yape/Plin).
+
+El archivo subido se copia a disco por bloques mientras se calcula su
+sha256 y se guarda una sola vez por contenido en
+MEDIA_ROOT/payments/originals/<ab>/<cd>/<hash>.<ext> (subdirectorios de
+core.storage): la misma captura subida dos veces apunta al mismo archivo.
+
+Luego la tarea 'process_proof' (payments.jobs) genera una versión
+re-codificada de tamaño acotado (proof_display) y una miniatura para la
+cola de validación (proof_thumbnail), también nombradas por el hash. El
+worker debe ver el mismo MEDIA_ROOT que el proceso web que las entrega
+(ver start.sh); `process_proofs --check-ready` vuelve a encolar las que
+quedaron listas sin archivo en disco.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.db import transaction
+from PIL import Image, ImageOps
+
+from core import jobs, storage
+from .models import Payment
+
+
+ORIGINALS_DIR = 'payments/originals'
+DISPLAY_DIR = 'payments/display'
+THUMBNAILS_DIR = 'payments/thumbs'
+
+# Lado mayor en píxeles y calidad JPEG de cada variante
+DISPLAY_SIZE = 1280
+DISPLAY_QUALITY = 80
+THUMBNAIL_SIZE = 240
+THUMBNAIL_QUALITY = 70
+
+PROOF_MAX_ATTEMPTS = 3
+
+
+def _extension(upload):
+    # Según el formato que detectó Pillow al validar, no el nombre que manda el teléfono
+    image_format = getattr(getattr(upload, 'image', None), 'format', None)
+    for ext, registered in Image.registered_extensions().items():
+        if registered == image_format:
+            return '.jpg' if image_format == 'JPEG' else ext
+    return os.path.splitext(upload.name)[1].lower() or '.jpg'
+
+
+def store_proof(upload):
+    """
+    Copia el archivo subido a disco por bloques y retorna (nombre relativo
+    a MEDIA_ROOT, sha256). Si ya existe un original con ese contenido se
+    descarta la copia y se reutiliza el existente.
+    """
+    ext = _extension(upload)
+    directory = storage.media_path(f"{ORIGINALS_DIR}/tmp/", create=True)
+    digest = hashlib.sha256()
+
+    fd, tmp = tempfile.mkstemp(suffix='.part', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in upload.chunks():
+                digest.update(chunk)
+                f.write(chunk)
+
+        proof_hash = digest.hexdigest()
+        name = storage.sharded_name(ORIGINALS_DIR, proof_hash, f"{proof_hash}{ext}")
+        path = storage.media_path(name, create=True)
+        if os.path.exists(path):
+            os.remove(tmp)
+        else:
+            storage.publish(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    return name, proof_hash
+
+
+def _flatten(image):
+    # JPEG no tiene transparencia: se compone sobre fondo blanco
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ('RGBA', 'LA', 'P'):
+        image = image.convert('RGBA')
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+def _save_variant(image, name, size, quality):
+    path = storage.media_path(name, create=True)
+    if os.path.exists(path):
+        return
+    variant = image.copy()
+    variant.thumbnail((size, size), Image.LANCZOS)
+
+    fd, tmp = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            variant.save(f, 'JPEG', quality=quality, optimize=True, progressive=True)
+        storage.publish(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def render_variants(payment):
+    """
+    Genera (si aún no existen) la versión de visualización y la miniatura
+    del original y retorna sus nombres.
+    """
+    proof_hash = payment.proof_hash
+    display = storage.sharded_name(DISPLAY_DIR, proof_hash, f"{proof_hash}.jpg")
+    thumbnail = storage.sharded_name(THUMBNAILS_DIR, proof_hash, f"{proof_hash}.jpg")
+
+    if not (os.path.exists(storage.media_path(display)) and os.path.exists(storage.media_path(thumbnail))):
+        with Image.open(payment.proof_image.path) as original:
+            image = _flatten(original)
+        _save_variant(image, display, DISPLAY_SIZE, DISPLAY_QUALITY)
+        _save_variant(image, thumbnail, THUMBNAIL_SIZE, THUMBNAIL_QUALITY)
+
+    return display, thumbnail
+
+
+def file_hash(field_file):
+    """
+    sha256 de un archivo ya guardado (constancias subidas antes de este
+    módulo), leído por bloques.
+    """
+    digest = hashlib.sha256()
+    with field_file.open('rb') as f:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def enqueue_proof(payment_id):
+    """
+    Encola el procesamiento de la imagen cuando la transacción actual
+    confirme, para que el worker ya vea el pago.
+    """
+    def enqueue():
+        try:
+            jobs.enqueue(
+                'process_proof',
+                {'payment_id': payment_id},
+                lock_key=f'process_proof:{payment_id}',
+                max_attempts=PROOF_MAX_ATTEMPTS,
+            )
+        except jobs.JobLocked:
+            pass
+
+    transaction.on_commit(enqueue)
+
+
+def mark_proof(payment_id, status, display=None, thumbnail=None):
+    """
+    Actualiza el estado de la imagen sin pasar por save() (igual que
+    mark_receipt: no cambia datos de negocio).
+    """
+    values = {'proof_status': status}
+    if display is not None:
+        values.update(proof_display=display, proof_thumbnail=thumbnail)
+    Payment.objects.filter(id=payment_id).update(**values)
+
+
+def proof_fields(upload):
+    """
+    Guarda el archivo subido y retorna los campos de Payment que le
+    corresponden. Si otra constancia con el mismo contenido ya fue
+    procesada se reutilizan sus variantes y no hace falta encolar nada.
+    """
+    name, proof_hash = store_proof(upload)
+    values = {'proof_image': name, 'proof_hash': proof_hash, 'proof_status': 'pending'}
+
+    processed = Payment.objects.filter(proof_hash=proof_hash, proof_status='ready').values(
+        'proof_display', 'proof_thumbnail'
+    ).first()
+    if processed:
+        values.update(processed, proof_status='ready')
+    return values
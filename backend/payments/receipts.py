@@ -0,0 +1,175 @@
+"""
+Comprobantes de pago en PDF.
+
+Hay un solo camino para el comprobante individual: ensure_receipt() lo
+dibuja con payments.utils y lo guarda en MEDIA_ROOT/comprobantes (en el
+subdirectorio que core.storage asigna al pago) bajo una huella (sha256) de
+los campos que aparecen en él. Si el pago cambia (por ejemplo al anularse)
+cambia la huella y el siguiente pedido lo vuelve a dibujar; mientras no
+cambie se sirve el archivo guardado. La huella es
+también el ETag del endpoint /api/payments/<id>/receipt/.
+
+Al crear un pago se encola una tarea 'render_receipt' (payments.jobs) que
+lo deja dibujado de antemano.
+"""
+import datetime
+import glob
+import hashlib
+import os
+import tempfile
+
+from django.db import transaction
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs, storage
+from .models import Payment
+from .utils import write_receipts
+
+
+RECEIPTS_DIR = 'comprobantes'
+
+# Subir al cambiar el diseño del comprobante: invalida todos los guardados
+RECEIPT_LAYOUT_VERSION = 1
+
+# Reintentos de una generación fallida (ver core.jobs.RETRY_DELAY)
+RECEIPT_MAX_ATTEMPTS = 3
+
+
+def receipt_name(payment_id, fingerprint='*'):
+    # Todas las versiones de un pago comparten subdirectorio
+    return storage.sharded_name(RECEIPTS_DIR, payment_id, f"COMPROBANTE_{payment_id}_{fingerprint}.pdf")
+
+
+def receipt_queryset():
+    # Todo lo que lee receipt_fingerprint y receipt_elements en una consulta
+    return Payment.objects.select_related('client__caserio', 'service')
+
+
+def receipt_fingerprint(payment):
+    """
+    Huella de los datos que se imprimen en el comprobante.
+    """
+    client = payment.client
+    fields = [
+        RECEIPT_LAYOUT_VERSION,
+        payment.id,
+        timezone.localtime(payment.date).date().isoformat(),
+        payment.amount,
+        payment.method,
+        payment.reference_number or '',
+        payment.service.service_type if payment.service else '',
+        payment.fecha_anulacion.isoformat() if payment.fecha_anulacion else '',
+        client.name,
+        client.code,
+        client.dni,
+        client.address,
+        client.caserio.name if client.caserio else '',
+    ]
+    return hashlib.sha256('\x1f'.join(str(field) for field in fields).encode()).hexdigest()
+
+
+def receipt_url(payment_id):
+    return reverse('payment-receipt', args=[payment_id])
+
+
+def _remove_stale(payment_id, keep):
+    # Incluye los que generaban las versiones anteriores, sin subdirectorio
+    paths = glob.glob(storage.media_path(receipt_name(payment_id)))
+    paths += glob.glob(storage.media_path(f"{RECEIPTS_DIR}/COMPROBANTE_{payment_id}.pdf"))
+    paths += glob.glob(storage.media_path(f"{RECEIPTS_DIR}/COMPROBANTE_{payment_id}_*.pdf"))
+    for path in paths:
+        if path != keep:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def ensure_receipt(payment):
+    """
+    Retorna (nombre relativo a MEDIA_ROOT, huella) del comprobante vigente, dibujándolo solo si no
+    existe uno para la huella actual. La escritura va a un archivo temporal
+    que se renombra al final, así un pedido concurrente nunca lee un PDF a
+    medias. Las versiones anteriores del mismo pago se borran.
+    """
+    fingerprint = receipt_fingerprint(payment)
+    name = receipt_name(payment.id, fingerprint[:24])
+    path = storage.media_path(name, create=True)
+    if os.path.exists(path):
+        return name, fingerprint
+
+    fd, tmp = tempfile.mkstemp(suffix='.part', dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write_receipts([payment], f)
+        storage.publish(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+    _remove_stale(payment.id, keep=path)
+    return name, fingerprint
+
+
+def enqueue_receipt(payment_id):
+    """
+    Encola la generación del comprobante cuando la transacción actual
+    confirme, para que el worker ya vea el pago.
+    """
+    def enqueue():
+        try:
+            jobs.enqueue(
+                'render_receipt',
+                {'payment_id': payment_id},
+                lock_key=f'render_receipt:{payment_id}',
+                max_attempts=RECEIPT_MAX_ATTEMPTS,
+            )
+        except jobs.JobLocked:
+            # Ya hay una generación en curso para este pago
+            pass
+
+    transaction.on_commit(enqueue)
+
+
+def mark_receipt(payment_id, status, url=None):
+    """
+    Actualiza el estado del comprobante sin pasar por save() (no dispara
+    señales ni invalida cachés: no cambia ningún dato de negocio).
+    """
+    values = {'receipt_status': status}
+    if url is not None:
+        values['comprobante_url'] = url
+    Payment.objects.filter(id=payment_id).update(**values)
+
+
+def batch_queryset(queryset, day=None, sede_id=None, cobrador_id=None):
+    """
+    Pagos de un día (por defecto hoy) para imprimir en lote, con cliente,
+    caserío y servicio en la misma consulta. Excluye los rechazados.
+    """
+    day = day or timezone.localdate()
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    queryset = queryset.filter(
+        date__gte=start, date__lt=start + datetime.timedelta(days=1)
+    ).exclude(validation_status='rejected')
+
+    if sede_id:
+        queryset = queryset.filter(client__sede_id=sede_id)
+    if cobrador_id:
+        queryset = queryset.filter(registered_by_id=cobrador_id)
+
+    return queryset.select_related('client__caserio', 'service').order_by('date', 'id')
+
+
+def write_batch_file(payments):
+    """
+    Escribe el lote a un archivo temporal (ReportLab necesita el documento
+    completo antes de cerrarlo) y lo retorna posicionado al inicio junto con
+    la cantidad de comprobantes.
+    """
+    tmp = tempfile.TemporaryFile()
+    count = write_receipts(payments.iterator(chunk_size=500), tmp)
+    tmp.seek(0)
+    return tmp, count
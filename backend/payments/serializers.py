@@ -1,5 +1,8 @@
+from django.db import models
 from rest_framework import serializers
+from core.serializers import SignedImageField
 from .models import Payment, Service, MonthlyFee, ConfigPreciosZona
+from .proofs import enqueue_proof, proof_fields
 
 class ServiceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,8 +28,38 @@ class MonthlyFeeSerializer(serializers.ModelSerializer):
 
 
 class PaymentSerializer(serializers.ModelSerializer):
+    # Imágenes de constancia con URL firmada (core.storage)
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.ImageField: SignedImageField,
+    }
+
     client_name = serializers.ReadOnlyField(source='client.name')
     
     class Meta:
         model = Payment
         fields = '__all__'
+        # Las variantes de la imagen y el comprobante los genera el worker
+        # (payments.proofs, payments.receipts)
+        read_only_fields = (
+            'proof_hash', 'proof_display', 'proof_thumbnail', 'proof_status', 'receipt_status', 'comprobante_url'
+        )
+
+    def _store_proof(self, validated_data):
+        upload = validated_data.get('proof_image')
+        if upload:
+            validated_data.update(proof_fields(upload))
+
+    def create(self, validated_data):
+        self._store_proof(validated_data)
+        payment = super().create(validated_data)
+        if payment.proof_status == 'pending':
+            enqueue_proof(payment.id)
+        return payment
+
+    def update(self, instance, validated_data):
+        self._store_proof(validated_data)
+        payment = super().update(instance, validated_data)
+        if 'proof_hash' in validated_data and payment.proof_status == 'pending':
+            enqueue_proof(payment.id)
+        return payment
@@ -1,10 +1,12 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
+from core import cache as data_version
 from core.models import Client
-from .models import Payment
-from reportlab.pdfgen import canvas
-from django.conf import settings
-import os
+from .models import Payment, ConfigPreciosZona, MonthlyFee
+from .balances import refresh_balances
+from .pricing import price_resolver
+from .receipts import enqueue_receipt
 
 @receiver(post_save, sender=Client)
 def generate_client_code(sender, instance, created, **kwargs):
@@ -13,30 +15,48 @@ def generate_client_code(sender, instance, created, **kwargs):
         instance.save()
 
 @receiver(post_save, sender=Payment)
-def generate_comprobante(sender, instance, created, **kwargs):
+def queue_comprobante(sender, instance, created, **kwargs):
+    # El PDF lo genera el worker; el pago queda con receipt_status='pending'
     if created and not instance.comprobante_url:
-        # Create directory if not exists
-        media_root = settings.MEDIA_ROOT
-        comprobantes_dir = os.path.join(media_root, 'comprobantes')
-        os.makedirs(comprobantes_dir, exist_ok=True)
-
-        filename = f"COMPROBANTE_{instance.id}.pdf"
-        filepath = os.path.join(comprobantes_dir, filename)
-        
-        # Generate PDF
-        c = canvas.Canvas(filepath)
-        c.drawString(100, 800, "MIRAMAX - COMPROBANTE DE PAGO")
-        c.drawString(100, 780, f"Recibo Nro: {instance.id}")
-        c.drawString(100, 760, f"Fecha: {instance.date.strftime('%Y-%m-%d %H:%M')}")
-        c.drawString(100, 740, f"Cliente: {instance.client.name}")
-        c.drawString(100, 720, f"Código: {instance.client.code}")
-        c.drawString(100, 700, f"Monto: S/ {instance.amount}")
-        c.drawString(100, 680, f"Método: {instance.get_method_display()}")
-        if instance.reference_number:
-            c.drawString(100, 660, f"Referencia: {instance.reference_number}")
-        
-        c.save()
-
-        # Save URL
-        instance.comprobante_url = f"/media/comprobantes/{filename}"
-        instance.save()
+        enqueue_receipt(instance.id)
+
+@receiver(post_save, sender=ConfigPreciosZona)
+@receiver(post_delete, sender=ConfigPreciosZona)
+def invalidate_zone_prices(sender, instance, **kwargs):
+    # Igual que las versiones de datos: otros procesos recargan recién con el cambio confirmado
+    transaction.on_commit(price_resolver.invalidate)
+
+
+@receiver(post_save, sender=MonthlyFee)
+@receiver(post_delete, sender=MonthlyFee)
+def update_client_balance(sender, instance, **kwargs):
+    # Al eliminar un cliente sus deudas caen en cascada: no hay saldo que mantener
+    origin = kwargs.get('origin')
+    if getattr(origin, 'model', type(origin)) is Client:
+        return
+    refresh_balances([instance.client_id])
+
+
+def _client_sede_id(client_id):
+    return Client.objects.filter(id=client_id).values_list('sede_id', flat=True).first()
+
+
+@receiver(pre_save, sender=Client)
+def remember_client_sede(sender, instance, **kwargs):
+    # Si el cliente cambia de sede, también cambian los datos de la anterior
+    if instance.pk:
+        instance._previous_sede_id = Client.objects.filter(pk=instance.pk).values_list('sede_id', flat=True).first()
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+def bump_client_data_version(sender, instance, **kwargs):
+    data_version.bump(instance.sede_id, getattr(instance, '_previous_sede_id', None))
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+@receiver(post_save, sender=MonthlyFee)
+@receiver(post_delete, sender=MonthlyFee)
+def bump_data_version(sender, instance, **kwargs):
+    data_version.bump(_client_sede_id(instance.client_id))
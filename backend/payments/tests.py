@@ -1,3 +1,611 @@
-from django.test import TestCase
+import datetime
+import io
+import os
+import shutil
+import stat
+import tempfile
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from core import jobs
+from core.models import Auditoria, Caserio, Client, Department, District, Job, Province, Sede
+from reports.models import DailyRevenueRollup
+from users.models import User
+from .allocation import allocate_payment, deallocate_payment, reconcile_fees
+from .balances import rebuild_balances, refresh_balances
+from .fees import expire_overdue_fees, generate_fees, generate_fees_parallel, month_dates, plan_partitions
+from .models import ClientBalance, ConfigPreciosZona, MonthlyFee, Payment, PaymentAllocation, Service
+from .pricing import PriceResolver
+from .proofs import enqueue_proof, proof_fields, render_variants, store_proof
+from .receipts import ensure_receipt, receipt_queryset, receipt_url
+
+
+class PaymentFixtureMixin:
+    """
+    Una sede con un usuario de oficina y un cliente con un servicio de
+    internet y una deuda vencida.
+    """
+
+    def setUp(self):
+        self.sede = Sede.objects.create(nombre='Sede Test', direccion='Av. 1')
+        self.oficina = User.objects.create_user('oficina', password='x', role='oficina', sede=self.sede)
+        self.client_obj = Client.objects.create(dni='12345678', name='Cliente Test', address='Calle 1', sede=self.sede)
+        self.service = Service.objects.create(client=self.client_obj, service_type='internet', price=Decimal('50'))
+        self.fee = MonthlyFee.objects.create(
+            client=self.client_obj, service=self.service, month_date=datetime.date(2026, 1, 1),
+            due_date=datetime.date(2026, 1, 15), amount=Decimal('50'), status='expired',
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.oficina)
+
+    def create_payment(self, amount='50', method='yape'):
+        return Payment.objects.create(
+            client=self.client_obj, amount=Decimal(amount), method=method, registered_by=self.oficina
+        )
+
+    def revenue_total(self):
+        return DailyRevenueRollup.objects.aggregate(total=Sum('total'))['total'] or Decimal('0')
+
+
+class MediaRootMixin:
+    """
+    MEDIA_ROOT en un directorio temporal que se borra al terminar.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+
+    def file_mode(self, name):
+        return stat.S_IMODE(os.stat(os.path.join(self.media_root, name)).st_mode)
+
+
+class ValidatePaymentTests(PaymentFixtureMixin, TestCase):
+
+    def test_validate_applies_payment_once(self):
+        payment = self.create_payment()
+        response = self.api.post(f'/api/payments/{payment.id}/validate_payment/', {'status': 'validated'})
+        self.assertEqual(response.status_code, 200)
+
+        self.fee.refresh_from_db()
+        self.assertEqual(self.fee.status, 'paid')
+        self.assertEqual(self.revenue_total(), Decimal('50'))
+
+    def test_annulled_payment_cannot_be_validated_again(self):
+        payment = self.create_payment()
+        self.api.post(f'/api/payments/{payment.id}/validate_payment/', {'status': 'validated'})
+        response = self.api.post(f'/api/payments/{payment.id}/anular/', {'motivo': 'Duplicado'})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.api.post(f'/api/payments/{payment.id}/validate_payment/', {'status': 'validated'})
+        self.assertEqual(response.status_code, 400)
+
+        self.fee.refresh_from_db()
+        payment.refresh_from_db()
+        self.assertEqual(self.fee.status, 'expired')
+        self.assertEqual(self.fee.paid_amount, Decimal('0'))
+        self.assertEqual(payment.validation_status, 'rejected')
+        self.assertEqual(self.revenue_total(), Decimal('0'))
+
+
+class GenerateFeesTests(PaymentFixtureMixin, TestCase):
+
+    def test_second_run_does_not_duplicate(self):
+        Service.objects.create(client=self.client_obj, service_type='cable', price=Decimal('30'))
+        Service.objects.create(client=self.client_obj, service_type='cable', price=Decimal('30'), is_active=False)
+        month_date, due_date = month_dates(2026, 2)
+
+        result = generate_fees(month_date, due_date, chunk_size=1)
+        self.assertEqual(result.as_dict(), {'processed': 2, 'created': 2, 'skipped': 0, 'errors': 0})
+
+        result = generate_fees(month_date, due_date)
+        self.assertEqual((result.created, result.skipped), (0, 2))
+        self.assertEqual(MonthlyFee.objects.filter(month_date=month_date).count(), 2)
+
+    def test_dry_run_creates_nothing(self):
+        month_date, due_date = month_dates(2026, 2)
+        result = generate_fees(month_date, due_date, dry_run=True)
+        self.assertEqual(result.created, 1)
+        self.assertFalse(MonthlyFee.objects.filter(month_date=month_date).exists())
+
+
+class AllocationTests(PaymentFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.february = MonthlyFee.objects.create(
+            client=self.client_obj, service=self.service, month_date=datetime.date(2026, 2, 1),
+            due_date=datetime.date(2026, 2, 15), amount=Decimal('50'), status='expired',
+        )
+
+    def fee_state(self):
+        return list(MonthlyFee.objects.order_by('month_date').values_list('paid_amount', 'status'))
+
+    def test_applies_oldest_fee_first(self):
+        self.assertEqual(allocate_payment(self.create_payment('70')), Decimal('0'))
+        self.assertEqual(self.fee_state(), [(Decimal('50'), 'paid'), (Decimal('20'), 'partial')])
+        self.assertEqual(ClientBalance.objects.get(client=self.client_obj).open_amount, Decimal('30'))
+
+    def test_allocating_twice_is_idempotent(self):
+        payment = self.create_payment('70')
+        allocate_payment(payment)
+        state = self.fee_state()
+
+        self.assertEqual(allocate_payment(payment), Decimal('0'))
+        self.assertEqual(self.fee_state(), state)
+        self.assertEqual(PaymentAllocation.objects.filter(payment=payment).count(), 2)
+
+    def test_returns_amount_without_open_fees(self):
+        self.assertEqual(allocate_payment(self.create_payment('130')), Decimal('30'))
+
+    def test_deallocate_reopens_fees(self):
+        payment = self.create_payment('70')
+        allocate_payment(payment)
+
+        self.assertEqual(deallocate_payment(payment), 2)
+        self.assertEqual(self.fee_state(), [(Decimal('0'), 'expired'), (Decimal('0'), 'expired')])
+        self.assertFalse(PaymentAllocation.objects.exists())
+        self.assertEqual(ClientBalance.objects.get(client=self.client_obj).open_amount, Decimal('100'))
+
+        # Revertir de nuevo no cambia nada
+        self.assertEqual(deallocate_payment(payment), 0)
+
+    def test_reconcile_matches_incremental_allocation(self):
+        for amount in ('30', '40'):
+            payment = self.create_payment(amount)
+            Payment.objects.filter(id=payment.id).update(validation_status='validated')
+            allocate_payment(payment)
+        state = self.fee_state()
+
+        result = reconcile_fees(self.sede.id)
+        self.assertEqual(result['allocations'], 3)
+        self.assertEqual(self.fee_state(), state)
+
+        # Vuelve a ser idempotente
+        reconcile_fees(self.sede.id)
+        self.assertEqual(PaymentAllocation.objects.count(), 3)
+
+
+class ClientBalanceTests(PaymentFixtureMixin, TestCase):
+
+    def balance(self):
+        return ClientBalance.objects.get(client=self.client_obj)
+
+    def test_follows_fee_changes(self):
+        self.assertEqual(self.balance().open_amount, Decimal('50'))
+
+        february = MonthlyFee.objects.create(
+            client=self.client_obj, service=self.service, month_date=datetime.date(2026, 2, 1),
+            due_date=datetime.date(2026, 2, 15), amount=Decimal('50'), paid_amount=Decimal('20'), status='partial',
+        )
+        balance = self.balance()
+        self.assertEqual(balance.open_amount, Decimal('80'))
+        self.assertEqual(balance.months_owed, 2)
+        self.assertEqual(balance.oldest_unpaid_month, datetime.date(2026, 1, 1))
+
+        self.fee.delete()
+        february.status = 'paid'
+        february.paid_amount = february.amount
+        february.save()
+        balance = self.balance()
+        self.assertEqual(balance.open_amount, Decimal('0'))
+        self.assertEqual(balance.months_owed, 0)
+        self.assertIsNone(balance.oldest_unpaid_month)
+
+    def test_last_payment_counts_only_validated(self):
+        payment = self.create_payment()
+        refresh_balances([self.client_obj.id])
+        self.assertIsNone(self.balance().last_payment_date)
+
+        Payment.objects.filter(id=payment.id).update(validation_status='validated')
+        refresh_balances([self.client_obj.id])
+        self.assertEqual(self.balance().last_payment_date, payment.date)
+
+    def test_rebuild_restores_missing_balances(self):
+        other = Client.objects.create(dni='87654321', name='Sin deudas', address='Calle 2', sede=self.sede)
+        ClientBalance.objects.all().delete()
+
+        self.assertEqual(rebuild_balances(self.sede.id, chunk_size=1), 2)
+        self.assertEqual(self.balance().open_amount, Decimal('50'))
+        self.assertEqual(ClientBalance.objects.get(client=other).open_amount, Decimal('0'))
+
+
+class ParallelGenerationTests(PaymentFixtureMixin, TestCase):
+
+    def test_balances_include_fees_from_every_partition(self):
+        Service.objects.create(client=self.client_obj, service_type='cable', price=Decimal('30'))
+        month_date, due_date = month_dates(2026, 2)
+
+        # Un servicio por partición: los dos del cliente quedan separados
+        partitions = plan_partitions('range', parts=2)
+        self.assertEqual(len(partitions), 2)
+        result = generate_fees_parallel(month_date, due_date, partitions, workers=2)
+
+        self.assertEqual(result.created, 2)
+        balance = ClientBalance.objects.get(client=self.client_obj)
+        # Deuda de enero (50) + internet (50) y cable (30) de febrero
+        self.assertEqual(balance.open_amount, Decimal('130'))
+        self.assertEqual(balance.months_owed, 2)
+
+
+class MediaPermissionsTests(MediaRootMixin, PaymentFixtureMixin, TestCase):
+    """
+    Los archivos generados deben quedar legibles para nginx/Apache
+    (MEDIA_SERVE_MODE accel o sendfile).
+    """
+
+    def test_receipt_is_world_readable(self):
+        name, _ = ensure_receipt(self.create_payment())
+        self.assertEqual(self.file_mode(name), 0o644)
+
+    def test_proof_and_variants_are_world_readable(self):
+        buffer = io.BytesIO()
+        Image.new('RGB', (2000, 1000), 'blue').save(buffer, 'PNG')
+        name, proof_hash = store_proof(SimpleUploadedFile('captura.png', buffer.getvalue(), 'image/png'))
+
+        payment = self.create_payment()
+        payment.proof_image, payment.proof_hash = name, proof_hash
+        display, thumbnail = render_variants(payment)
+
+        for variant in (name, display, thumbnail):
+            self.assertEqual(self.file_mode(variant), 0o644)
+
+
+class ReceiptJobTests(MediaRootMixin, PaymentFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        # Como run_worker: registra los manejadores de payments.jobs
+        jobs.autodiscover()
+
+    def test_new_payment_queues_receipt_once_committed(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            payment = self.create_payment()
+            self.assertFalse(Job.objects.filter(kind='render_receipt').exists())
+        for callback in callbacks:
+            callback()
+
+        job = Job.objects.get(kind='render_receipt')
+        self.assertEqual(job.params, {'payment_id': payment.id})
+
+        jobs.run_job(jobs.claim_next(['render_receipt']))
+        payment.refresh_from_db()
+        self.assertEqual(payment.receipt_status, 'ready')
+        self.assertEqual(payment.comprobante_url, receipt_url(payment.id))
+
+        name, _ = ensure_receipt(payment)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, name)))
+
+    def test_receipt_fields_are_read_only(self):
+        payment = self.create_payment()
+        response = self.api.patch(
+            f'/api/payments/{payment.id}/',
+            {'receipt_status': 'ready', 'comprobante_url': '/media/otro.pdf', 'reference_number': 'OP-1'},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.receipt_status, 'pending')
+        self.assertEqual(payment.comprobante_url, '')
+        self.assertEqual(payment.reference_number, 'OP-1')
+
+    def test_last_failed_attempt_marks_receipt_failed(self):
+        payment = self.create_payment()
+        job = jobs.enqueue('render_receipt', {'payment_id': payment.id}, max_attempts=2)
+
+        with mock.patch('payments.receipts.write_receipts', side_effect=RuntimeError('ReportLab')):
+            jobs.run_job(jobs.claim_next(['render_receipt']))
+            payment.refresh_from_db()
+            self.assertEqual(payment.receipt_status, 'pending')
+
+            Job.objects.filter(id=job.id).update(run_after=job.created_at)
+            jobs.run_job(jobs.claim_next(['render_receipt']))
+
+        payment.refresh_from_db()
+        self.assertEqual(payment.receipt_status, 'failed')
+        # No queda un PDF a medias
+        self.assertEqual(
+            [name for _, _, files in os.walk(self.media_root) for name in files], []
+        )
+
+
+class ReceiptEndpointTests(MediaRootMixin, PaymentFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.payment = self.create_payment()
+        self.url = f'/api/payments/{self.payment.id}/receipt/'
+
+    def current_receipt(self):
+        # El pago tal como lo lee el endpoint
+        return ensure_receipt(receipt_queryset().get(id=self.payment.id))
+
+    def test_serves_pdf_with_fingerprint_etag(self):
+        response = self.api.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        _, fingerprint = self.current_receipt()
+        self.assertEqual(response['ETag'], f'"{fingerprint}"')
+        self.assertEqual(response['Cache-Control'], 'private, no-cache')
+
+    def test_matching_etag_returns_not_modified(self):
+        etag = self.api.get(self.url)['ETag']
+
+        for header in (etag, f'W/{etag}', f'"otro", {etag}', '*'):
+            response = self.api.get(self.url, HTTP_IF_NONE_MATCH=header)
+            self.assertEqual(response.status_code, 304, header)
+            self.assertEqual(response['ETag'], etag)
+
+        response = self.api.get(self.url, HTTP_IF_NONE_MATCH='"otro"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_annulment_changes_etag_and_replaces_file(self):
+        etag = self.api.get(self.url)['ETag']
+        old_name, _ = self.current_receipt()
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, old_name)))
+
+        self.api.post(f'/api/payments/{self.payment.id}/validate_payment/', {'status': 'validated'})
+        self.api.post(f'/api/payments/{self.payment.id}/anular/', {'motivo': 'Duplicado'})
+
+        response = self.api.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, old_name)))
+
+
+class ProofTests(MediaRootMixin, PaymentFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        jobs.autodiscover()
+
+    def upload(self, color='blue', mode='RGB', filename='captura.png'):
+        buffer = io.BytesIO()
+        Image.new(mode, (2000, 1000), color).save(buffer, 'PNG')
+        return SimpleUploadedFile(filename, buffer.getvalue(), 'image/png')
+
+    def test_same_content_stored_once(self):
+        first, first_hash = store_proof(self.upload())
+        second, second_hash = store_proof(self.upload(filename='otra.png'))
+        third, _ = store_proof(self.upload(color='red'))
+
+        self.assertEqual((first, first_hash), (second, second_hash))
+        self.assertNotEqual(first, third)
+        self.assertTrue(first.endswith(f'{first_hash}.png'))
+        # Sin temporales huérfanos
+        self.assertEqual(os.listdir(os.path.join(self.media_root, 'payments/originals/tmp')), [])
+
+    def test_job_renders_bounded_variants(self):
+        payment = self.create_payment()
+        Payment.objects.filter(id=payment.id).update(**proof_fields(self.upload(mode='RGBA', color=(0, 0, 255, 0))))
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue_proof(payment.id)
+
+        jobs.run_job(jobs.claim_next(['process_proof']))
+        payment.refresh_from_db()
+        self.assertEqual(payment.proof_status, 'ready')
+
+        for field, size in ((payment.proof_display, 1280), (payment.proof_thumbnail, 240)):
+            with Image.open(field.path) as image:
+                self.assertEqual(image.format, 'JPEG')
+                self.assertEqual(max(image.size), size)
+                # La transparencia se compone sobre blanco
+                self.assertEqual(image.convert('RGB').getpixel((0, 0)), (255, 255, 255))
+
+    def test_requeues_ready_proofs_without_variants_on_disk(self):
+        payment = self.create_payment()
+        Payment.objects.filter(id=payment.id).update(**proof_fields(self.upload()))
+        payment.refresh_from_db()
+        display, thumbnail = render_variants(payment)
+        Payment.objects.filter(id=payment.id).update(
+            proof_status='ready', proof_display=display, proof_thumbnail=thumbnail
+        )
+        # Versiones escritas en otro disco
+        os.remove(os.path.join(self.media_root, thumbnail))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_proofs', '--check-ready', stdout=io.StringIO())
+        payment.refresh_from_db()
+        self.assertEqual(payment.proof_status, 'pending')
+
+        jobs.run_job(jobs.claim_next(['process_proof']))
+        payment.refresh_from_db()
+        self.assertEqual(payment.proof_status, 'ready')
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, thumbnail)))
+
+        # Con todo en disco no se encola nada
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_proofs', '--check-ready', stdout=io.StringIO())
+        self.assertFalse(Job.objects.filter(kind='process_proof', status='queued').exists())
+
+    def test_reuses_variants_of_processed_duplicate(self):
+        payment = self.create_payment()
+        Payment.objects.filter(id=payment.id).update(**proof_fields(self.upload()))
+        payment.refresh_from_db()
+        display, thumbnail = render_variants(payment)
+        Payment.objects.filter(id=payment.id).update(
+            proof_status='ready', proof_display=display, proof_thumbnail=thumbnail
+        )
+
+        values = proof_fields(self.upload(filename='reenviada.png'))
+        self.assertEqual(values['proof_status'], 'ready')
+        self.assertEqual((values['proof_display'], values['proof_thumbnail']), (display, thumbnail))
+
+
+class PrintReceiptsTests(PaymentFixtureMixin, TestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cobrador = User.objects.create_user('cobrador', password='x', role='cobrador', sede=self.sede)
+        self.create_payment()
+        Payment.objects.create(
+            client=self.client_obj, amount=Decimal('20'), method='efectivo', registered_by=self.cobrador
+        )
+
+    def get(self, params=None):
+        return self.api.get('/api/payments/receipts/', params or {})
+
+    def test_prints_day_in_one_pdf(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['X-Receipt-Count'], '2')
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+    def test_filters(self):
+        self.assertEqual(self.get({'cobrador': self.cobrador.id})['X-Receipt-Count'], '1')
+        self.assertEqual(self.get({'sede': self.sede.id})['X-Receipt-Count'], '2')
+        self.assertEqual(self.get({'date': '2020-01-01'})['X-Receipt-Count'], '0')
+
+    def test_rejects_invalid_filters(self):
+        for params in ({'sede': 'abc'}, {'cobrador': '1x'}, {'date': '18/10/2026'}):
+            self.assertEqual(self.get(params).status_code, 400, params)
+
+    def test_only_office_and_admin(self):
+        self.api.force_authenticate(self.cobrador)
+        self.assertEqual(self.get().status_code, 403)
+
+
+class ExpireOverdueFeesTests(PaymentFixtureMixin, TestCase):
+
+    def test_expires_fees_generated_late_for_a_past_month(self):
+        today = datetime.date(2026, 4, 1)
+        expire_overdue_fees(today=today)
+
+        # Febrero se genera después de la corrida anterior
+        month_date, due_date = month_dates(2026, 2)
+        generate_fees(month_date, due_date)
+        self.assertEqual(expire_overdue_fees(today=today + datetime.timedelta(days=1)), 1)
+        self.assertFalse(MonthlyFee.objects.filter(status='pending').exists())
+
+    def test_expires_fees_reopened_by_an_annulled_payment(self):
+        today = datetime.date(2026, 4, 1)
+        payment = self.create_payment()
+        allocate_payment(payment)
+        expire_overdue_fees(today=today)
+
+        deallocate_payment(payment)
+        # Se reabre según la fecha real; se fuerza 'pending' como al anular antes del vencimiento
+        MonthlyFee.objects.filter(id=self.fee.id).update(status='pending')
+        self.assertEqual(expire_overdue_fees(today=today + datetime.timedelta(days=1)), 1)
+
+    def test_updates_in_chunks_with_one_audit_entry(self):
+        MonthlyFee.objects.filter(id=self.fee.id).update(status='pending')
+        for month in range(2, 6):
+            MonthlyFee.objects.create(
+                client=self.client_obj, service=self.service, month_date=datetime.date(2026, month, 1),
+                due_date=datetime.date(2026, month, 15), amount=Decimal('50'), status='pending',
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            expired = expire_overdue_fees(today=datetime.date(2026, 5, 1), chunk_size=2)
+
+        # Enero a abril vencidas en dos lotes; mayo aún no vence
+        self.assertEqual(expired, 4)
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE "payments_monthlyfee"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(MonthlyFee.objects.get(month_date=datetime.date(2026, 5, 1)).status, 'pending')
+
+        audit = Auditoria.objects.get(detalle__proceso='expire_overdue_fees')
+        self.assertEqual(audit.detalle['vencidas'], 4)
+        self.assertEqual(audit.detalle['vencimiento_antes_de'], '2026-05-01')
+
+    def test_dry_run_only_counts(self):
+        MonthlyFee.objects.filter(id=self.fee.id).update(status='pending')
+        self.assertEqual(expire_overdue_fees(today=datetime.date(2026, 4, 1), dry_run=True), 1)
+        self.fee.refresh_from_db()
+        self.assertEqual(self.fee.status, 'pending')
+        self.assertFalse(Auditoria.objects.filter(detalle__proceso='expire_overdue_fees').exists())
+
+
+class GenerateEndpointTests(PaymentFixtureMixin, TestCase):
+
+    def test_rejects_out_of_range_month_and_year(self):
+        for params in ({'month': 13, 'year': 2026}, {'month': 0, 'year': 2026}, {'month': 5, 'year': 99999}):
+            response = self.api.post('/api/monthly-fees/generate/', params)
+            self.assertEqual(response.status_code, 400, params)
+        self.assertFalse(Job.objects.exists())
+
+    def test_queues_valid_month(self):
+        response = self.api.post('/api/monthly-fees/generate/', {'month': 5, 'year': 2026})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Job.objects.get().params['month'], 5)
+
+    def test_all_sedes_and_single_sede_runs_exclude_each_other(self):
+        response = self.api.post('/api/monthly-fees/generate/', {'month': 5, 'year': 2026})
+        self.assertEqual(response.status_code, 202)
+
+        response = self.api.post('/api/monthly-fees/generate/', {'month': 5, 'year': 2026, 'sede': self.sede.id})
+        self.assertEqual(response.status_code, 409)
+
+        # Otro mes no está bloqueado
+        response = self.api.post('/api/monthly-fees/generate/', {'month': 6, 'year': 2026, 'sede': self.sede.id})
+        self.assertEqual(response.status_code, 202)
+
+
+class PriceResolverTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        department = Department.objects.create(name='Dep', code='01')
+        province = Province.objects.create(name='Prov', code='0101', department=department)
+        district = District.objects.create(name='Dist', code='010101', province=province)
+        self.zona = Caserio.objects.create(name='Caserío', code='C1', district=district)
+        self.resolver = PriceResolver()
+
+    def add_price(self, precio, desde, hasta=None, tipo_servicio='internet', activo=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ConfigPreciosZona.objects.create(
+                zona=self.zona, tipo_servicio=tipo_servicio, precio_base=Decimal(precio),
+                vigencia_desde=desde, vigencia_hasta=hasta, activo=activo,
+            )
+
+    def test_resolves_price_in_force(self):
+        self.add_price('40', datetime.date(2025, 1, 1), datetime.date(2025, 12, 31))
+        self.add_price('50', datetime.date(2026, 1, 1))
+        self.add_price('99', datetime.date(2020, 1, 1), activo=False)
+
+        price_for = self.resolver.price_for
+        self.assertIsNone(price_for(self.zona.id, 'internet', datetime.date(2024, 6, 1)))
+        self.assertEqual(price_for(self.zona.id, 'internet', datetime.date(2025, 6, 1)), Decimal('40'))
+        self.assertEqual(price_for(self.zona.id, 'internet', datetime.date(2026, 6, 1)), Decimal('50'))
+        self.assertIsNone(price_for(self.zona.id, 'cable', datetime.date(2026, 6, 1)))
+        self.assertIsNone(price_for(None, 'internet'))
+
+    def test_overlap_prefers_latest_start_still_in_force(self):
+        self.add_price('40', datetime.date(2025, 1, 1))
+        self.add_price('45', datetime.date(2025, 6, 1), datetime.date(2025, 8, 31))
+
+        price_for = self.resolver.price_for
+        self.assertEqual(price_for(self.zona.id, 'internet', datetime.date(2025, 7, 1)), Decimal('45'))
+        # Vencida la superpuesta vuelve a regir la anterior
+        self.assertEqual(price_for(self.zona.id, 'internet', datetime.date(2025, 10, 1)), Decimal('40'))
+
+    def test_change_invalidates_loaded_index(self):
+        config = self.add_price('40', datetime.date(2025, 1, 1))
+        date = datetime.date(2026, 1, 1)
+        self.assertEqual(self.resolver.price_for(self.zona.id, 'internet', date), Decimal('40'))
+
+        # Otro proceso ve el cambio por la versión compartida
+        with self.captureOnCommitCallbacks(execute=True):
+            config.precio_base = Decimal('60')
+            config.save()
+        self.resolver._checked_at = 0.0
+        self.assertEqual(self.resolver.price_for(self.zona.id, 'internet', date), Decimal('60'))
@@ -1,67 +1,104 @@
-import io
+from functools import lru_cache
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from django.utils import timezone
 
-def generate_payment_receipt(payment):
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter)
-    elements = []
+
+@lru_cache(maxsize=1)
+def receipt_styles():
+    """
+    Estilos del comprobante. Se construyen una sola vez por proceso: son
+    de solo lectura y se comparten entre todos los comprobantes.
+    """
     styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle('ReceiptTitle', parent=styles['Heading1'], alignment=1),  # Centrado
+        'normal': styles['Normal'],
+        'client': TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+            ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
+        ]),
+        'payment': TableStyle([
+            ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
+            ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ]),
+    }
+
+
+def receipt_elements(payment, generated_at=None):
+    """
+    Contenido de un comprobante. Usa payment.client, client.caserio y
+    payment.service: conviene traer el pago con select_related.
+    """
+    styles = receipt_styles()
+    client = payment.client
+    elements = []
 
     # Title
-    title_style = styles['Heading1']
-    title_style.alignment = 1  # Center
-    elements.append(Paragraph("Comprobante de Pago - MIRAMAX", title_style))
+    title = "Comprobante de Pago - MIRAMAX"
+    if payment.fecha_anulacion:
+        title += " (ANULADO)"
+    elements.append(Paragraph(title, styles['title']))
     elements.append(Spacer(1, 20))
 
     # Client Info
     client_info = [
-        ["Cliente:", f"{payment.client.name} ({payment.client.code})"],
-        ["DNI:", payment.client.dni],
-        ["Dirección:", payment.client.address],
-        ["Zona:", payment.client.caserio.name if payment.client.caserio else "-"],
+        ["Cliente:", f"{client.name} ({client.code})"],
+        ["DNI:", client.dni],
+        ["Dirección:", client.address],
+        ["Zona:", client.caserio.name if client.caserio else "-"],
     ]
-    
     t_client = Table(client_info, colWidths=[100, 300])
-    t_client.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ('TEXTCOLOR', (0, 0), (0, -1), colors.grey),
-    ]))
+    t_client.setStyle(styles['client'])
     elements.append(t_client)
     elements.append(Spacer(1, 20))
 
     # Payment Details
     data = [
-        ["Fecha:", payment.date.strftime("%d/%m/%Y")],
+        ["Recibo Nro:", str(payment.id)],
+        ["Fecha:", timezone.localtime(payment.date).strftime("%d/%m/%Y")],
         ["Monto:", f"S/ {payment.amount}"],
         ["Método:", payment.get_method_display()],
         ["Referencia:", payment.reference_number or "-"],
-        ["Servicio:", payment.monthly_fee.service.service_type.upper() if payment.monthly_fee else "Pago General"],
-        ["Mes Pagado:", payment.monthly_fee.month.strftime("%B %Y") if payment.monthly_fee else "-"],
+        ["Servicio:", payment.service.get_service_type_display().upper() if payment.service else "Pago General"],
     ]
-
     t = Table(data, colWidths=[100, 300])
-    t.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.lightgrey),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
+    t.setStyle(styles['payment'])
     elements.append(t)
     elements.append(Spacer(1, 30))
 
     # Footer
-    footer_text = f"Generado el: {timezone.now().strftime('%d/%m/%Y %H:%M:%S')}"
-    elements.append(Paragraph(footer_text, styles['Normal']))
+    generated_at = generated_at or timezone.localtime()
+    elements.append(Paragraph(f"Generado el: {generated_at.strftime('%d/%m/%Y %H:%M:%S')}", styles['normal']))
+    return elements
+
 
+def write_receipts(payments, fileobj):
+    """
+    Escribe varios comprobantes (uno por página) en un solo PDF.
+    Retorna la cantidad de comprobantes.
+    """
+    doc = SimpleDocTemplate(fileobj, pagesize=letter, title="Comprobantes de Pago - MIRAMAX")
+    generated_at = timezone.localtime()
+    elements = []
+    count = 0
+    for payment in payments:
+        if count:
+            elements.append(PageBreak())
+        elements.extend(receipt_elements(payment, generated_at))
+        count += 1
+
+    if not count:
+        elements.append(Paragraph("No hay pagos para los filtros indicados.", receipt_styles()['normal']))
     doc.build(elements)
-    buffer.seek(0)
-    return buffer
+    return count
+
@@ -2,11 +2,19 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.utils import timezone
-from django.http import FileResponse
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+from django.utils.dateparse import parse_date
 from .models import Payment, MonthlyFee, Service, ConfigPreciosZona
 from .serializers import PaymentSerializer, MonthlyFeeSerializer, ServiceSerializer, ConfigPreciosZonaSerializer
-from .utils import generate_payment_receipt
+from .receipts import (
+    batch_queryset, ensure_receipt, mark_receipt, receipt_url, write_batch_file
+)
+from .allocation import allocate_payment, deallocate_payment
+from reports.rollups import apply_payment
+from core import storage
 
 class ServiceViewSet(viewsets.ModelViewSet):
     queryset = Service.objects.all()
@@ -49,22 +57,52 @@ class PaymentViewSet(viewsets.ModelViewSet):
         # Si no es admin, filtrar por sede asignada
         if user.role != 'admin' and user.sede:
             queryset = queryset.filter(client__sede=user.sede)
+
+        if self.action == 'receipt':
+            # Lo que se imprime en el comprobante, en la misma consulta
+            queryset = queryset.select_related('client__caserio', 'service')
             
+        return queryset
+
+    @action(detail=True, methods=['patch', 'post'])
+    def validate_payment(self, request, pk=None):
         """
         Validar o rechazar un pago.
         Solo Oficina puede validar.
+        Al validar, el monto se aplica a las deudas abiertas del cliente.
         """
         payment = self.get_object()
         new_status = request.data.get('status')
         
+        # Un pago anulado ya revirtió sus deudas y su recaudación: no se vuelve a validar
+        if payment.fecha_anulacion:
+            return Response(
+                {'error': 'Este pago fue anulado y no puede validarse ni rechazarse'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         if new_status in ['validated', 'rejected']:
+            was_validated = payment.validation_status == 'validated'
             payment.validation_status = new_status
             payment.validated_by = request.user
             
             if new_status == 'rejected':
                 payment.rejection_reason = request.data.get('reason', '')
             
-            payment.save()
+            with transaction.atomic():
+                payment.save()
+                
+                # Aplicar (o revertir) el pago sobre las deudas del cliente
+                if new_status == 'validated':
+                    allocate_payment(payment)
+                else:
+                    deallocate_payment(payment)
+                
+                # Mantener la recaudación diaria
+                if new_status == 'validated' and not was_validated:
+                    apply_payment(payment)
+                elif new_status == 'rejected' and was_validated:
+                    apply_payment(payment, sign=-1)
             
             # Registrar en auditoría
             from core.models import Auditoria
@@ -86,6 +124,70 @@ class PaymentViewSet(viewsets.ModelViewSet):
         
         return Response({'error': 'Invalid status'}, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=True, methods=['get'])
+    def receipt(self, request, pk=None):
+        """
+        Comprobante del pago en PDF. Se dibuja solo si cambió desde la
+        última vez (ver payments.receipts); el ETag es la huella del
+        comprobante, así que un If-None-Match vigente responde 304 sin
+        leer el archivo.
+        """
+        payment = self.get_object()
+        name, fingerprint = ensure_receipt(payment)
+        etag = quote_etag(fingerprint)
+        if payment.receipt_status != 'ready':
+            mark_receipt(payment.id, 'ready', receipt_url(payment.id))
+
+        # If-None-Match usa comparación débil: W/"x" equivale a "x"
+        client_etags = parse_etags(request.headers.get('If-None-Match', ''))
+        if '*' in client_etags or etag in client_etags or f'W/{etag}' in client_etags:
+            response = HttpResponseNotModified()
+        else:
+            response = storage.serve_file(
+                request, name, content_type='application/pdf', filename=f"comprobante_{payment.id}.pdf", etag=etag
+            )
+        response['ETag'] = etag
+        # El navegador guarda el PDF pero revalida en cada pedido
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    @action(detail=False, methods=['get'], url_path='receipts')
+    def print_receipts(self, request):
+        """
+        Comprobantes del día en un solo PDF (una página por pago) para
+        imprimir en lote. Filtros: ?date=YYYY-MM-DD (por defecto hoy),
+        ?sede=, ?cobrador= (quien registró el pago).
+        Solo Oficina y Admin.
+        """
+        if request.user.role not in ['admin', 'oficina']:
+            return Response({"error": "No autorizado"}, status=status.HTTP_403_FORBIDDEN)
+
+        day = request.query_params.get('date')
+        if day:
+            day = parse_date(day)
+            if day is None:
+                return Response({"error": "Fecha inválida, use YYYY-MM-DD"}, status=status.HTTP_400_BAD_REQUEST)
+
+        filters = {}
+        for param in ('sede', 'cobrador'):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    filters[f'{param}_id'] = int(value)
+                except ValueError:
+                    return Response({"error": f"{param} debe ser un ID numérico"}, status=status.HTTP_400_BAD_REQUEST)
+
+        payments = batch_queryset(self.get_queryset(), day, **filters)
+        pdf, count = write_batch_file(payments)
+        response = FileResponse(
+            pdf,
+            as_attachment=True,
+            filename=f"comprobantes_{day or timezone.localdate()}.pdf",
+            content_type='application/pdf',
+        )
+        response['X-Receipt-Count'] = str(count)
+        return response
+
     @action(detail=True, methods=['post'])
     def anular(self, request, pk=None):
         """
@@ -125,11 +227,18 @@ class PaymentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        was_validated = payment.validation_status == 'validated'
         payment.motivo_anulacion = motivo
         payment.anulado_por = user
         payment.fecha_anulacion = timezone.now()
         payment.validation_status = 'rejected'  # Marcar como rechazado
-        payment.save()
+        
+        with transaction.atomic():
+            payment.save()
+            # Reabrir las deudas que este pago había cubierto
+            deallocate_payment(payment)
+            if was_validated:
+                apply_payment(payment, sign=-1)
         
         # Registrar en auditoría
         from core.models import Auditoria
@@ -183,15 +292,46 @@ class MonthlyFeeViewSet(viewsets.ModelViewSet):
     def generate(self, request):
         """
         Endpoint para disparar la generación manual de deudas.
-        Solo Admin/Oficina.
+        Solo Admin/Oficina. Retorna el id de la tarea; el avance se consulta
+        en /api/jobs/<id>/.
         """
         if request.user.role not in ['admin', 'oficina']:
             return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
             
-        from django.core.management import call_command
+        from core.jobs import enqueue, JobLocked
+        from .jobs import generation_lock_key
+        
+        now = timezone.now()
+        try:
+            month = int(request.data.get('month', now.month))
+            year = int(request.data.get('year', now.year))
+            sede_id = int(request.data['sede']) if request.data.get('sede') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'Parámetros inválidos'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if not 1 <= month <= 12:
+            return Response({'error': 'El mes debe estar entre 1 y 12'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 2000 <= year <= now.year + 1:
+            return Response(
+                {'error': f'El año debe estar entre 2000 y {now.year + 1}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Encolar la generación; el worker (run_worker) la procesa en segundo plano
         try:
-            # Llamar al comando de gestión
-            call_command('generate_monthly_fees')
-            return Response({'status': 'Proceso de generación iniciado'})
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            job = enqueue(
+                'generate_monthly_fees',
+                params={'month': month, 'year': year, 'sede': sede_id},
+                lock_key=generation_lock_key(year, month),
+                user=request.user,
+            )
+        except JobLocked as e:
+            return Response(
+                {'error': 'Ya hay una generación en curso para este mes', 'job_id': e.job.id},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        return Response(
+            {'status': 'Proceso de generación iniciado', 'job_id': job.id},
+            status=status.HTTP_202_ACCEPTED
+        )
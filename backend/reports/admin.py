@@ -1,3 +1,18 @@
 from django.contrib import admin
+from .models import CollectorDailyStats, DailyRevenueRollup, ReportExport
 
-# Register your models here.
+@admin.register(DailyRevenueRollup)
+class DailyRevenueRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'sede', 'cobrador', 'method', 'count', 'total')
+    list_filter = ('method', 'sede', 'day')
+
+@admin.register(CollectorDailyStats)
+class CollectorDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('day', 'cobrador', 'sede', 'visits_pago', 'payments_registered', 'amount_collected')
+    list_filter = ('sede', 'day')
+
+@admin.register(ReportExport)
+class ReportExportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'report', 'format', 'created_by', 'rows', 'size', 'created_at', 'expires_at')
+    list_filter = ('report', 'format')
+    raw_id_fields = ('job',)
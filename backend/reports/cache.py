@@ -0,0 +1,137 @@
+"""
+Caché de respuestas de los reportes.
+
+La llave combina el alcance del usuario (rol, sede, cobrador), el día, los
+parámetros de la consulta normalizados y la versión de datos de la sede
+(core.cache). Cualquier escritura de Client, Payment o MonthlyFee sube esa
+versión, así que una entrada vieja deja de leerse en el acto sin depender
+del TTL, que solo sirve para liberar espacio.
+"""
+import hashlib
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from rest_framework.response import Response
+from core import cache as data_version
+
+
+STATS_KEY = 'reports:cache:stats:{name}:{outcome}'
+
+# Parámetros que no cambian el resultado
+IGNORED_PARAMS = ('format',)
+
+
+def scope_sede(request):
+    """
+    Sede cuya versión de datos invalida el reporte: la del usuario si está
+    restringido a ella, la pedida con ?sede=, o ninguna (versión global).
+    """
+    user = request.user
+    if user.role != 'admin' and user.sede_id:
+        return user.sede_id
+    return request.query_params.get('sede') or None
+
+
+def cache_key(name, request):
+    user = request.user
+    params = sorted(
+        (key, sorted(values))
+        for key, values in request.query_params.lists()
+        if key not in IGNORED_PARAMS
+    )
+    digest = hashlib.sha1(urlencode(params, doseq=True).encode()).hexdigest()
+    # El día forma parte de la llave: antigüedad y rangos por defecto dependen de hoy
+    return data_version.versioned_key(
+        f'reports:{name}', scope_sede(request),
+        user.role, user.id if user.role == 'cobrador' else '', user.sede_id or '',
+        timezone.localdate().isoformat(), digest
+    )
+
+
+def _materialize(data):
+    """
+    Evalúa los querysets de la respuesta para poder guardarla en caché.
+    """
+    if isinstance(data, QuerySet):
+        return list(data)
+    if isinstance(data, dict):
+        return {key: _materialize(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [_materialize(value) for value in data]
+    return data
+
+
+def _count(name, outcome):
+    key = STATS_KEY.format(name=name, outcome=outcome)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La llave expiró entre add e incr
+        cache.set(key, 1, None)
+
+
+def cached_report(view_func):
+    """
+    Decorador para acciones de ReportsViewSet. Solo se guardan las
+    respuestas 200 en JSON; las exportaciones (?format=csv|xlsx) pasan de
+    largo. Marca la respuesta con X-Cache: HIT o MISS.
+    """
+    name = view_func.__name__
+
+    @wraps(view_func)
+    def wrapper(self, request, *args, **kwargs):
+        if request.query_params.get('format') not in (None, 'json'):
+            return view_func(self, request, *args, **kwargs)
+
+        key = cache_key(name, request)
+        data = cache.get(key)
+        if data is not None:
+            _count(name, 'hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        _count(name, 'misses')
+        response = view_func(self, request, *args, **kwargs)
+        if response.status_code == 200 and isinstance(response, Response):
+            response.data = _materialize(response.data)
+            cache.set(key, response.data, settings.REPORTS_CACHE_TTL)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
+
+
+def cache_stats(names):
+    """
+    Aciertos y fallos acumulados por reporte.
+    """
+    keys = {
+        (name, outcome): STATS_KEY.format(name=name, outcome=outcome)
+        for name in names for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(list(keys.values()))
+
+    stats = {}
+    for name in names:
+        hits = values.get(keys[(name, 'hits')], 0)
+        misses = values.get(keys[(name, 'misses')], 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else None,
+        }
+    return stats
+
+
+def reset_stats(names):
+    cache.delete_many([
+        STATS_KEY.format(name=name, outcome=outcome)
+        for name in names for outcome in ('hits', 'misses')
+    ])
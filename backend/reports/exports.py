@@ -0,0 +1,160 @@
+"""
+Exportación de reportes en CSV y XLSX sin cargar todo el resultado en memoria.
+
+Las filas se leen con queryset.iterator() y se escriben a la respuesta (CSV)
+o a un archivo temporal en modo write-only (XLSX) a medida que llegan.
+Las exportaciones en segundo plano escriben el mismo contenido a un archivo
+bajo MEDIA_ROOT/exports (CSV comprimido con gzip; XLSX ya es un zip).
+"""
+import csv
+import datetime
+import gzip
+import os
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from core import storage
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_FORMATS = ('csv', 'xlsx')
+
+EXPORT_DIR = 'exports'
+
+FILE_EXTENSIONS = {'csv': 'csv.gz', 'xlsx': 'xlsx'}
+
+
+class _ExportRenderer(BaseRenderer):
+    """
+    Permite `?format=csv|xlsx` en la negociación de DRF. Las vistas
+    responden con un HttpResponse propio; este renderer solo se usa para
+    los errores, que se devuelven como JSON.
+    """
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+
+class CSVRenderer(_ExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class XLSXRenderer(_ExportRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+
+
+class _Echo:
+    """
+    Objeto tipo archivo que devuelve lo escrito, para csv.writer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def csv_response(filename, header, rows):
+    writer = csv.writer(_Echo())
+
+    def stream():
+        # BOM para que Excel reconozca UTF-8 (tildes y ñ)
+        yield '﻿'
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def write_xlsx(fileobj, header, rows, title='Reporte'):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title)
+    sheet.append(header)
+    for row in rows:
+        sheet.append(list(row))
+    workbook.save(fileobj)
+
+
+def xlsx_response(filename, header, rows, title='Reporte'):
+    """
+    Escribe el libro en modo write-only sobre un archivo temporal y lo envía
+    por partes. Lanza ImportError si openpyxl no está instalado.
+    """
+    tmp = tempfile.TemporaryFile()
+    write_xlsx(tmp, header, rows, title)
+    tmp.seek(0)
+    return FileResponse(
+        tmp,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type=XLSXRenderer.media_type,
+    )
+
+
+def export_response(export_format, filename, header, rows, title='Reporte'):
+    if export_format == 'xlsx':
+        return xlsx_response(filename, header, rows, title)
+    return csv_response(filename, header, rows)
+
+
+def write_export_file(export_format, filename, header, rows, title='Reporte'):
+    """
+    Escribe la exportación a MEDIA_ROOT/exports (en subdirectorios de
+    core.storage) y retorna (ruta relativa a MEDIA_ROOT, tamaño en bytes).
+    Se escribe a un archivo temporal y se renombra al final, así nunca
+    queda un archivo a medias con el nombre definitivo.
+    """
+    key = uuid.uuid4().hex
+    name = storage.sharded_name(EXPORT_DIR, key, f"{filename}_{key}.{FILE_EXTENSIONS[export_format]}")
+    path = storage.media_path(name, create=True)
+    partial = f"{path}.part"
+
+    try:
+        if export_format == 'xlsx':
+            write_xlsx(partial, header, rows, title)
+        else:
+            with gzip.open(partial, 'wt', encoding='utf-8-sig', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                writer.writerows(rows)
+        storage.publish(partial, path)
+    finally:
+        if os.path.exists(partial):
+            os.remove(partial)
+
+    return name, os.path.getsize(path)
+
+
+def export_expiry():
+    return timezone.now() + datetime.timedelta(hours=settings.REPORT_EXPORT_TTL_HOURS)
+
+
+def purge_expired_exports(now=None):
+    """
+    Borra los archivos y registros de exportaciones vencidas.
+    Retorna la cantidad eliminada.
+    """
+    from .models import ReportExport
+
+    expired = ReportExport.objects.filter(expires_at__lte=now or timezone.now())
+    count = 0
+    for export in expired.iterator():
+        if export.file:
+            try:
+                os.remove(storage.media_path(export.file))
+            except FileNotFoundError:
+                pass
+        export.delete()
+        count += 1
+    return count
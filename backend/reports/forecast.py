@@ -0,0 +1,180 @@
+"""
+Pronóstico de cobranza del mes: esperado (facturado + deuda arrastrada),
+cobrado a la fecha y proyección al cierre.
+
+La proyección usa la curva histórica de cobranza de cada sede: para cada
+día del mes, qué fracción de lo cobrado en el mes ya se había cobrado a esa
+altura, promediada sobre los meses anteriores. Todo sale de tablas
+pre-agregadas (DailyRevenueRollup, ClientBalance), de las deudas del mes
+en adelante (índice por month_date) y de los pagos desde el inicio del mes,
+así que no recorre el historial de pagos ni de deudas.
+"""
+import calendar
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+from .rollups import day_start
+
+
+HISTORY_MONTHS = 6
+
+OPEN_FEE_STATUSES = ['pending', 'partial', 'expired']
+
+
+def add_months(month_date, months):
+    index = month_date.year * 12 + month_date.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def month_end(month_date):
+    return month_date.replace(day=calendar.monthrange(month_date.year, month_date.month)[1])
+
+
+def billing_by_sede(fees, balances, month_date):
+    """
+    {sede_id: (facturado del mes, deuda abierta de meses anteriores al
+    inicio del mes)}.
+
+    La deuda arrastrada es la que estaba abierta el primer día del mes: el
+    saldo abierto de ClientBalance, menos lo que sigue abierto de
+    `month_date` en adelante, más lo que los pagos desde ese día aplicaron
+    a deudas anteriores. Así cobrar deuda vieja durante el mes no achica lo
+    esperado. Solo se leen las deudas desde ese mes (índice por
+    month_date) y los pagos desde ese día, no todo el historial.
+    """
+    open_amount = ExpressionWrapper(F('amount') - F('paid_amount'), output_field=DecimalField())
+    zero = Decimal('0')
+    recent = {
+        row['client__sede_id']: row
+        for row in fees.filter(month_date__gte=month_date).values('client__sede_id').annotate(
+            billed=Coalesce(Sum('amount', filter=Q(month_date=month_date)), zero, output_field=DecimalField()),
+            still_open=Coalesce(
+                Sum(open_amount, filter=Q(status__in=OPEN_FEE_STATUSES)), zero, output_field=DecimalField()
+            ),
+        ).order_by()
+    }
+    open_balances = dict(
+        balances.values('client__sede_id').annotate(total=Sum('open_amount')).order_by()
+        .values_list('client__sede_id', 'total')
+    )
+    paid_since = dict(
+        fees.filter(
+            month_date__lt=month_date, allocations__payment__date__gte=day_start(month_date)
+        ).values('client__sede_id').annotate(total=Sum('allocations__amount')).order_by()
+        .values_list('client__sede_id', 'total')
+    )
+
+    billing = {}
+    for sede_id in set(recent) | set(open_balances) | set(paid_since):
+        row = recent.get(sede_id, {})
+        carried_over = (
+            (open_balances.get(sede_id) or zero) - row.get('still_open', zero) + (paid_since.get(sede_id) or zero)
+        )
+        billing[sede_id] = (row.get('billed', zero), max(carried_over, zero))
+    return billing
+
+
+def collection_curves(rollups, month_date, history=HISTORY_MONTHS):
+    """
+    Curva de cobranza acumulada por sede: {sede_id: [fracción al día 1..31]}
+    promediada sobre los `history` meses anteriores a `month_date`. Los
+    meses sin cobranza no cuentan.
+    """
+    start = add_months(month_date, -history)
+    rows = rollups.filter(day__gte=start, day__lt=month_date).values('sede_id', 'day').annotate(
+        total=Sum('total')
+    ).order_by()
+
+    daily = defaultdict(lambda: defaultdict(lambda: [Decimal('0')] * 31))
+    for row in rows:
+        daily[row['sede_id']][row['day'].replace(day=1)][row['day'].day - 1] += row['total']
+
+    curves = {}
+    for sede_id, months in daily.items():
+        shares = [0.0] * 31
+        counted = 0
+        for days in months.values():
+            total = sum(days)
+            if not total:
+                continue
+            counted += 1
+            running = Decimal('0')
+            for index, amount in enumerate(days):
+                running += amount
+                shares[index] += float(running / total)
+        if counted:
+            curves[sede_id] = [round(share / counted, 4) for share in shares]
+    return curves
+
+
+def project(collected, share):
+    """
+    Cierre proyectado a partir de lo cobrado y la fracción esperada a la
+    fecha. Sin curva (o muy al inicio del mes) no se proyecta más de lo
+    cobrado.
+    """
+    if not share:
+        return collected
+    return (collected / Decimal(str(share))).quantize(Decimal('0.01'))
+
+
+def month_forecast(fees, balances, rollups, month_date, today, history=HISTORY_MONTHS):
+    """
+    Pronóstico por sede y total para el mes `month_date`. `fees`,
+    `balances` (ClientBalance) y `rollups` ya vienen filtrados por el
+    alcance del usuario.
+    """
+    last_day = month_end(month_date)
+    as_of = min(max(today, month_date - datetime.timedelta(days=1)), last_day)
+    day_index = (as_of - month_date).days  # -1 si el mes aún no empieza
+
+    billing = billing_by_sede(fees, balances, month_date)
+    collected = dict(
+        rollups.filter(day__gte=month_date, day__lte=as_of).values('sede_id').annotate(
+            total=Sum('total')
+        ).order_by().values_list('sede_id', 'total')
+    )
+    curves = collection_curves(rollups, month_date, history)
+
+    zero = Decimal('0')
+    sedes = []
+    for sede_id in sorted(set(billing) | set(collected), key=lambda value: (value is None, value)):
+        billed, carried_over = billing.get(sede_id, (zero, zero))
+        expected = billed + carried_over
+        to_date = collected.get(sede_id) or zero
+        curve = curves.get(sede_id)
+
+        if as_of >= last_day:
+            projected, share = to_date, 1.0
+        else:
+            share = curve[day_index] if curve and day_index >= 0 else None
+            projected = project(to_date, share)
+
+        sedes.append({
+            'sede_id': sede_id,
+            'billed': billed,
+            'carried_over': carried_over,
+            'expected': expected,
+            'collected': to_date,
+            'expected_share_to_date': share,
+            'projected': projected,
+            'projected_rate': round(float(projected / expected), 4) if expected else None,
+        })
+
+    totals = {
+        key: sum((sede[key] for sede in sedes), zero)
+        for key in ('billed', 'carried_over', 'expected', 'collected', 'projected')
+    }
+    totals['projected_rate'] = round(float(totals['projected'] / totals['expected']), 4) if totals['expected'] else None
+
+    return {
+        'month': month_date,
+        'as_of': as_of,
+        'history_months': history,
+        'totals': totals,
+        'sedes': sedes,
+    }
@@ -0,0 +1,43 @@
+"""
+Manejadores de tareas en segundo plano de la app reports.
+"""
+from core.jobs import register
+from .exports import EXPORT_CHUNK_SIZE, FILE_EXTENSIONS, export_expiry, purge_expired_exports, write_export_file
+from .models import ReportExport
+from .queries import export_rows, export_source
+
+
+@register('report_export')
+def report_export_job(job, report):
+    export = ReportExport.objects.select_related('created_by').get(id=job.params['export_id'])
+    queryset, columns, filename = export_source(export.report, export.created_by, export.params)
+
+    total = queryset.count()
+    report(rows=0, total=total)
+
+    written = [0]
+
+    def counted(rows):
+        for row in rows:
+            yield row
+            written[0] += 1
+            if written[0] % EXPORT_CHUNK_SIZE == 0:
+                report(rows=written[0], total=total)
+
+    path, size = write_export_file(
+        export.format, filename, [header for _, header in columns],
+        counted(export_rows(queryset, columns)), title=filename
+    )
+
+    export.file = path
+    export.filename = f"{filename}.{FILE_EXTENSIONS[export.format]}"
+    export.size = size
+    export.rows = written[0]
+    export.expires_at = export_expiry()
+    export.save(update_fields=['file', 'filename', 'size', 'rows', 'expires_at'])
+    return {'rows': written[0], 'total': total, 'size': size}
+
+
+@register('purge_report_exports')
+def purge_report_exports_job(job, report):
+    return {'deleted': purge_expired_exports()}
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from core import jobs
+from reports.exports import purge_expired_exports
+
+class Command(BaseCommand):
+    help = 'Elimina los archivos y registros de exportaciones de reportes vencidas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='store_true',
+            help='Encola la limpieza para el worker (cuando este proceso no ve MEDIA_ROOT)'
+        )
+
+    def handle(self, *args, **options):
+        if options['queue']:
+            try:
+                job = jobs.enqueue('purge_report_exports', lock_key='purge_report_exports')
+            except jobs.JobLocked as e:
+                job = e.job
+            self.stdout.write(self.style.SUCCESS(f"✅ Limpieza encolada: {job}"))
+            return
+
+        count = purge_expired_exports()
+        self.stdout.write(self.style.SUCCESS(f"✅ Exportaciones eliminadas: {count}"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from reports.rollups import rebuild_collector_stats, refresh_collector_stats
+
+class Command(BaseCommand):
+    help = 'Recalcula las estadísticas diarias de cobradores (CollectorDailyStats)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Fecha inicial YYYY-MM-DD (por defecto desde la última corrida)')
+        parser.add_argument('--end', help='Fecha final YYYY-MM-DD (por defecto hoy)')
+
+    def handle(self, *args, **options):
+        start = parse_date(options['start']) if options['start'] else None
+        end = parse_date(options['end']) if options['end'] else None
+        if (options['start'] and not start) or (options['end'] and not end):
+            raise CommandError('Formato de fecha inválido, use YYYY-MM-DD')
+
+        if start:
+            end = end or timezone.localdate()
+            rows = rebuild_collector_stats(start, end)
+        else:
+            start, end, rows = refresh_collector_stats(today=end)
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Estadísticas de cobradores {start} → {end}: {rows} filas"))
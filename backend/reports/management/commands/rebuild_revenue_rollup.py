@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from reports.rollups import rebuild_revenue
+
+class Command(BaseCommand):
+    help = 'Reconstruye la tabla de recaudación diaria (DailyRevenueRollup) para un rango de fechas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start', help='Fecha inicial YYYY-MM-DD (por defecto desde el inicio)')
+        parser.add_argument('--end', help='Fecha final YYYY-MM-DD (por defecto hasta hoy)')
+
+    def handle(self, *args, **options):
+        start = parse_date(options['start']) if options['start'] else None
+        end = parse_date(options['end']) if options['end'] else None
+        if (options['start'] and not start) or (options['end'] and not end):
+            raise CommandError('Formato de fecha inválido, use YYYY-MM-DD')
+
+        self.stdout.write(f"🔄 Reconstruyendo recaudación diaria ({start or 'inicio'} → {end or 'hoy'})...")
+        rows = rebuild_revenue(start, end)
+        self.stdout.write(self.style.SUCCESS(f"✅ Filas generadas: {rows}"))
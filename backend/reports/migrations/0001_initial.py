@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_revenue(apps, schema_editor):
+    Payment = apps.get_model('payments', 'Payment')
+    DailyRevenueRollup = apps.get_model('reports', 'DailyRevenueRollup')
+
+    rows = Payment.objects.filter(validation_status='validated').annotate(day=TruncDate('date')).values(
+        'day', 'client__sede_id', 'client__cobrador_asignado_id', 'method'
+    ).annotate(payment_count=Count('id'), amount=Sum('amount')).order_by()
+
+    DailyRevenueRollup.objects.bulk_create([
+        DailyRevenueRollup(
+            day=row['day'],
+            sede_id=row['client__sede_id'],
+            cobrador_id=row['client__cobrador_asignado_id'],
+            method=row['method'],
+            count=row['payment_count'],
+            total=row['amount'],
+        )
+        for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('core', '0004_checkpoint'),
+        ('payments', '0003_clientbalance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRevenueRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('method', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cobrador', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('sede', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='core.sede')),
+            ],
+            options={
+                'verbose_name': 'Recaudación diaria',
+                'verbose_name_plural': 'Recaudación diaria',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['sede', 'day'], name='reports_dai_sede_id_efd526_idx'), models.Index(fields=['cobrador', 'day'], name='reports_dai_cobrado_174b92_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'sede', 'cobrador', 'method'), name='unique_daily_revenue')],
+            },
+        ),
+        migrations.RunPython(populate_revenue, migrations.RunPython.noop),
+    ]
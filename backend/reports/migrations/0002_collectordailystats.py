@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_checkpoint'),
+        ('reports', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectorDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('visits_pago', models.IntegerField(default=0)),
+                ('visits_no_estaba', models.IntegerField(default=0)),
+                ('visits_se_mudo', models.IntegerField(default=0)),
+                ('visits_no_responde', models.IntegerField(default=0)),
+                ('payments_registered', models.IntegerField(default=0)),
+                ('amount_collected', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cobrador', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+                ('sede', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.sede')),
+            ],
+            options={
+                'verbose_name': 'Estadística diaria de cobrador',
+                'verbose_name_plural': 'Estadísticas diarias de cobradores',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['sede', 'day'], name='reports_col_sede_id_013dc6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'cobrador'), name='unique_collector_day')],
+            },
+        ),
+    ]
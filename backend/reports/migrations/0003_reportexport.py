@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_checkpoint'),
+        ('reports', '0002_collectordailystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportExport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report', models.CharField(choices=[('debtors', 'Morosos'), ('revenue', 'Ingresos')], max_length=20)),
+                ('format', models.CharField(choices=[('csv', 'CSV (gzip)'), ('xlsx', 'Excel')], default='csv', max_length=10)),
+                ('params', models.JSONField(blank=True, default=dict)),
+                ('file', models.CharField(blank=True, max_length=255)),
+                ('filename', models.CharField(blank=True, max_length=100)),
+                ('size', models.BigIntegerField(blank=True, null=True)),
+                ('rows', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_exports', to=settings.AUTH_USER_MODEL)),
+                ('job', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='report_export', to='core.job')),
+            ],
+            options={
+                'verbose_name': 'Exportación de reporte',
+                'verbose_name_plural': 'Exportaciones de reportes',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['expires_at'], name='reports_rep_expires_d626f4_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,117 @@
 from django.db import models
+from django.conf import settings
+from django.utils import timezone
 
-# Create your models here.
+
+class DailyRevenueRollup(models.Model):
+    """
+    Recaudación validada pre-agregada por (día, sede, cobrador, método).
+
+    La sede y el cobrador son los del cliente al momento de validar el pago.
+    Se mantiene incrementalmente al validar/anular pagos (reports.rollups) y
+    se reconstruye por rango con `rebuild_revenue_rollup`. Las lecturas
+    siempre suman filas, así que un duplicado por carrera no altera totales.
+    """
+    day = models.DateField()
+    sede = models.ForeignKey('core.Sede', on_delete=models.CASCADE, null=True, blank=True)
+    cobrador = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    method = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Recaudación diaria'
+        verbose_name_plural = 'Recaudación diaria'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'sede', 'cobrador', 'method'], name='unique_daily_revenue'),
+        ]
+        indexes = [
+            models.Index(fields=['sede', 'day']),
+            models.Index(fields=['cobrador', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.method}: S/.{self.total} ({self.count})"
+
+
+class CollectorDailyStats(models.Model):
+    """
+    Efectividad diaria por cobrador: visitas por estado, pagos registrados
+    y monto validado de los pagos que registró.
+
+    Se mantiene incrementalmente (visitas y pagos nuevos, validaciones y
+    anulaciones) y se recalcula por rango con `rebuild_collector_stats`.
+    """
+    day = models.DateField()
+    cobrador = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='daily_stats')
+    sede = models.ForeignKey('core.Sede', on_delete=models.SET_NULL, null=True, blank=True)
+    visits_pago = models.IntegerField(default=0)
+    visits_no_estaba = models.IntegerField(default=0)
+    visits_se_mudo = models.IntegerField(default=0)
+    visits_no_responde = models.IntegerField(default=0)
+    payments_registered = models.IntegerField(default=0)
+    amount_collected = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Estadística diaria de cobrador'
+        verbose_name_plural = 'Estadísticas diarias de cobradores'
+        ordering = ['-day']
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'cobrador'], name='unique_collector_day'),
+        ]
+        indexes = [
+            models.Index(fields=['sede', 'day']),
+        ]
+
+    def __str__(self):
+        return f"{self.day} - {self.cobrador}"
+
+
+class ReportExport(models.Model):
+    """
+    Exportación de un reporte generada en segundo plano. El worker escribe
+    el archivo comprimido bajo MEDIA_ROOT/exports y queda disponible para
+    descarga hasta `expires_at`.
+    """
+    REPORT_CHOICES = [
+        ('debtors', 'Morosos'),
+        ('revenue', 'Ingresos'),
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV (gzip)'),
+        ('xlsx', 'Excel'),
+    ]
+
+    report = models.CharField(max_length=20, choices=REPORT_CHOICES)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    params = models.JSONField(default=dict, blank=True)
+    job = models.OneToOneField('core.Job', on_delete=models.SET_NULL, null=True, blank=True, related_name='report_export')
+    file = models.CharField(max_length=255, blank=True)  # Ruta relativa a MEDIA_ROOT
+    filename = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField(null=True, blank=True)
+    rows = models.IntegerField(null=True, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='report_exports')
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Exportación de reporte'
+        verbose_name_plural = 'Exportaciones de reportes'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_report_display()} ({self.format}) #{self.id}"
+
+    @property
+    def is_expired(self):
+        return bool(self.expires_at and self.expires_at <= timezone.now())
+
+    @property
+    def status(self):
+        if self.is_expired:
+            return 'expired'
+        return self.job.status if self.job else 'failed'
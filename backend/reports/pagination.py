@@ -0,0 +1,64 @@
+"""
+Paginación por cursor (keyset) sobre (date, id) descendente.
+
+El cursor es opaco para el cliente: codifica la fecha e id de la última fila
+entregada, y la página siguiente se pide con WHERE (date, id) < cursor, que
+usa el índice en vez de un OFFSET creciente.
+"""
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(date, pk):
+    raw = f"{date.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """
+    Retorna (date, id) o lanza ValueError si el cursor no es válido.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_str, pk = raw.split('|')
+        date = parse_datetime(date_str)
+        if date is None:
+            raise ValueError
+        return date, int(pk)
+    except (ValueError, UnicodeDecodeError, base64.binascii.Error):
+        raise ValueError('Cursor inválido')
+
+
+def page_size_param(request):
+    try:
+        size = int(request.query_params.get('page_size', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('page_size inválido')
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def keyset_page(queryset, request, fields):
+    """
+    Retorna (filas de la página, cursor siguiente o None) ordenando por
+    (-date, -id). `fields` son los campos a devolver en cada fila.
+    """
+    size = page_size_param(request)
+
+    cursor = request.query_params.get('cursor')
+    if cursor:
+        date, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(date__lt=date) | Q(date=date, id__lt=pk))
+
+    rows = list(queryset.order_by('-date', '-id').values('id', *fields)[:size + 1])
+
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        next_cursor = encode_cursor(rows[-1]['date'], rows[-1]['id'])
+    return rows, next_cursor
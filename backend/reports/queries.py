@@ -0,0 +1,117 @@
+"""
+Consultas base de los reportes, compartidas por las vistas y por las
+exportaciones en segundo plano (que no tienen request: reciben el usuario
+y los parámetros guardados).
+"""
+from datetime import datetime, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from payments.models import ClientBalance, Payment
+from .exports import EXPORT_CHUNK_SIZE
+from .models import DailyRevenueRollup
+from .rollups import day_start
+
+
+# Columnas de las exportaciones: (campo, encabezado)
+DEBTOR_COLUMNS = [
+    ('client__code', 'Código'),
+    ('client__name', 'Cliente'),
+    ('client__phone', 'Teléfono'),
+    ('client__caserio__name', 'Caserío'),
+    ('client__address', 'Dirección'),
+    ('months_owed', 'Meses adeudados'),
+    ('oldest_unpaid_month', 'Mes más antiguo'),
+    ('open_amount', 'Deuda total'),
+]
+
+TRANSACTION_COLUMNS = [
+    ('date', 'Fecha'),
+    ('client__code', 'Código'),
+    ('client__name', 'Cliente'),
+    ('method', 'Método'),
+    ('amount', 'Monto'),
+]
+
+
+def date_range(params):
+    """
+    Lee start_date/end_date (YYYY-MM-DD) de los parámetros de la consulta.
+    """
+    dates = []
+    for param in ('start_date', 'end_date'):
+        value = params.get(param)
+        parsed = parse_date(value) if value else None
+        if value and parsed is None:
+            raise ValueError(f"Fecha inválida en {param}, use YYYY-MM-DD")
+        dates.append(parsed)
+    return dates
+
+
+def debtors_queryset(user, params):
+    queryset = ClientBalance.objects.filter(open_amount__gt=0)
+
+    # Filtros de seguridad
+    if user.role != 'admin' and user.sede:
+        queryset = queryset.filter(client__sede=user.sede)
+    if user.role == 'cobrador':
+        queryset = queryset.filter(client__cobrador_asignado=user)
+
+    # Filtros opcionales
+    sede_id = params.get('sede')
+    if sede_id:
+        queryset = queryset.filter(client__sede_id=sede_id)
+
+    return queryset.order_by('-open_amount')
+
+
+def revenue_querysets(user, params):
+    """
+    Retorna (pagos validados, recaudación pre-agregada) con los mismos
+    filtros. Lanza ValueError si las fechas son inválidas.
+    """
+    queryset = Payment.objects.filter(validation_status='validated')
+    rollups = DailyRevenueRollup.objects.all()
+
+    # Filtros de seguridad
+    if user.role != 'admin' and user.sede:
+        queryset = queryset.filter(client__sede=user.sede)
+        rollups = rollups.filter(sede=user.sede)
+    if user.role == 'cobrador':
+        queryset = queryset.filter(client__cobrador_asignado=user)
+        rollups = rollups.filter(cobrador=user)
+
+    # Filtros opcionales
+    sede_id = params.get('sede')
+    if sede_id:
+        queryset = queryset.filter(client__sede_id=sede_id)
+        rollups = rollups.filter(sede_id=sede_id)
+
+    start_date, end_date = date_range(params)
+    if start_date:
+        queryset = queryset.filter(date__gte=day_start(start_date))
+        rollups = rollups.filter(day__gte=start_date)
+    if end_date:
+        queryset = queryset.filter(date__lt=day_start(end_date + timedelta(days=1)))
+        rollups = rollups.filter(day__lte=end_date)
+
+    return queryset, rollups
+
+
+def export_rows(queryset, columns):
+    fields = [field for field, _ in columns]
+    for row in queryset.values_list(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        yield [timezone.localtime(value).replace(tzinfo=None, microsecond=0) if isinstance(value, datetime) else value for value in row]
+
+
+def export_source(report, user, params):
+    """
+    (queryset, columnas, nombre de archivo) de un reporte exportable.
+    """
+    if report == 'debtors':
+        return debtors_queryset(user, params), DEBTOR_COLUMNS, 'morosos'
+    if report == 'revenue':
+        queryset, _ = revenue_querysets(user, params)
+        return queryset.order_by('-date', '-id'), TRANSACTION_COLUMNS, 'ingresos'
+    raise ValueError(f"Reporte no exportable: {report}")
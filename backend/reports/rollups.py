@@ -0,0 +1,197 @@
+"""
+Mantenimiento de las tablas de resumen de reportes.
+"""
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core import cache as data_version
+from core.models import Visit
+from payments.models import Payment
+from .models import CollectorDailyStats, DailyRevenueRollup
+
+
+def day_start(day):
+    """
+    Inicio (00:00 hora local) de un día, para filtrar DateTimeFields por
+    rango sin convertir la columna.
+    """
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def _add(model, key, defaults=None, **deltas):
+    """
+    Suma `deltas` a la fila `key` de una tabla de resumen, creándola (con
+    `defaults`) si no existe. Soporta la carrera de dos procesos creando la
+    misma fila.
+    """
+    increments = {field: F(field) + delta for field, delta in deltas.items()}
+
+    with transaction.atomic():
+        if model.objects.filter(**key).update(**increments):
+            return
+        try:
+            with transaction.atomic():
+                model.objects.create(**key, **(defaults or {}), **deltas)
+        except IntegrityError:
+            # Otro proceso creó la fila entre el UPDATE y el INSERT
+            model.objects.filter(**key).update(**increments)
+
+
+def _add_collector(user_id, day, **deltas):
+    from users.models import User
+
+    _add(
+        CollectorDailyStats,
+        {'day': day, 'cobrador_id': user_id},
+        defaults={'sede_id': User.objects.filter(id=user_id).values_list('sede_id', flat=True).first()},
+        **deltas
+    )
+
+
+def apply_payment(payment, sign=1):
+    """
+    Suma (sign=1) o resta (sign=-1) un pago validado en la recaudación diaria
+    y en el monto cobrado por quien lo registró.
+    """
+    client = payment.client
+    day = timezone.localdate(payment.date)
+    amount = payment.amount * sign
+
+    _add(
+        DailyRevenueRollup,
+        {
+            'day': day,
+            'sede_id': client.sede_id,
+            'cobrador_id': client.cobrador_asignado_id,
+            'method': payment.method,
+        },
+        count=sign,
+        total=amount,
+    )
+    if payment.registered_by_id:
+        _add_collector(payment.registered_by_id, day, amount_collected=amount)
+
+
+def record_visit(visit):
+    """
+    Cuenta una visita nueva en las estadísticas del cobrador.
+    """
+    day = timezone.localdate(visit.fecha)
+    _add_collector(visit.cobrador_id, day, **{f'visits_{visit.estado}': 1})
+
+
+def record_registered_payment(payment):
+    """
+    Cuenta un pago nuevo en las estadísticas de quien lo registró.
+    """
+    if payment.registered_by_id:
+        day = timezone.localdate(payment.date)
+        _add_collector(payment.registered_by_id, day, payments_registered=1)
+
+
+def rebuild_revenue(start=None, end=None):
+    """
+    Reconstruye la recaudación diaria para un rango de días (inclusive)
+    agregando los pagos validados en la base de datos.
+    Retorna la cantidad de filas generadas.
+    """
+    rollups = DailyRevenueRollup.objects.all()
+    payments = Payment.objects.filter(validation_status='validated')
+    if start:
+        rollups = rollups.filter(day__gte=start)
+        payments = payments.filter(date__gte=day_start(start))
+    if end:
+        rollups = rollups.filter(day__lte=end)
+        payments = payments.filter(date__lt=day_start(end + datetime.timedelta(days=1)))
+
+    rows = payments.annotate(day=TruncDate('date')).values(
+        'day', 'client__sede_id', 'client__cobrador_asignado_id', 'method'
+    ).annotate(
+        payment_count=Count('id'),
+        amount=Sum('amount'),
+    ).order_by()
+
+    with transaction.atomic():
+        rollups.delete()
+        created = DailyRevenueRollup.objects.bulk_create([
+            DailyRevenueRollup(
+                day=row['day'],
+                sede_id=row['client__sede_id'],
+                cobrador_id=row['client__cobrador_asignado_id'],
+                method=row['method'],
+                count=row['payment_count'],
+                total=row['amount'],
+            )
+            for row in rows
+        ], batch_size=1000)
+
+    data_version.bump_all()
+    return len(created)
+
+
+def rebuild_collector_stats(start, end):
+    """
+    Recalcula las estadísticas de cobradores para un rango de días
+    (inclusive) con dos agregaciones: visitas y pagos registrados.
+    Retorna la cantidad de filas generadas.
+    """
+    from users.models import User
+
+    since = day_start(start)
+    until = day_start(end + datetime.timedelta(days=1))
+    stats = {}
+
+    def row(day, user_id):
+        return stats.setdefault((day, user_id), CollectorDailyStats(day=day, cobrador_id=user_id))
+
+    visits = Visit.objects.filter(fecha__gte=since, fecha__lt=until).annotate(
+        day=TruncDate('fecha')
+    ).values('day', 'cobrador_id', 'estado').annotate(total=Count('id')).order_by()
+    for visit in visits:
+        setattr(row(visit['day'], visit['cobrador_id']), f"visits_{visit['estado']}", visit['total'])
+
+    payments = Payment.objects.filter(
+        date__gte=since, date__lt=until, registered_by__isnull=False
+    ).annotate(day=TruncDate('date')).values('day', 'registered_by_id').annotate(
+        registered=Count('id'),
+        collected=Sum('amount', filter=Q(validation_status='validated')),
+    ).order_by()
+    for payment in payments:
+        stat = row(payment['day'], payment['registered_by_id'])
+        stat.payments_registered = payment['registered']
+        stat.amount_collected = payment['collected'] or 0
+
+    sedes = dict(User.objects.filter(id__in={user_id for _, user_id in stats}).values_list('id', 'sede_id'))
+    for (_, user_id), stat in stats.items():
+        stat.sede_id = sedes.get(user_id)
+
+    with transaction.atomic():
+        CollectorDailyStats.objects.filter(day__gte=start, day__lte=end).delete()
+        CollectorDailyStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+    data_version.bump_all()
+    return len(stats)
+
+
+def refresh_collector_stats(today=None, initial_days=90):
+    """
+    Corrida nocturna: recalcula desde el último día cerrado (Checkpoint
+    'collector_stats') hasta hoy, corrigiendo lo que el conteo incremental
+    haya perdido. La primera vez cubre los últimos `initial_days` días.
+    Retorna (inicio, fin, filas).
+    """
+    from core.models import Checkpoint
+
+    today = today or timezone.localdate()
+    checkpoint, _ = Checkpoint.objects.get_or_create(name='collector_stats')
+    start = checkpoint.mark or today - datetime.timedelta(days=initial_days)
+
+    rows = rebuild_collector_stats(start, today)
+
+    checkpoint.mark = today - datetime.timedelta(days=1)
+    checkpoint.save(update_fields=['mark', 'updated_at'])
+    return start, today, rows
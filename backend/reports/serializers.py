@@ -0,0 +1,41 @@
+from rest_framework import serializers
+from .models import ReportExport
+from .queries import date_range
+
+# Parámetros que acepta una exportación (los mismos filtros del reporte)
+EXPORT_PARAMS = ('sede', 'start_date', 'end_date')
+
+
+class ReportExportSerializer(serializers.ModelSerializer):
+    status = serializers.ReadOnlyField()
+    progress = serializers.SerializerMethodField()
+    error = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportExport
+        fields = (
+            'id', 'report', 'format', 'params', 'status', 'progress', 'error', 'job',
+            'rows', 'size', 'filename', 'created_at', 'expires_at'
+        )
+        read_only_fields = ('job', 'rows', 'size', 'filename', 'created_at', 'expires_at')
+
+    def get_progress(self, obj):
+        return obj.job.progress if obj.job else {}
+
+    def get_error(self, obj):
+        # Solo la última línea del traceback
+        if obj.job and obj.job.status == 'failed' and obj.job.error:
+            return obj.job.error.strip().splitlines()[-1]
+        return ''
+
+    def validate_params(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Debe ser un objeto')
+        unknown = set(value) - set(EXPORT_PARAMS)
+        if unknown:
+            raise serializers.ValidationError(f"Parámetros no soportados: {', '.join(sorted(unknown))}")
+        try:
+            date_range(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from core import cache as data_version
+from core.models import Visit
+from payments.models import Payment
+from .rollups import record_registered_payment, record_visit
+
+@receiver(post_save, sender=Visit)
+def count_visit(sender, instance, created, **kwargs):
+    if created:
+        record_visit(instance)
+        data_version.bump(instance.cliente.sede_id)
+
+@receiver(post_save, sender=Payment)
+def count_registered_payment(sender, instance, created, **kwargs):
+    if created:
+        record_registered_payment(instance)
@@ -1,3 +1,628 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import io
+import os
+import shutil
+import tempfile
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from core import jobs, storage
+from core.models import Caserio, Checkpoint, Client, Department, District, Job, Province, Sede, Visit
+from payments.models import ClientBalance, MonthlyFee, Payment, Service
+from users.models import User
+from .forecast import add_months, billing_by_sede
+from .models import CollectorDailyStats, DailyRevenueRollup, ReportExport
+from .queries import DEBTOR_COLUMNS, TRANSACTION_COLUMNS
+from .rollups import apply_payment, rebuild_revenue, refresh_collector_stats
+
+
+class BillingBySedeTests(TestCase):
+
+    def setUp(self):
+        self.sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.client_obj = Client.objects.create(dni='12345678', name='Cliente', address='Calle 1', sede=self.sede)
+        service = Service.objects.create(client=self.client_obj, service_type='internet', price=Decimal('50'))
+        for month, status, paid in ((1, 'expired', '0'), (2, 'partial', '20'), (3, 'pending', '0')):
+            MonthlyFee.objects.create(
+                client=self.client_obj, service=service, month_date=datetime.date(2026, month, 1),
+                due_date=datetime.date(2026, month, 15), amount=Decimal('50'), paid_amount=Decimal(paid),
+                status=status,
+            )
+
+    def test_carried_over_comes_from_balances(self):
+        # Saldo abierto 50 + 30 + 50; arrastrado a febrero solo enero
+        self.assertEqual(ClientBalance.objects.get(client=self.client_obj).open_amount, Decimal('130'))
+        billing = billing_by_sede(MonthlyFee.objects.all(), ClientBalance.objects.all(), datetime.date(2026, 2, 1))
+        self.assertEqual(billing, {self.sede.id: (Decimal('50'), Decimal('50'))})
+
+    def test_first_month_has_nothing_carried_over(self):
+        billing = billing_by_sede(MonthlyFee.objects.all(), ClientBalance.objects.all(), datetime.date(2026, 1, 1))
+        self.assertEqual(billing, {self.sede.id: (Decimal('50'), Decimal('0'))})
+
+
+class ForecastTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.oficina = User.objects.create_user('oficina', password='x', role='oficina', sede=self.sede)
+        self.client_obj = Client.objects.create(dni='12345678', name='Cliente', address='Calle 1', sede=self.sede)
+        service = Service.objects.create(client=self.client_obj, service_type='internet', price=Decimal('50'))
+        self.month_date = timezone.localdate().replace(day=1)
+        for months, status in ((-2, 'expired'), (-1, 'expired'), (0, 'pending')):
+            month_date = add_months(self.month_date, months)
+            MonthlyFee.objects.create(
+                client=self.client_obj, service=service, month_date=month_date,
+                due_date=month_date.replace(day=15), amount=Decimal('50'), status=status,
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(self.oficina)
+
+    def forecast(self):
+        response = self.api.get('/api/reports/forecast/', {'month': self.month_date.strftime('%Y-%m')})
+        self.assertEqual(response.status_code, 200)
+        return response.data['sedes'][0]
+
+    def test_paying_old_debt_mid_month_keeps_expected(self):
+        before = self.forecast()
+        self.assertEqual((before['carried_over'], before['expected']), (Decimal('100'), Decimal('150')))
+
+        payment = Payment.objects.create(
+            client=self.client_obj, amount=Decimal('100'), method='yape', registered_by=self.oficina
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post(f'/api/payments/{payment.id}/validate_payment/', {'status': 'validated'})
+        self.assertEqual(response.status_code, 200)
+        # El pago cubrió las dos deudas anteriores
+        self.assertEqual(ClientBalance.objects.get(client=self.client_obj).open_amount, Decimal('50'))
+
+        after = self.forecast()
+        self.assertEqual(after['carried_over'], Decimal('100'))
+        self.assertEqual(after['expected'], Decimal('150'))
+        self.assertEqual(after['collected'], Decimal('100'))
+        self.assertLessEqual(after['projected_rate'], 1.0)
+
+        # El comparativo de sedes mide la cobranza contra lo mismo
+        self.api.force_authenticate(User.objects.create_user('admin', password='x', role='admin'))
+        response = self.api.get('/api/reports/sede-comparison/', {'month': self.month_date.strftime('%Y-%m')})
+        sede = response.data['sedes'][0]
+        self.assertEqual((sede['carried_over'], sede['expected']), (Decimal('100'), Decimal('150')))
+        self.assertEqual(sede['collection_rate'], round(100 / 150, 4))
+
+
+class RevenueRollupTests(TestCase):
+
+    def setUp(self):
+        sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.user = User.objects.create_user('oficina', password='x', role='oficina', sede=sede)
+        self.client_obj = Client.objects.create(dni='12345678', name='Cliente', address='Calle 1', sede=sede)
+
+    def validated_payment(self, amount, method):
+        payment = Payment.objects.create(
+            client=self.client_obj, amount=Decimal(amount), method=method,
+            registered_by=self.user, validation_status='validated',
+        )
+        apply_payment(payment)
+        return payment
+
+    def totals(self):
+        return sorted(
+            DailyRevenueRollup.objects.values('day', 'sede_id', 'method').annotate(
+                count=Sum('count'), total=Sum('total')
+            ).filter(count__gt=0).values_list('day', 'sede_id', 'method', 'count', 'total')
+        )
+
+    def test_incremental_matches_rebuild(self):
+        self.validated_payment('50', 'yape')
+        self.validated_payment('20', 'yape')
+        annulled = self.validated_payment('30', 'efectivo')
+        Payment.objects.filter(id=annulled.id).update(validation_status='rejected')
+        apply_payment(annulled, sign=-1)
+
+        incremental = self.totals()
+        self.assertEqual(incremental, [(timezone.localdate(annulled.date), self.client_obj.sede_id, 'yape', 2, Decimal('70'))])
+
+        self.assertEqual(rebuild_revenue(), 1)
+        self.assertEqual(self.totals(), incremental)
+
+
+class ReportCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        other_sede = Sede.objects.create(nombre='Sur', direccion='Av. 2')
+        self.oficina = User.objects.create_user('oficina', password='x', role='oficina', sede=self.sede)
+        self.other = User.objects.create_user('oficina2', password='x', role='oficina', sede=other_sede)
+        client = Client.objects.create(dni='12345678', name='Cliente', address='Calle 1', sede=self.sede)
+        service = Service.objects.create(client=client, service_type='internet', price=Decimal('50'))
+        self.fee = MonthlyFee.objects.create(
+            client=client, service=service, month_date=datetime.date(2026, 1, 1),
+            due_date=datetime.date(2026, 1, 15), amount=Decimal('50'), status='expired',
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.oficina)
+
+    def get(self, params=None):
+        return self.api.get('/api/reports/debtors/', params or {})
+
+    def test_second_request_is_a_hit(self):
+        first = self.get()
+        self.assertEqual(first['X-Cache'], 'MISS')
+        second = self.get()
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+        # Otros parámetros son otra entrada
+        self.assertEqual(self.get({'sede': self.sede.id})['X-Cache'], 'MISS')
+
+    def test_write_in_sede_invalidates(self):
+        self.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.fee.paid_amount = Decimal('20')
+            self.fee.status = 'partial'
+            self.fee.save()
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data[0]['total_debt'], Decimal('30'))
+
+    def test_entries_are_scoped_by_user_sede(self):
+        self.get()
+        self.api.force_authenticate(self.other)
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(list(response.data), [])
+
+    def test_exports_bypass_cache(self):
+        self.get()
+        response = self.get({'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('X-Cache'))
+
+
+class ReportExportTests(TestCase):
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        jobs.autodiscover()
+
+        sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        client = Client.objects.create(dni='12345678', name='Cliente Moroso', address='Calle 1', sede=sede)
+        service = Service.objects.create(client=client, service_type='internet', price=Decimal('50'))
+        MonthlyFee.objects.create(
+            client=client, service=service, month_date=datetime.date(2026, 1, 1),
+            due_date=datetime.date(2026, 1, 15), amount=Decimal('50'), status='expired',
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user('admin', password='x', role='admin'))
+
+    def run_queued(self, kind):
+        jobs.run_job(jobs.claim_next([kind]))
+
+    def test_worker_writes_file_served_by_web(self):
+        response = self.api.post('/api/report-exports/', {'report': 'debtors', 'format': 'csv'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        export_id = response.data['id']
+
+        self.assertEqual(self.api.get(f'/api/report-exports/{export_id}/download/').status_code, 409)
+        self.run_queued('report_export')
+
+        response = self.api.get(f'/api/report-exports/{export_id}/download/')
+        self.assertEqual(response.status_code, 200)
+        content = gzip.decompress(b''.join(response.streaming_content)).decode('utf-8-sig')
+        self.assertIn('Cliente Moroso', content)
+
+    def test_purge_can_be_queued_for_the_worker(self):
+        self.api.post('/api/report-exports/', {'report': 'debtors', 'format': 'csv'}, format='json')
+        self.run_queued('report_export')
+        export = ReportExport.objects.get()
+        path = storage.media_path(export.file)
+        self.assertTrue(os.path.exists(path))
+        ReportExport.objects.filter(id=export.id).update(expires_at=timezone.now())
+
+        call_command('purge_report_exports', '--queue', stdout=io.StringIO())
+        call_command('purge_report_exports', '--queue', stdout=io.StringIO())
+        self.assertEqual(Job.objects.filter(kind='purge_report_exports').count(), 1)
+        self.assertTrue(os.path.exists(path))
+
+        self.run_queued('purge_report_exports')
+        self.assertFalse(os.path.exists(path))
+        self.assertFalse(ReportExport.objects.exists())
+
+
+class ReportFormatExportTests(TestCase):
+
+    def setUp(self):
+        sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        user = User.objects.create_user('oficina', password='x', role='oficina', sede=sede)
+        self.client_obj = Client.objects.create(dni='12345678', name='Cliente Ñandú', address='Calle 1', sede=sede)
+        service = Service.objects.create(client=self.client_obj, service_type='internet', price=Decimal('50'))
+        MonthlyFee.objects.create(
+            client=self.client_obj, service=service, month_date=datetime.date(2026, 1, 1),
+            due_date=datetime.date(2026, 1, 15), amount=Decimal('50'), status='expired',
+        )
+        for amount in ('30', '20'):
+            Payment.objects.create(
+                client=self.client_obj, amount=Decimal(amount), method='yape',
+                registered_by=user, validation_status='validated',
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(user)
+
+    def download(self, report, export_format):
+        response = self.api.get(f'/api/reports/{report}/', {'format': export_format})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_debtors_csv(self):
+        content = self.download('debtors', 'csv').decode('utf-8')
+        # BOM para Excel
+        self.assertTrue(content.startswith('﻿'))
+        rows = list(csv.reader(io.StringIO(content.lstrip('﻿'))))
+        self.assertEqual(rows[0], [header for _, header in DEBTOR_COLUMNS])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1], 'Cliente Ñandú')
+        self.assertEqual(Decimal(rows[1][-1]), Decimal('50'))
+
+    def test_revenue_xlsx(self):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(io.BytesIO(self.download('revenue', 'xlsx')), read_only=True)
+        rows = list(workbook.active.iter_rows(values_only=True))
+        self.assertEqual(list(rows[0]), [header for _, header in TRANSACTION_COLUMNS])
+        # Más reciente primero, fechas sin zona horaria
+        self.assertEqual([row[4] for row in rows[1:]], [20, 30])
+        self.assertIsInstance(rows[1][0], datetime.datetime)
+        self.assertEqual(rows[1][2], 'Cliente Ñandú')
+
+    def test_unknown_format_is_rejected(self):
+        response = self.api.get('/api/reports/debtors/', {'format': 'pdf'})
+        self.assertEqual(response.status_code, 404)
+
+
+class RevenuePaginationTests(TestCase):
+
+    def setUp(self):
+        sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        user = User.objects.create_user('oficina', password='x', role='oficina', sede=sede)
+        client = Client.objects.create(dni='12345678', name='Cliente', address='Calle 1', sede=sede)
+        payments = [
+            Payment.objects.create(
+                client=client, amount=Decimal('10'), method='yape', registered_by=user, validation_status='validated',
+            )
+            for _ in range(5)
+        ]
+        # Tres pagos con la misma fecha: el id desempata
+        same = timezone.now().replace(microsecond=0)
+        Payment.objects.filter(id__in=[p.id for p in payments[1:4]]).update(date=same)
+        Payment.objects.filter(id=payments[0].id).update(date=same - datetime.timedelta(days=1))
+        Payment.objects.filter(id=payments[4].id).update(date=same + datetime.timedelta(days=1))
+        self.expected = [payments[4].id, payments[3].id, payments[2].id, payments[1].id, payments[0].id]
+        self.api = APIClient()
+        self.api.force_authenticate(user)
+
+    def get(self, params):
+        response = self.api.get('/api/reports/revenue/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_cursor_walks_every_payment_once(self):
+        ids, params, pages = [], {'page_size': 2}, 0
+        while True:
+            data = self.get(params)
+            ids += [row['id'] for row in data['transactions']]
+            pages += 1
+            if not data['next_cursor']:
+                break
+            params = {'page_size': 2, 'cursor': data['next_cursor']}
+        self.assertEqual(ids, self.expected)
+        self.assertEqual(pages, 3)
+
+    def test_last_full_page_has_no_cursor(self):
+        data = self.get({'page_size': 5})
+        self.assertEqual(len(data['transactions']), 5)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_invalid_parameters(self):
+        for params in ({'cursor': 'no-es-un-cursor'}, {'page_size': 'diez'}):
+            response = self.api.get('/api/reports/revenue/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+class AgingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.cobrador = User.objects.create_user('cobrador', password='x', role='cobrador', sede=sede)
+        self.old = Client.objects.create(
+            dni='12345678', name='Antiguo', address='Calle 1', sede=sede, cobrador_asignado=self.cobrador
+        )
+        self.recent = Client.objects.create(dni='87654321', name='Reciente', address='Calle 2', sede=sede)
+        today = timezone.localdate()
+        for client, days, amount, paid in (
+            (self.old, 10, '50', '0'), (self.old, 100, '50', '20'), (self.recent, 45, '80', '0'),
+        ):
+            service = Service.objects.create(client=client, service_type='internet', price=Decimal(amount))
+            due_date = today - datetime.timedelta(days=days)
+            MonthlyFee.objects.create(
+                client=client, service=service, month_date=due_date.replace(day=1), due_date=due_date,
+                amount=Decimal(amount), paid_amount=Decimal(paid), status='expired' if paid == '0' else 'partial',
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user('admin', password='x', role='admin'))
+
+    def get(self, params=None, status=200):
+        response = self.api.get('/api/reports/aging/', params or {})
+        self.assertEqual(response.status_code, status, getattr(response, 'data', None))
+        return response.data
+
+    def test_buckets_by_client(self):
+        rows = {row['client__name']: row for row in self.get()}
+        old = rows['Antiguo']
+        self.assertEqual(
+            (old['days_0_30'], old['days_31_60'], old['days_61_90'], old['days_90_plus'], old['total_debt']),
+            (Decimal('50'), Decimal('0'), Decimal('0'), Decimal('30'), Decimal('80')),
+        )
+        self.assertEqual((old['fees'], old['clients']), (2, 1))
+        self.assertEqual(rows['Reciente']['days_31_60'], Decimal('80'))
+
+    def test_bucket_filter_and_min_amount(self):
+        rows = self.get({'bucket': 'days_90_plus'})
+        self.assertEqual([row['client__name'] for row in rows], ['Antiguo'])
+        self.assertEqual(self.get({'bucket': 'days_90_plus', 'min_amount': '31'}), [])
+
+    def test_ordering(self):
+        # Empate en total_debt: desempata el primer campo del grupo (id)
+        self.assertEqual([row['client__name'] for row in self.get()], ['Antiguo', 'Reciente'])
+        rows = self.get({'ordering': '-days_31_60'})
+        self.assertEqual([row['client__name'] for row in rows], ['Reciente', 'Antiguo'])
+        rows = self.get({'ordering': 'days_0_30'})
+        self.assertEqual([row['client__name'] for row in rows], ['Reciente', 'Antiguo'])
+
+    def test_group_by_cobrador(self):
+        rows = {row['client__cobrador_asignado__username']: row for row in self.get({'group_by': 'cobrador'})}
+        self.assertEqual(rows['cobrador']['total_debt'], Decimal('80'))
+        self.assertEqual(rows[None]['clients'], 1)
+
+    def test_invalid_parameters(self):
+        for params in (
+            {'group_by': 'sede'},
+            {'bucket': 'days_1_2'},
+            {'bucket': 'days_0_30', 'min_amount': 'mucho'},
+            {'ordering': 'client__name'},
+            {'ordering': '-id'},
+        ):
+            self.get(params, status=400)
+
+
+class CollectorStatsRefreshTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.cobrador = User.objects.create_user('cobrador', password='x', role='cobrador', sede=self.sede)
+        self.client_obj = Client.objects.create(dni='12345678', name='Cliente', address='Calle 1', sede=self.sede)
+        self.today = timezone.localdate()
+
+    def test_checkpoint_limits_each_run(self):
+        start, end, _ = refresh_collector_stats(today=self.today, initial_days=5)
+        self.assertEqual((start, end), (self.today - datetime.timedelta(days=5), self.today))
+        self.assertEqual(Checkpoint.objects.get(name='collector_stats').mark, self.today - datetime.timedelta(days=1))
+
+        # Un día ya cerrado fuera del rango no se vuelve a calcular
+        closed_day = self.today - datetime.timedelta(days=3)
+        CollectorDailyStats.objects.create(day=closed_day, cobrador=self.cobrador, sede=self.sede, visits_pago=7)
+
+        # Lo que el conteo incremental no registró se corrige en la corrida siguiente
+        Visit.objects.create(cliente=self.client_obj, cobrador=self.cobrador, estado='no_estaba')
+        Payment.objects.create(
+            client=self.client_obj, amount=Decimal('40'), method='efectivo',
+            registered_by=self.cobrador, validation_status='validated',
+        )
+        CollectorDailyStats.objects.filter(day=self.today).delete()
+
+        start, _, rows = refresh_collector_stats(today=self.today, initial_days=5)
+        self.assertEqual(start, self.today - datetime.timedelta(days=1))
+        self.assertEqual(rows, 1)
+        stat = CollectorDailyStats.objects.get(day=self.today)
+        self.assertEqual((stat.visits_no_estaba, stat.payments_registered), (1, 1))
+        self.assertEqual((stat.amount_collected, stat.sede_id), (Decimal('40'), self.sede.id))
+        self.assertEqual(CollectorDailyStats.objects.get(day=closed_day).visits_pago, 7)
+
+        api = APIClient()
+        api.force_authenticate(self.cobrador)
+        response = api.get('/api/reports/collector-stats/', {'start_date': self.today.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['visits'], 1)
+        self.assertEqual(response.data[0]['contact_rate'], 0.0)
+
+
+class RevenueSeriesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.north = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.south = Sede.objects.create(nombre='Sur', direccion='Av. 2')
+        for day, sede, method, total in (
+            (5, self.north, 'yape', '50'), (7, self.south, 'efectivo', '20'), (7, self.north, 'yape', '10'),
+        ):
+            DailyRevenueRollup.objects.create(
+                day=datetime.date(2026, 1, day), sede=sede, method=method, count=1, total=Decimal(total)
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user('admin', password='x', role='admin'))
+
+    def get(self, params, status=200):
+        response = self.api.get('/api/reports/revenue-series/', params)
+        self.assertEqual(response.status_code, status, getattr(response, 'data', None))
+        return response.data
+
+    def test_days_without_payments_are_zero(self):
+        data = self.get({'bucket': 'day', 'start_date': '2026-01-04', 'end_date': '2026-01-08'})
+        series = data['series']
+        self.assertEqual([point['period'] for point in series], [datetime.date(2026, 1, day) for day in range(4, 9)])
+        self.assertEqual([point['total'] for point in series], [0, 50, 0, 30, 0])
+        self.assertEqual([point['count'] for point in series], [0, 1, 0, 2, 0])
+        self.assertEqual(data['methods'], ['efectivo', 'yape'])
+
+        # Mismas llaves en todos los puntos
+        sede_keys = sorted([str(self.north.id), str(self.south.id)])
+        for point in series:
+            self.assertEqual(list(point['by_method']), ['efectivo', 'yape'])
+            self.assertEqual(list(point['by_sede']), sede_keys)
+        self.assertEqual(series[3]['by_method'], {'efectivo': Decimal('20'), 'yape': Decimal('10')})
+        self.assertEqual(series[3]['by_sede'][str(self.south.id)], Decimal('20'))
+
+    def test_week_and_month_buckets(self):
+        data = self.get({'bucket': 'week', 'start_date': '2026-01-01', 'end_date': '2026-01-14'})
+        self.assertEqual(
+            [(point['period'], point['total']) for point in data['series']],
+            [(datetime.date(2025, 12, 29), 0), (datetime.date(2026, 1, 5), 80), (datetime.date(2026, 1, 12), 0)],
+        )
+        data = self.get({'bucket': 'month', 'start_date': '2025-12-15', 'end_date': '2026-02-01'})
+        self.assertEqual(
+            [(point['period'], point['total']) for point in data['series']],
+            [(datetime.date(2025, 12, 1), 0), (datetime.date(2026, 1, 1), 80), (datetime.date(2026, 2, 1), 0)],
+        )
+
+    def test_sede_filter(self):
+        data = self.get({'start_date': '2026-01-07', 'end_date': '2026-01-07', 'sede': self.south.id})
+        self.assertEqual(data['series'][0]['total'], Decimal('20'))
+        self.assertEqual(data['sedes'], [{'id': self.south.id, 'nombre': 'Sur'}])
+
+    def test_invalid_parameters(self):
+        for params in (
+            {'bucket': 'year'},
+            {'start_date': '2026-02-01', 'end_date': '2026-01-01'},
+            {'start_date': '2020-01-01', 'end_date': '2026-01-01'},
+            {'start_date': '01/01/2026'},
+        ):
+            self.get(params, status=400)
+
+
+class WorklistTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        sede = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        department = Department.objects.create(name='Piura', code='20')
+        province = Province.objects.create(name='Sullana', code='2006', department=department)
+        district = District.objects.create(name='Bellavista', code='200602', province=province)
+        self.alto = Caserio.objects.create(name='Alto', code='A1', district=district)
+        self.bajo = Caserio.objects.create(name='Bajo', code='B1', district=district)
+        for dni, name, address, caserio, amount in (
+            ('11111111', 'Ana', 'Calle 2', self.alto, '50'),
+            ('22222222', 'Beto', 'Calle 1', self.alto, '30'),
+            ('33333333', 'Carla', 'Calle 3', self.bajo, '20'),
+            ('44444444', 'Dora', 'Calle 4', None, '10'),
+        ):
+            client = Client.objects.create(dni=dni, name=name, address=address, sede=sede, caserio=caserio)
+            service = Service.objects.create(client=client, service_type='internet', price=Decimal(amount))
+            MonthlyFee.objects.create(
+                client=client, service=service, month_date=datetime.date(2026, 1, 1),
+                due_date=datetime.date(2026, 1, 15), amount=Decimal(amount), status='expired',
+            )
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user('oficina', password='x', role='oficina', sede=sede))
+
+    def get(self, params=None):
+        response = self.api.get('/api/reports/worklist/', params or {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_tree_with_subtotals(self):
+        data = self.get()
+        self.assertEqual((data['total_debt'], data['client_count']), (Decimal('110'), 4))
+
+        piura, unknown = data['departments']
+        self.assertEqual((piura['name'], piura['total_debt'], piura['client_count']), ('Piura', Decimal('100'), 3))
+        district = piura['provinces'][0]['districts'][0]
+        self.assertEqual(district['client_count'], 3)
+        alto, bajo = district['caserios']
+        self.assertEqual((alto['name'], alto['total_debt'], alto['client_count']), ('Alto', Decimal('80'), 2))
+        self.assertEqual((bajo['name'], bajo['total_debt']), ('Bajo', Decimal('20')))
+        # Dentro del caserío, por dirección
+        self.assertEqual([client['name'] for client in alto['clients']], ['Beto', 'Ana'])
+        self.assertEqual(alto['clients'][0]['debt'], Decimal('30'))
+
+        # Clientes sin caserío: todos los niveles "Sin ubicación"
+        self.assertEqual((unknown['name'], unknown['id']), ('Sin ubicación', None))
+        caserio = unknown['provinces'][0]['districts'][0]['caserios'][0]
+        self.assertEqual(caserio['name'], 'Sin ubicación')
+        self.assertEqual([client['name'] for client in caserio['clients']], ['Dora'])
+
+    def test_caserio_filter(self):
+        data = self.get({'caserio': self.bajo.id})
+        self.assertEqual((data['total_debt'], data['client_count']), (Decimal('20'), 1))
+        caserios = data['departments'][0]['provinces'][0]['districts'][0]['caserios']
+        self.assertEqual([caserio['id'] for caserio in caserios], [self.bajo.id])
+
+
+class SedeComparisonTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.north = Sede.objects.create(nombre='Norte', direccion='Av. 1')
+        self.south = Sede.objects.create(nombre='Sur', direccion='Av. 2')
+        self.east = Sede.objects.create(nombre='Este', direccion='Av. 3')
+        Sede.objects.create(nombre='Oeste', direccion='Av. 4', activo=False)
+        for dni, sede, billed in (('11111111', self.north, '200'), ('22222222', self.south, '300')):
+            client = Client.objects.create(dni=dni, name='Cliente', address='Calle 1', sede=sede)
+            service = Service.objects.create(client=client, service_type='internet', price=Decimal(billed))
+            MonthlyFee.objects.create(
+                client=client, service=service, month_date=datetime.date(2026, 1, 1),
+                due_date=datetime.date(2026, 1, 15), amount=Decimal(billed), status='pending',
+            )
+        for day, sede, total in (
+            (datetime.date(2025, 12, 10), self.north, '50'),
+            (datetime.date(2026, 1, 10), self.north, '100'),
+            (datetime.date(2026, 1, 20), self.south, '300'),
+        ):
+            DailyRevenueRollup.objects.create(day=day, sede=sede, method='yape', count=1, total=Decimal(total))
+        self.api = APIClient()
+        self.api.force_authenticate(User.objects.create_user('admin', password='x', role='admin'))
+
+    def test_ranking_share_and_month_over_month(self):
+        response = self.api.get('/api/reports/sede-comparison/', {'month': '2026-01'})
+        self.assertEqual(response.status_code, 200)
+        sedes = response.data['sedes']
+        # Las sedes inactivas no se comparan
+        self.assertEqual([sede['nombre'] for sede in sedes], ['Sur', 'Norte', 'Este'])
+        self.assertEqual([sede['rank'] for sede in sedes], [1, 2, 3])
+        self.assertEqual([sede['rate_rank'] for sede in sedes], [1, 2, 3])
+        self.assertEqual([sede['share'] for sede in sedes], [0.75, 0.25, 0.0])
+        self.assertEqual([sede['collection_rate'] for sede in sedes], [1.0, 0.5, None])
+
+        south, north, east = sedes
+        self.assertEqual(
+            (north['previous_collected'], north['mom_delta'], north['mom_delta_pct']), (Decimal('50'), Decimal('50'), 1.0)
+        )
+        self.assertIsNone(south['mom_delta_pct'])
+        self.assertEqual((east['collected'], east['clients'], east['billed']), (0, 0, 0))
+
+    def test_ties_share_rank(self):
+        DailyRevenueRollup.objects.create(
+            day=datetime.date(2026, 1, 5), sede=self.north, method='efectivo', count=1, total=Decimal('200')
+        )
+        sedes = self.api.get('/api/reports/sede-comparison/', {'month': '2026-01'}).data['sedes']
+        self.assertEqual([(sede['nombre'], sede['rank']) for sede in sedes], [('Norte', 1), ('Sur', 1), ('Este', 3)])
+
+    def test_admin_only(self):
+        self.api.force_authenticate(User.objects.create_user('oficina', password='x', role='oficina', sede=self.north))
+        self.assertEqual(self.api.get('/api/reports/sede-comparison/').status_code, 403)
+        self.api.force_authenticate(User.objects.get(username='admin'))
+        self.assertEqual(self.api.get('/api/reports/sede-comparison/', {'month': 'enero'}).status_code, 400)
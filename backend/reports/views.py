@@ -1,53 +1,452 @@
-from rest_framework import viewsets
+import os
+
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Q
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
+from django.db import transaction
+from django.db.models import Sum, Count, Q, F, Value, OuterRef, Subquery, Window, DecimalField, FloatField
+from django.db.models.functions import Cast, Coalesce, Greatest, NullIf, Rank, TruncDay, TruncMonth, TruncWeek
 from django.utils import timezone
-from payments.models import Payment, MonthlyFee
-from core.models import Client
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from payments.models import ClientBalance, MonthlyFee, Payment, PaymentAllocation, Service
+from core import jobs, storage
+from core.models import Client, Sede
 from users.models import User
+from .forecast import HISTORY_MONTHS, add_months, month_end, month_forecast
+from .models import CollectorDailyStats, DailyRevenueRollup, ReportExport
+from .rollups import day_start
+from .serializers import ReportExportSerializer
+from . import cache as report_cache
+from .cache import cached_report
+from .pagination import keyset_page
+from .exports import CSVRenderer, XLSXRenderer, EXPORT_FORMATS, export_response
+from .queries import (
+    DEBTOR_COLUMNS, TRANSACTION_COLUMNS, date_range, debtors_queryset, export_rows, revenue_querysets
+)
+
+
+# Agrupaciones del reporte de antigüedad de deuda
+AGING_GROUPS = {
+    'client': [
+        'client__id', 'client__code', 'client__name', 'client__phone',
+        'client__caserio__name', 'client__cobrador_asignado__username'
+    ],
+    'caserio': ['client__caserio__id', 'client__caserio__name', 'client__caserio__district__name'],
+    'cobrador': [
+        'client__cobrador_asignado__id', 'client__cobrador_asignado__username',
+        'client__cobrador_asignado__first_name', 'client__cobrador_asignado__last_name'
+    ],
+}
+
+OPEN_FEE_STATUSES = ['pending', 'partial', 'expired']
+
+# Niveles de la hoja de ruta: (llave de los hijos, relación desde ClientBalance)
+WORKLIST_LEVELS = [
+    ('departments', 'client__caserio__district__province__department'),
+    ('provinces', 'client__caserio__district__province'),
+    ('districts', 'client__caserio__district'),
+    ('caserios', 'client__caserio'),
+]
+
+WORKLIST_CLIENT_FIELDS = {
+    'client_id': 'id',
+    'client__code': 'code',
+    'client__name': 'name',
+    'client__phone': 'phone',
+    'client__address': 'address',
+    'months_owed': 'months_owed',
+    'oldest_unpaid_month': 'oldest_unpaid_month',
+    'open_amount': 'debt',
+}
+
+# Acciones con respuesta cacheada (ver reports/cache.py)
+CACHED_REPORTS = (
+    'debtors', 'worklist', 'revenue', 'revenue_series', 'forecast', 'sede_comparison',
+    'aging', 'collectors', 'collector_stats',
+)
+
+EXPORT_RENDERERS = [JSONRenderer, BrowsableAPIRenderer, CSVRenderer, XLSXRenderer]
+
+# Series de recaudación: truncado en la base de datos y rango por defecto
+SERIES_BUCKETS = {
+    'day': (TruncDay, timedelta(days=29)),
+    'week': (TruncWeek, timedelta(weeks=11)),
+    'month': (TruncMonth, timedelta(days=334)),
+}
+MAX_SERIES_POINTS = 1000
+
+
+def _bucket_start(day, bucket):
+    if bucket == 'week':
+        return day - timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(day, bucket):
+    if bucket == 'week':
+        return day + timedelta(weeks=1)
+    if bucket == 'month':
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def _export(export_format, filename, queryset, columns):
+    try:
+        return export_response(
+            export_format, filename, [header for _, header in columns],
+            export_rows(queryset, columns), title=filename
+        )
+    except ImportError:
+        return Response({'error': 'Exportación XLSX no disponible (falta openpyxl)'}, status=400)
+
+
+def _per_sede(queryset, sede_field, aggregate):
+    """
+    Subconsulta correlacionada: agregado de `queryset` para la sede de la
+    fila externa (0 si no hay filas).
+    """
+    total = queryset.filter(**{sede_field: OuterRef('pk')}).order_by().values(sede_field).annotate(
+        total=aggregate
+    ).values('total')
+    return Coalesce(Subquery(total), Value(0), output_field=aggregate.output_field)
+
 
 class ReportsViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
-    @action(detail=False, methods=['get'])
+    @action(detail=False, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    @cached_report
     def debtors(self, request):
         """
         Reporte de Morosos: Clientes con deudas pendientes o vencidas.
+        Lee el saldo desnormalizado (ClientBalance) en vez de agrupar deudas.
+        Con ?format=csv|xlsx se descarga como archivo.
         """
-        user = request.user
-        queryset = MonthlyFee.objects.filter(status__in=['pending', 'expired'])
+        queryset = debtors_queryset(request.user, request.query_params)
 
-        # Filtros de seguridad
-        if user.role != 'admin' and user.sede:
-            queryset = queryset.filter(client__sede=user.sede)
-        if user.role == 'cobrador':
-            queryset = queryset.filter(client__cobrador_asignado=user)
+        export_format = request.query_params.get('format')
+        if export_format in EXPORT_FORMATS:
+            return _export(export_format, 'morosos', queryset, DEBTOR_COLUMNS)
 
-        # Filtros opcionales
-        sede_id = request.query_params.get('sede')
-        if sede_id:
-            queryset = queryset.filter(client__sede_id=sede_id)
-
-        # Agrupar por cliente
         debtors = queryset.values(
             'client__id', 'client__name', 'client__code', 'client__phone',
-            'client__caserio__name', 'client__address'
+            'client__caserio__name', 'client__address',
+            'months_owed', 'oldest_unpaid_month', 'last_payment_date'
         ).annotate(
-            total_debt=Sum('amount'),
-            months_owed=Count('id')
-        ).order_by('-total_debt')
+            total_debt=F('open_amount')
+        )
 
         return Response(debtors)
 
     @action(detail=False, methods=['get'])
+    @cached_report
+    def worklist(self, request):
+        """
+        Hoja de ruta de cobranza: clientes con deuda agrupados por
+        Departamento → Provincia → Distrito → Caserío, con subtotales por
+        nivel y los clientes de cada caserío ordenados por dirección.
+        Una sola consulta (joins de la jerarquía sobre ClientBalance) y el
+        árbol se arma recorriendo las filas ya ordenadas.
+
+        Filtros: ?sede=, ?caserio= y, para admin/oficina, ?cobrador=.
+        """
+        queryset = debtors_queryset(request.user, request.query_params)
+
+        cobrador_id = request.query_params.get('cobrador')
+        if cobrador_id and request.user.role != 'cobrador':
+            queryset = queryset.filter(client__cobrador_asignado_id=cobrador_id)
+        caserio_id = request.query_params.get('caserio')
+        if caserio_id:
+            queryset = queryset.filter(client__caserio_id=caserio_id)
+
+        ordering = []
+        for _, relation in WORKLIST_LEVELS:
+            ordering += [F(f'{relation}__name').asc(nulls_last=True), f'{relation}_id']
+        ordering += ['client__address', 'client__name']
+
+        level_fields = [field for _, relation in WORKLIST_LEVELS for field in (f'{relation}_id', f'{relation}__name')]
+        rows = queryset.values(*level_fields, *WORKLIST_CLIENT_FIELDS).order_by(*ordering)
+
+        root = {'total_debt': Decimal('0'), 'client_count': 0, WORKLIST_LEVELS[0][0]: []}
+        current = [None] * len(WORKLIST_LEVELS)
+        for row in rows:
+            parent, changed = root, False
+            for depth, (children, relation) in enumerate(WORKLIST_LEVELS):
+                node = current[depth]
+                if changed or node is None or node['id'] != row[f'{relation}_id']:
+                    next_children = WORKLIST_LEVELS[depth + 1][0] if depth + 1 < len(WORKLIST_LEVELS) else 'clients'
+                    node = {
+                        'id': row[f'{relation}_id'],
+                        'name': row[f'{relation}__name'] or 'Sin ubicación',
+                        'total_debt': Decimal('0'),
+                        'client_count': 0,
+                        next_children: [],
+                    }
+                    parent[children].append(node)
+                    current[depth], changed = node, True
+                node['total_debt'] += row['open_amount']
+                node['client_count'] += 1
+                parent = node
+            parent['clients'].append({key: row[field] for field, key in WORKLIST_CLIENT_FIELDS.items()})
+            root['total_debt'] += row['open_amount']
+            root['client_count'] += 1
+
+        return Response({'date': timezone.localdate(), **root})
+
+    @action(detail=False, methods=['get'], renderer_classes=EXPORT_RENDERERS)
+    @cached_report
     def revenue(self, request):
         """
         Reporte de Ingresos: Pagos validados.
+        Totales, división por método y serie diaria salen de la recaudación
+        pre-agregada (DailyRevenueRollup); solo el detalle lee pagos, por
+        páginas (?cursor=...&page_size=...; el siguiente cursor viene en
+        next_cursor). Con ?format=csv|xlsx se descarga el detalle completo.
+        """
+        try:
+            queryset, rollups = revenue_querysets(request.user, request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        export_format = request.query_params.get('format')
+        if export_format in EXPORT_FORMATS:
+            return _export(export_format, 'ingresos', queryset.order_by('-date', '-id'), TRANSACTION_COLUMNS)
+
+        # Detalle de transacciones paginado por cursor sobre (date, id)
+        try:
+            payments, next_cursor = keyset_page(
+                queryset, request, ['date', 'amount', 'method', 'client__name', 'client__code']
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        
+        total_revenue = rollups.aggregate(total=Sum('total'))['total'] or 0
+        
+        by_method = rollups.values('method').annotate(
+            total=Sum('total'),
+            count=Sum('count')
+        ).order_by('-total')
+        
+        daily = rollups.values('day').annotate(
+            total=Sum('total'),
+            count=Sum('count')
+        ).order_by('day')
+
+        return Response({
+            'transactions': payments,
+            'next_cursor': next_cursor,
+            'total_revenue': total_revenue,
+            'by_method': by_method,
+            'daily': daily
+        })
+
+    @action(detail=False, methods=['get'], url_path='revenue-series')
+    @cached_report
+    def revenue_series(self, request):
+        """
+        Serie de recaudación por día, semana o mes (?bucket=day|week|month)
+        agregada en la base de datos sobre DailyRevenueRollup, con los
+        periodos sin pagos en cero y el desglose por método y por sede.
+        Acepta los mismos filtros que el reporte de ingresos.
+        """
+        bucket = request.query_params.get('bucket', 'day')
+        if bucket not in SERIES_BUCKETS:
+            return Response({'error': f"bucket debe ser uno de: {', '.join(SERIES_BUCKETS)}"}, status=400)
+        trunc, default_span = SERIES_BUCKETS[bucket]
+
+        try:
+            _, rollups = revenue_querysets(request.user, request.query_params)
+            start_date, end_date = date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+
+        end_date = end_date or timezone.localdate()
+        start_date = start_date or end_date - default_span
+        if start_date > end_date:
+            return Response({'error': 'start_date no puede ser mayor que end_date'}, status=400)
+        rollups = rollups.filter(day__gte=start_date, day__lte=end_date)
+
+        # Periodos del rango, incluidos los que no tienen pagos
+        periods = []
+        period = _bucket_start(start_date, bucket)
+        while period <= end_date:
+            periods.append(period)
+            if len(periods) > MAX_SERIES_POINTS:
+                return Response({'error': f'El rango supera {MAX_SERIES_POINTS} periodos, use un bucket mayor'}, status=400)
+            period = _next_bucket(period, bucket)
+
+        rows = rollups.annotate(period=trunc('day')).values('period', 'method', 'sede_id').annotate(
+            total=Sum('total'),
+            count=Sum('count'),
+        ).order_by()
+
+        zero = Decimal('0')
+        series = {
+            period: {'period': period, 'total': zero, 'count': 0, 'by_method': {}, 'by_sede': {}}
+            for period in periods
+        }
+        methods, sede_ids = set(), set()
+        for row in rows:
+            point = series[row['period']]
+            point['total'] += row['total']
+            point['count'] += row['count']
+            point['by_method'][row['method']] = point['by_method'].get(row['method'], zero) + row['total']
+            sede_key = str(row['sede_id']) if row['sede_id'] else 'sin_sede'
+            point['by_sede'][sede_key] = point['by_sede'].get(sede_key, zero) + row['total']
+            methods.add(row['method'])
+            sede_ids.add(row['sede_id'])
+
+        # Mismas llaves en todos los puntos, para graficar sin huecos
+        sede_keys = [str(sede_id) if sede_id else 'sin_sede' for sede_id in sede_ids]
+        for point in series.values():
+            point['by_method'] = {method: point['by_method'].get(method, zero) for method in sorted(methods)}
+            point['by_sede'] = {key: point['by_sede'].get(key, zero) for key in sorted(sede_keys)}
+
+        return Response({
+            'bucket': bucket,
+            'start_date': start_date,
+            'end_date': end_date,
+            'methods': sorted(methods),
+            'sedes': list(Sede.objects.filter(id__in=sede_ids).values('id', 'nombre').order_by('id')),
+            'series': list(series.values()),
+        })
+
+    @action(detail=False, methods=['get'])
+    @cached_report
+    def forecast(self, request):
         """
+        Pronóstico de cobranza del mes (?month=YYYY-MM, por defecto el
+        actual): esperado (facturado del mes + deuda arrastrada), cobrado a
+        la fecha y cierre proyectado con la curva histórica de cobranza de
+        cada sede (?history=<meses>, por defecto 6).
+        """
+        month = request.query_params.get('month')
+        try:
+            month_date = datetime.strptime(month, '%Y-%m').date() if month else timezone.localdate().replace(day=1)
+            history = int(request.query_params.get('history', HISTORY_MONTHS))
+        except ValueError:
+            return Response({'error': 'Use month=YYYY-MM e history entero'}, status=400)
+        if not 1 <= history <= 24:
+            return Response({'error': 'history debe estar entre 1 y 24'}, status=400)
+
         user = request.user
-        queryset = Payment.objects.filter(validation_status='validated')
+        fees = MonthlyFee.objects.all()
+        balances = ClientBalance.objects.all()
+        if user.role != 'admin' and user.sede:
+            fees = fees.filter(client__sede=user.sede)
+            balances = balances.filter(client__sede=user.sede)
+        if user.role == 'cobrador':
+            fees = fees.filter(client__cobrador_asignado=user)
+            balances = balances.filter(client__cobrador_asignado=user)
+
+        sede_id = request.query_params.get('sede')
+        if sede_id:
+            fees = fees.filter(client__sede_id=sede_id)
+            balances = balances.filter(client__sede_id=sede_id)
+        _, rollups = revenue_querysets(user, {'sede': sede_id})
+
+        data = month_forecast(fees, balances, rollups, month_date, timezone.localdate(), history)
+        names = dict(Sede.objects.filter(id__in=[sede['sede_id'] for sede in data['sedes']]).values_list('id', 'nombre'))
+        for sede in data['sedes']:
+            sede['sede_nombre'] = names.get(sede['sede_id'], 'Sin sede')
+
+        return Response(data)
+
+    @action(detail=False, methods=['get'], url_path='sede-comparison')
+    @cached_report
+    def sede_comparison(self, request):
+        """
+        Comparativo de sedes para un mes (?month=YYYY-MM, por defecto el
+        actual), solo admin. Una sola consulta sobre Sede: cada indicador es
+        una subconsulta correlacionada y el ranking, la participación y el
+        total general salen de funciones de ventana.
+
+        La tasa de cobranza compara lo cobrado con lo esperado (facturado
+        del mes + deuda abierta al inicio del mes, igual que el pronóstico).
+        """
+        if request.user.role != 'admin':
+            return Response({"error": "No autorizado"}, status=403)
+
+        month = request.query_params.get('month')
+        try:
+            month_date = datetime.strptime(month, '%Y-%m').date() if month else timezone.localdate().replace(day=1)
+        except ValueError:
+            return Response({'error': 'Use month=YYYY-MM'}, status=400)
+        previous = add_months(month_date, -1)
+
+        money = DecimalField(max_digits=14, decimal_places=2)
+        rollups = DailyRevenueRollup.objects.all()
+        queryset = Sede.objects.filter(activo=True).annotate(
+            clients=_per_sede(Client.objects.all(), 'sede', Count('id')),
+            active_services=_per_sede(Service.objects.filter(is_active=True), 'client__sede', Count('id')),
+            billed=_per_sede(MonthlyFee.objects.filter(month_date=month_date), 'client__sede', Sum('amount', output_field=money)),
+            collected=_per_sede(
+                rollups.filter(day__gte=month_date, day__lte=month_end(month_date)), 'sede', Sum('total', output_field=money)
+            ),
+            previous_collected=_per_sede(
+                rollups.filter(day__gte=previous, day__lte=month_end(previous)), 'sede', Sum('total', output_field=money)
+            ),
+            debt=_per_sede(ClientBalance.objects.all(), 'client__sede', Sum('open_amount', output_field=money)),
+            # Para la deuda arrastrada (ver reports.forecast.billing_by_sede)
+            still_open=_per_sede(
+                MonthlyFee.objects.filter(month_date__gte=month_date, status__in=OPEN_FEE_STATUSES), 'client__sede',
+                Sum(F('amount') - F('paid_amount'), output_field=money)
+            ),
+            paid_since=_per_sede(
+                PaymentAllocation.objects.filter(fee__month_date__lt=month_date, payment__date__gte=day_start(month_date)),
+                'fee__client__sede', Sum('amount', output_field=money)
+            ),
+        ).annotate(
+            carried_over=Greatest(F('debt') - F('still_open') + F('paid_since'), Value(0), output_field=money),
+        ).annotate(
+            expected=F('billed') + F('carried_over'),
+        ).annotate(
+            collection_rate=Cast(F('collected'), FloatField()) / NullIf(Cast(F('expected'), FloatField()), 0.0),
+            mom_delta=F('collected') - F('previous_collected'),
+        ).annotate(
+            rank=Window(Rank(), order_by=F('collected').desc()),
+            rate_rank=Window(Rank(), order_by=F('collection_rate').desc(nulls_last=True)),
+            total_collected=Window(Sum('collected', output_field=money)),
+        ).values(
+            'id', 'nombre', 'clients', 'active_services', 'billed', 'carried_over', 'expected', 'collected',
+            'previous_collected', 'collection_rate', 'mom_delta', 'debt', 'rank', 'rate_rank', 'total_collected'
+        ).order_by('rank', 'nombre')
+
+        sedes = []
+        for row in queryset:
+            total_collected = row.pop('total_collected')
+            row['collection_rate'] = round(row['collection_rate'], 4) if row['collection_rate'] is not None else None
+            row['mom_delta_pct'] = (
+                round(float(row['mom_delta'] / row['previous_collected']), 4) if row['previous_collected'] else None
+            )
+            row['share'] = round(float(row['collected'] / total_collected), 4) if total_collected else None
+            sedes.append(row)
+
+        return Response({'month': month_date, 'sedes': sedes})
+
+    @action(detail=False, methods=['get'])
+    @cached_report
+    def aging(self, request):
+        """
+        Antigüedad de la deuda abierta en tramos de días vencidos
+        (0-30, 31-60, 61-90, 90+) agrupada por cliente, caserío o cobrador.
+
+        ?group_by=client|caserio|cobrador (por defecto client)
+        ?bucket=<tramo>&min_amount=<monto>  solo grupos con ese tramo >= monto
+        ?ordering=-days_90_plus            orden por cualquier tramo o total
+        Todo se resuelve en una sola consulta con agregación condicional.
+        """
+        user = request.user
+        group_by = request.query_params.get('group_by', 'client')
+        if group_by not in AGING_GROUPS:
+            return Response({'error': f"group_by debe ser uno de: {', '.join(AGING_GROUPS)}"}, status=400)
+
+        queryset = MonthlyFee.objects.filter(status__in=OPEN_FEE_STATUSES)
 
         # Filtros de seguridad
         if user.role != 'admin' and user.sede:
@@ -59,28 +458,43 @@ class ReportsViewSet(viewsets.ViewSet):
         sede_id = request.query_params.get('sede')
         if sede_id:
             queryset = queryset.filter(client__sede_id=sede_id)
-            
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        
-        if start_date:
-            queryset = queryset.filter(date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(date__lte=end_date)
 
-        # Agrupar por día (o mes si se prefiere, aquí devolvemos lista plana para procesar en front)
-        payments = queryset.values(
-            'date', 'amount', 'method', 'client__name', 'client__code'
-        ).order_by('-date')
-        
-        total_revenue = queryset.aggregate(total=Sum('amount'))['total'] or 0
+        today = timezone.localdate()
+        open_amount = F('amount') - F('paid_amount')
+        cutoffs = {days: today - timedelta(days=days) for days in (30, 60, 90)}
+        buckets = {
+            'days_0_30': Q(due_date__isnull=True) | Q(due_date__gte=cutoffs[30]),
+            'days_31_60': Q(due_date__lt=cutoffs[30], due_date__gte=cutoffs[60]),
+            'days_61_90': Q(due_date__lt=cutoffs[60], due_date__gte=cutoffs[90]),
+            'days_90_plus': Q(due_date__lt=cutoffs[90]),
+        }
 
-        return Response({
-            'transactions': payments,
-            'total_revenue': total_revenue
-        })
+        rows = queryset.values(*AGING_GROUPS[group_by]).annotate(
+            **{name: Coalesce(Sum(open_amount, filter=condition), Value(Decimal('0'))) for name, condition in buckets.items()},
+            total_debt=Sum(open_amount),
+            fees=Count('id'),
+            clients=Count('client', distinct=True),
+        )
+
+        # Filtro por tramo (HAVING)
+        bucket = request.query_params.get('bucket')
+        if bucket:
+            if bucket not in buckets:
+                return Response({'error': f"bucket debe ser uno de: {', '.join(buckets)}"}, status=400)
+            try:
+                min_amount = Decimal(request.query_params.get('min_amount', '0.01'))
+            except InvalidOperation:
+                return Response({'error': 'min_amount inválido'}, status=400)
+            rows = rows.filter(**{f'{bucket}__gte': min_amount})
+
+        ordering = request.query_params.get('ordering', '-total_debt')
+        if ordering.lstrip('-') not in [*buckets, 'total_debt', 'fees', 'clients']:
+            return Response({'error': 'ordering inválido'}, status=400)
+
+        return Response(rows.order_by(ordering, AGING_GROUPS[group_by][0]))
 
     @action(detail=False, methods=['get'])
+    @cached_report
     def collectors(self, request):
         """
         Efectividad de Cobradores: Recaudación por cobrador.
@@ -108,3 +522,114 @@ class ReportsViewSet(viewsets.ViewSet):
         ).order_by('-total_collected')
 
         return Response(collectors_stats)
+
+    @action(detail=False, methods=['get'], url_path='collector-stats')
+    @cached_report
+    def collector_stats(self, request):
+        """
+        Efectividad por cobrador en un rango de fechas, leída de las
+        estadísticas diarias pre-calculadas (CollectorDailyStats):
+        visitas por resultado, tasa de contacto efectivo, pagos registrados
+        y monto validado. Un cobrador solo ve su propia fila.
+        """
+        user = request.user
+        queryset = CollectorDailyStats.objects.all()
+
+        # Filtros de seguridad
+        if user.role == 'cobrador':
+            queryset = queryset.filter(cobrador=user)
+        elif user.role != 'admin' and user.sede:
+            queryset = queryset.filter(sede=user.sede)
+
+        sede_id = request.query_params.get('sede')
+        if sede_id:
+            queryset = queryset.filter(sede_id=sede_id)
+
+        try:
+            start_date, end_date = date_range(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        if start_date:
+            queryset = queryset.filter(day__gte=start_date)
+        if end_date:
+            queryset = queryset.filter(day__lte=end_date)
+
+        rows = queryset.values(
+            'cobrador_id', 'cobrador__username', 'cobrador__first_name', 'cobrador__last_name'
+        ).annotate(
+            visits_pago=Sum('visits_pago'),
+            visits_no_estaba=Sum('visits_no_estaba'),
+            visits_se_mudo=Sum('visits_se_mudo'),
+            visits_no_responde=Sum('visits_no_responde'),
+            payments_registered=Sum('payments_registered'),
+            amount_collected=Sum('amount_collected'),
+        ).order_by('-amount_collected', 'cobrador_id')
+
+        stats = []
+        for row in rows:
+            visits = row['visits_pago'] + row['visits_no_estaba'] + row['visits_se_mudo'] + row['visits_no_responde']
+            row['visits'] = visits
+            row['contact_rate'] = round(row['visits_pago'] / visits, 4) if visits else None
+            stats.append(row)
+
+        return Response(stats)
+
+    @action(detail=False, methods=['get', 'delete'], url_path='cache-stats')
+    def cache_stats(self, request):
+        """
+        Aciertos y fallos de la caché de reportes (solo admin).
+        DELETE reinicia los contadores.
+        """
+        if request.user.role != 'admin':
+            return Response({"error": "No autorizado"}, status=403)
+
+        if request.method == 'DELETE':
+            report_cache.reset_stats(CACHED_REPORTS)
+            return Response(status=204)
+        return Response(report_cache.cache_stats(CACHED_REPORTS))
+
+
+class ReportExportViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Exportaciones de reportes en segundo plano.
+
+    POST encola la exportación (202) y un worker escribe el archivo; GET
+    /report-exports/<id>/ muestra estado y avance, y /download/ entrega el
+    archivo terminado mientras no venza. Los archivos respetan el alcance
+    (sede/cobrador) de quien pidió la exportación.
+    """
+    queryset = ReportExport.objects.select_related('job')
+    serializer_class = ReportExportSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # El archivo tiene el alcance de quien lo pidió: solo admin ve todos
+        if self.request.user.role != 'admin':
+            queryset = queryset.filter(created_by=self.request.user)
+        return queryset
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            export = serializer.save(created_by=request.user)
+            export.job = jobs.enqueue('report_export', {'export_id': export.id}, user=request.user, max_attempts=2)
+            export.save(update_fields=['job'])
+
+        return Response(self.get_serializer(export).data, status=status.HTTP_202_ACCEPTED)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        export = self.get_object()
+        if export.status == 'expired':
+            return Response({'error': 'La exportación venció, solicítela de nuevo'}, status=status.HTTP_410_GONE)
+        if export.status != 'done' or not export.file:
+            return Response({'error': 'La exportación aún no está lista', 'status': export.status}, status=status.HTTP_409_CONFLICT)
+
+        if not os.path.exists(storage.media_path(export.file)):
+            return Response({'error': 'El archivo ya no existe'}, status=status.HTTP_410_GONE)
+
+        content_type = XLSXRenderer.media_type if export.format == 'xlsx' else 'application/gzip'
+        return storage.serve_file(request, export.file, content_type=content_type, filename=export.filename, as_attachment=True)
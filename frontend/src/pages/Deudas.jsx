@@ -48,13 +48,39 @@ const Deudas = () => {
 
         setGenerating(true);
         try {
-            await api.post('monthly-fees/generate/');
+            const response = await api.post('monthly-fees/generate/');
             setMessage({ type: 'success', text: 'Proceso de generación iniciado correctamente.' });
-            setTimeout(() => fetchDeudas(), 2000); // Refresh after a bit
+            pollJob(response.data.job_id);
         } catch (error) {
             console.error("Error generating debts", error);
-            setMessage({ type: 'error', text: 'Error al iniciar la generación.' });
-        } finally {
+            if (error.response?.status === 409) {
+                setMessage({ type: 'info', text: 'Ya hay una generación en curso para este mes.' });
+                pollJob(error.response.data.job_id);
+            } else {
+                setMessage({ type: 'error', text: 'Error al iniciar la generación.' });
+                setGenerating(false);
+            }
+        }
+    };
+
+    // Consulta el avance de la tarea en segundo plano hasta que termine
+    const pollJob = async (jobId) => {
+        try {
+            const response = await api.get(`jobs/${jobId}/`);
+            const job = response.data;
+            if (job.status === 'done') {
+                const { created = 0, skipped = 0 } = job.progress;
+                setMessage({ type: 'success', text: `Generación completada: ${created} generadas, ${skipped} ya existían.` });
+                setGenerating(false);
+                fetchDeudas();
+            } else if (job.status === 'failed') {
+                setMessage({ type: 'error', text: 'La generación falló.' });
+                setGenerating(false);
+            } else {
+                setTimeout(() => pollJob(jobId), 2000);
+            }
+        } catch (error) {
+            console.error("Error fetching job status", error);
             setGenerating(false);
         }
     };
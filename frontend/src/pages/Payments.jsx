@@ -87,9 +87,15 @@ const Payments = () => {
         }
     };
 
-    const handleDownloadReceipt = (url) => {
-        if (url) {
-            window.open(`http://localhost:8000${url}`, '_blank');
+    // El servidor responde con ETag: si el comprobante no cambió, el navegador reutiliza su copia (304)
+    const handleDownloadReceipt = async (id) => {
+        try {
+            const response = await api.get(`payments/${id}/receipt/`, { responseType: 'blob' });
+            const url = window.URL.createObjectURL(response.data);
+            window.open(url, '_blank');
+            setTimeout(() => window.URL.revokeObjectURL(url), 60000);
+        } catch (error) {
+            console.error("Error downloading receipt", error);
         }
     };
 
@@ -156,27 +162,32 @@ const Payments = () => {
                                         {payment.proof_image && (
                                             <IconButton
                                                 component="a"
-                                                href={payment.proof_image}
+                                                href={payment.proof_display || payment.proof_image}
                                                 target="_blank"
                                                 rel="noopener noreferrer"
                                                 color="primary"
                                                 title="Ver Comprobante"
                                             >
-                                                <ImageIcon />
-                                            </IconButton>
-                                        )}
-                                        {payment.receipt_file && (
-                                            <IconButton
-                                                component="a"
-                                                href={`http://localhost:8000${payment.receipt_file}`}
-                                                target="_blank"
-                                                rel="noopener noreferrer"
-                                                color="secondary"
-                                                title="Descargar Recibo"
-                                            >
-                                                <PictureAsPdfIcon />
+                                                {payment.proof_thumbnail ? (
+                                                    <Box
+                                                        component="img"
+                                                        src={payment.proof_thumbnail}
+                                                        alt="Comprobante"
+                                                        loading="lazy"
+                                                        sx={{ width: 40, height: 40, objectFit: 'cover', borderRadius: 1 }}
+                                                    />
+                                                ) : (
+                                                    <ImageIcon />
+                                                )}
                                             </IconButton>
                                         )}
+                                        <IconButton
+                                            onClick={() => handleDownloadReceipt(payment.id)}
+                                            color="secondary"
+                                            title="Descargar Recibo"
+                                        >
+                                            <PictureAsPdfIcon />
+                                        </IconButton>
                                     </Box>
                                 </TableCell>
                                 {isOficina && (
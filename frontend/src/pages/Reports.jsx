@@ -14,6 +14,7 @@ const Reports = () => {
     const [revenue, setRevenue] = useState({ transactions: [], total_revenue: 0 });
     const [collectors, setCollectors] = useState([]);
     const [dateRange, setDateRange] = useState({ start: '', end: '' });
+    const [exportStatus, setExportStatus] = useState('');
 
     useEffect(() => {
         if (tabValue === 0) fetchDebtors();
@@ -32,16 +33,25 @@ const Reports = () => {
         }
     };
 
-    const fetchRevenue = async () => {
+    const fetchRevenue = async (cursor = null) => {
         try {
             let url = 'reports/revenue/';
             const params = new URLSearchParams();
             if (selectedSede) params.append('sede', selectedSede);
             if (dateRange.start) params.append('start_date', dateRange.start);
             if (dateRange.end) params.append('end_date', dateRange.end);
+            if (cursor) params.append('cursor', cursor);
 
             const response = await api.get(`${url}?${params.toString()}`);
-            setRevenue(response.data);
+            if (cursor) {
+                // Página siguiente: agregar a las transacciones ya cargadas
+                setRevenue(prev => ({
+                    ...response.data,
+                    transactions: [...prev.transactions, ...response.data.transactions]
+                }));
+            } else {
+                setRevenue(response.data);
+            }
         } catch (error) {
             console.error("Error fetching revenue", error);
         }
@@ -66,16 +76,69 @@ const Reports = () => {
         setDateRange({ ...dateRange, [e.target.name]: e.target.value });
     };
 
-    // Simple CSV Export
-    const exportToCSV = (data, filename) => {
-        const csvContent = "data:text/csv;charset=utf-8,"
-            + data.map(e => Object.values(e).join(",")).join("\n");
-        const encodedUri = encodeURI(csvContent);
+    const exportParams = (report) => {
+        const params = {};
+        if (selectedSede) params.sede = selectedSede;
+        if (report === 'revenue') {
+            if (dateRange.start) params.start_date = dateRange.start;
+            if (dateRange.end) params.end_date = dateRange.end;
+        }
+        return params;
+    };
+
+    const saveBlob = (blob, filename) => {
+        const url = window.URL.createObjectURL(blob);
         const link = document.createElement("a");
-        link.setAttribute("href", encodedUri);
+        link.setAttribute("href", url);
         link.setAttribute("download", filename);
         document.body.appendChild(link);
         link.click();
+        link.remove();
+        window.URL.revokeObjectURL(url);
+    };
+
+    // Descarga el reporte completo generado en el servidor (CSV por streaming)
+    const downloadExport = async (report, filename, format = 'csv') => {
+        try {
+            const params = new URLSearchParams({ format, ...exportParams(report) });
+            const response = await api.get(`reports/${report}/?${params.toString()}`, { responseType: 'blob' });
+            saveBlob(response.data, `${filename}.${format}`);
+        } catch (error) {
+            console.error("Error exporting report", error);
+        }
+    };
+
+    // Exportación pesada (Excel): la genera un worker y se descarga al terminar
+    const pollExport = async (exportId) => {
+        try {
+            const { data } = await api.get(`report-exports/${exportId}/`);
+            if (data.status === 'done') {
+                const response = await api.get(`report-exports/${exportId}/download/`, { responseType: 'blob' });
+                saveBlob(response.data, data.filename);
+                setExportStatus('');
+            } else if (data.status === 'failed' || data.status === 'expired') {
+                setExportStatus('');
+                alert('La exportación falló.');
+            } else {
+                const { rows = 0, total } = data.progress;
+                setExportStatus(total ? `Generando archivo... ${rows} de ${total} filas` : 'Generando archivo...');
+                setTimeout(() => pollExport(exportId), 2000);
+            }
+        } catch (error) {
+            console.error("Error fetching export status", error);
+            setExportStatus('');
+        }
+    };
+
+    const requestExport = async (report, format = 'xlsx') => {
+        try {
+            setExportStatus('Generando archivo...');
+            const { data } = await api.post('report-exports/', { report, format, params: exportParams(report) });
+            pollExport(data.id);
+        } catch (error) {
+            console.error("Error requesting export", error);
+            setExportStatus('');
+        }
     };
 
     return (
@@ -87,6 +150,12 @@ const Reports = () => {
                 <SedeSelector onSedeChange={setSelectedSede} />
             </Grid>
 
+            {exportStatus && (
+                <Typography variant="body2" color="text.secondary" sx={{ mb: 1 }}>
+                    {exportStatus}
+                </Typography>
+            )}
+
             <Paper sx={{ mb: 3 }}>
                 <Tabs value={tabValue} onChange={handleTabChange} indicatorColor="primary" textColor="primary" centered>
                     <Tab label="Morosos" />
@@ -99,9 +168,12 @@ const Reports = () => {
             {tabValue === 0 && (
                 <Paper sx={{ p: 2 }}>
                     <Box sx={{ display: 'flex', justifyContent: 'flex-end', mb: 2 }}>
-                        <Button startIcon={<DownloadIcon />} onClick={() => exportToCSV(debtors, 'morosos.csv')}>
+                        <Button startIcon={<DownloadIcon />} onClick={() => downloadExport('debtors', 'morosos')}>
                             Exportar CSV
                         </Button>
+                        <Button startIcon={<DownloadIcon />} onClick={() => requestExport('debtors')} disabled={!!exportStatus}>
+                            Exportar Excel
+                        </Button>
                     </Box>
                     <Table>
                         <TableHead sx={{ bgcolor: 'grey.200' }}>
@@ -152,9 +224,12 @@ const Reports = () => {
                         <Typography variant="h6" color="success.main">
                             Total: S/ {revenue.total_revenue}
                         </Typography>
-                        <Button startIcon={<DownloadIcon />} onClick={() => exportToCSV(revenue.transactions, 'ingresos.csv')}>
+                        <Button startIcon={<DownloadIcon />} onClick={() => downloadExport('revenue', 'ingresos')}>
                             Exportar CSV
                         </Button>
+                        <Button startIcon={<DownloadIcon />} onClick={() => requestExport('revenue')} disabled={!!exportStatus}>
+                            Exportar Excel
+                        </Button>
                     </Box>
                     <Table>
                         <TableHead sx={{ bgcolor: 'grey.200' }}>
@@ -178,6 +253,13 @@ const Reports = () => {
                             ))}
                         </TableBody>
                     </Table>
+                    {revenue.next_cursor && (
+                        <Box sx={{ display: 'flex', justifyContent: 'center', mt: 2 }}>
+                            <Button onClick={() => fetchRevenue(revenue.next_cursor)}>
+                                Cargar más
+                            </Button>
+                        </Box>
+                    )}
                 </Paper>
             )}
 
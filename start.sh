@@ -0,0 +1,12 @@
+#!/usr/bin/env bash
+# Proceso web y worker de tareas en el mismo servicio: el worker escribe en
+# MEDIA_ROOT los archivos que el proceso web entrega (exportaciones,
+# comprobantes, imágenes de constancias), así que deben compartir disco.
+set -o errexit
+
+cd backend
+
+# El worker se reinicia si termina con error
+(while true; do python manage.py run_worker || true; sleep 5; done) &
+
+exec gunicorn config.wsgi:application